@@ -0,0 +1,752 @@
+#!/usr/bin/env python3
+"""
+Modo distribuido: sensores y colector central
+
+Cada sensor ejecuta un ICMPScanner sobre los rangos que le asigna el colector
+y le envía por TCP los cambios de su tabla de hosts (deltas binarios compactos).
+El colector fusiona todo en una única tabla, con la misma interfaz de lectura
+que ICMPScanner, para alimentar RadarDisplay, y reparte de nuevo los rangos
+cuando un sensor se conecta o se cae.
+
+Uso:
+  python distributed.py sensor 192.168.1.10:7700            # Sensor real (requiere permisos ICMP)
+  python distributed.py sensor 127.0.0.1:7700 --simulate    # Sensor con red simulada
+  python distributed.py demo                                # Colector + 3 sensores simulados en localhost
+  python icmp_radar.py --collector 7700 -n 10.0.0.0/24,10.0.1.0/24   # Radar alimentado por sensores
+"""
+
+import sys
+import time
+import socket
+import struct
+import zlib
+import random
+import argparse
+import threading
+import ipaddress
+from threading import Lock, RLock
+
+from event_log import events
+
+# Tipos de mensaje
+MSG_HELLO = 1       # sensor -> colector: identificador del sensor
+MSG_ASSIGN = 2      # colector -> sensor: rangos asignados
+MSG_DELTA = 3       # sensor -> colector: cambios en la tabla de hosts
+MSG_HEARTBEAT = 4   # sensor -> colector: sigue vivo
+
+# Operaciones dentro de un delta
+OP_UPSERT = 1
+OP_REMOVE = 2
+
+FRAME_HEADER = struct.Struct("!IB")        # longitud del payload, tipo
+DELTA_HEADER = struct.Struct("!dH")        # reloj del sensor al enviar, número de registros
+HOST_RECORD = struct.Struct("!fdHB")       # latencia, last_seen, ángulo, tiene MAC
+MAX_DELTA_RECORDS = 0xFFFF                 # El número de registros de un delta es u16
+
+
+def send_frame(sock, msg_type, payload=b""):
+    """
+    Envía un mensaje enmarcado: [longitud u32][tipo u8][payload]
+    """
+    sock.sendall(FRAME_HEADER.pack(len(payload), msg_type) + payload)
+
+
+def _recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Conexión cerrada")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def recv_frame(sock):
+    """
+    Recibe un mensaje enmarcado
+
+    Returns:
+        tuple: (tipo, payload)
+    """
+    length, msg_type = FRAME_HEADER.unpack(_recv_exact(sock, FRAME_HEADER.size))
+    return msg_type, _recv_exact(sock, length) if length else b""
+
+
+def close_socket(sock):
+    """
+    Cierra un socket despertando a cualquier thread bloqueado en recv
+    """
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    try:
+        sock.close()
+    except OSError:
+        pass
+
+
+def encode_strings(values):
+    """
+    Lista de strings -> [cantidad u16]([longitud u8][utf-8])*
+    """
+    parts = [struct.pack("!H", len(values))]
+    for value in values:
+        raw = value.encode()
+        parts.append(struct.pack("!B", len(raw)) + raw)
+    return b"".join(parts)
+
+
+def decode_strings(payload):
+    (count,) = struct.unpack_from("!H", payload, 0)
+    offset = 2
+    values = []
+    for _ in range(count):
+        size = payload[offset]
+        values.append(payload[offset + 1:offset + 1 + size].decode())
+        offset += 1 + size
+    return values
+
+
+def encode_delta(upserts, removals, macs):
+    """
+    Codifica un delta de hosts
+
+    Args:
+        upserts (dict): {ip: {latency, last_seen, angle}} hosts nuevos o modificados
+        removals (list): IPs eliminadas
+        macs (dict): {ip: mac} MACs conocidas de los hosts enviados
+
+    Returns:
+        bytes: Payload del mensaje MSG_DELTA
+
+    Raises:
+        ValueError: Si hay más de MAX_DELTA_RECORDS registros (usar encode_deltas)
+    """
+    if len(upserts) + len(removals) > MAX_DELTA_RECORDS:
+        raise ValueError(f"Delta de {len(upserts) + len(removals)} registros (máximo {MAX_DELTA_RECORDS})")
+    parts = [DELTA_HEADER.pack(time.time(), len(upserts) + len(removals))]
+    for ip, info in upserts.items():
+        address = ipaddress.ip_address(ip)
+        mac = macs.get(ip)
+        parts.append(struct.pack("!BB", OP_UPSERT, address.version) + address.packed)
+        parts.append(HOST_RECORD.pack(info['latency'], info['last_seen'],
+                                      int(info['angle']) % 360, 1 if mac else 0))
+        if mac:
+            parts.append(bytes.fromhex(mac.replace(":", "").replace("-", "")))
+    for ip in removals:
+        address = ipaddress.ip_address(ip)
+        parts.append(struct.pack("!BB", OP_REMOVE, address.version) + address.packed)
+    return b"".join(parts)
+
+
+def encode_deltas(upserts, removals, macs, category="DELTA"):
+    """
+    Codifica un delta de cualquier tamaño en payloads de como mucho
+    MAX_DELTA_RECORDS registros. Un trozo que no se puede codificar se registra y
+    se descarta sin afectar a los demás.
+
+    Args:
+        upserts (dict): {ip: {latency, last_seen, angle}} hosts nuevos o modificados
+        removals (list): IPs eliminadas
+        macs (dict): {ip: mac} MACs conocidas de los hosts enviados
+        category (str): Categoría de los eventos de error
+
+    Returns:
+        list: Payloads MSG_DELTA (al menos uno si el delta está vacío)
+    """
+    records = [(ip, info) for ip, info in upserts.items()] + [(ip, None) for ip in removals]
+    payloads = []
+    for start in range(0, max(len(records), 1), MAX_DELTA_RECORDS):
+        chunk = records[start:start + MAX_DELTA_RECORDS]
+        try:
+            payloads.append(encode_delta({ip: info for ip, info in chunk if info is not None},
+                                         [ip for ip, info in chunk if info is None], macs))
+        except (struct.error, ValueError) as e:
+            events.error(category, f"Trozo de delta descartado ({len(chunk)} registros): {e}")
+    return payloads
+
+
+def decode_delta(payload):
+    """
+    Decodifica un delta de hosts
+
+    Returns:
+        tuple: (reloj del sensor, upserts {ip: {...}}, removals [ip], macs {ip: mac})
+    """
+    sensor_time, count = DELTA_HEADER.unpack_from(payload, 0)
+    offset = DELTA_HEADER.size
+    upserts, removals, macs = {}, [], {}
+    for _ in range(count):
+        op, version = struct.unpack_from("!BB", payload, offset)
+        offset += 2
+        size = 4 if version == 4 else 16
+        ip = str(ipaddress.ip_address(payload[offset:offset + size]))
+        offset += size
+        if op == OP_REMOVE:
+            removals.append(ip)
+            continue
+        latency, last_seen, angle, has_mac = HOST_RECORD.unpack_from(payload, offset)
+        offset += HOST_RECORD.size
+        upserts[ip] = {'latency': latency, 'last_seen': last_seen, 'angle': angle}
+        if has_mac:
+            macs[ip] = ":".join(f"{b:02x}" for b in payload[offset:offset + 6])
+            offset += 6
+    return sensor_time, upserts, removals, macs
+
+
+class SimulatedScanner:
+    def __init__(self, network_range=None, alive_ratio=0.1, seed=None):
+        """
+        Escáner simulado con la misma interfaz que ICMPScanner, para probar
+        sensores y colector en localhost sin permisos ni red real
+
+        Args:
+            network_range (str|list): Rango(s) asignados
+            alive_ratio (float): Proporción de direcciones que "responden"
+            seed (int): Semilla para las latencias simuladas
+        """
+        self.network_range = network_range or []
+        self.alive_ratio = alive_ratio
+        self.random = random.Random(seed)
+        self.active_hosts = {}
+        self.learned_macs = {}
+        self.hosts_lock = RLock()
+        self.state_version = 0
+        self.change_event = threading.Event()
+        self.scanning = False
+        self.scan_thread = None
+
+    def _ranges(self):
+        ranges = self.network_range
+        if isinstance(ranges, str):
+            ranges = [r.strip() for r in ranges.split(",") if r.strip()]
+        return ranges
+
+    def scan_network(self):
+        """
+        "Escanea" los rangos: las direcciones vivas se eligen de forma determinista
+        """
+        now = time.time()
+        alive = {}
+        for network_range in self._ranges():
+            for ip in ipaddress.ip_network(network_range, strict=False).hosts():
+                ip = str(ip)
+                digest = zlib.crc32(ip.encode())  # Estable entre procesos (a diferencia de hash)
+                if (digest % 1000) < self.alive_ratio * 1000:
+                    alive[ip] = {
+                        'latency': self.random.uniform(1, 80),
+                        'last_seen': now,
+                        'angle': digest % 360
+                    }
+                    self.learned_macs.setdefault(
+                        ip, "02:" + ":".join(f"{self.random.randint(0, 255):02x}" for _ in range(5)))
+        with self.hosts_lock:
+            self.active_hosts = alive
+            self.state_version += 1
+        self.change_event.set()
+
+    def start_continuous_scan(self, interval=1, max_interval=None):
+        if self.scanning:
+            return
+        self.scanning = True
+
+        def scan_loop():
+            while self.scanning:
+                self.scan_network()
+                time.sleep(interval)
+
+        self.scan_thread = threading.Thread(target=scan_loop, daemon=True)
+        self.scan_thread.start()
+
+    def start_continuous_ping(self):
+        pass
+
+    def start_cleanup_thread(self):
+        pass
+
+    def stop_scan(self):
+        self.scanning = False
+        if self.scan_thread:
+            self.scan_thread.join(timeout=2)
+
+    def get_state_version(self):
+        return self.state_version
+
+    def get_active_hosts(self):
+        with self.hosts_lock:
+            return self.active_hosts.copy()
+
+    def get_learned_macs(self):
+        with self.hosts_lock:
+            return self.learned_macs.copy()
+
+
+class SensorNode:
+    def __init__(self, collector_address, sensor_id=None, scanner=None, delta_interval=0.5,
+                 scan_interval=1):
+        """
+        Sensor: escanea los rangos asignados por el colector y le envía deltas
+
+        Args:
+            collector_address (tuple): (host, puerto) del colector
+            sensor_id (str): Identificador del sensor (por defecto el hostname + PID)
+            scanner: Escáner a usar (ICMPScanner o SimulatedScanner)
+            delta_interval (float): Segundos entre envíos de deltas
+            scan_interval (float): Intervalo entre barridos del escáner
+        """
+        if scanner is None:
+            from icmp_scanner import ICMPScanner
+            scanner = ICMPScanner(network_range=[])
+        self.collector_address = collector_address
+        self.sensor_id = sensor_id or f"{socket.gethostname()}-{random.randint(0, 0xFFFF):04x}"
+        self.scanner = scanner
+        self.delta_interval = delta_interval
+        self.scan_interval = scan_interval
+
+        self.sock = None
+        self.send_lock = Lock()
+        self.running = False
+        self.assigned_ranges = []
+        self.sent_hosts = {}  # Último estado enviado {ip: (latencia, last_seen)}
+        self.thread = None
+
+    def start(self):
+        """
+        Inicia el sensor en segundo plano (se reconecta si el colector cae)
+        """
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Detiene el sensor y su escáner
+        """
+        self.running = False
+        self._close()
+        self.scanner.stop_scan()
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def _close(self):
+        if self.sock is not None:
+            close_socket(self.sock)
+            self.sock = None
+
+    def _run(self):
+        backoff = 0.5
+        while self.running:
+            try:
+                self.sock = socket.create_connection(self.collector_address, timeout=5)
+                self.sock.settimeout(None)
+                send_frame(self.sock, MSG_HELLO, self.sensor_id.encode())
+                events.info("SENSOR", f"{self.sensor_id} conectado a {self.collector_address[0]}:{self.collector_address[1]}")
+                backoff = 0.5
+                self.sent_hosts = {}
+
+                sender = threading.Thread(target=self._send_loop, args=(self.sock,), daemon=True)
+                sender.start()
+                while self.running:
+                    msg_type, payload = recv_frame(self.sock)
+                    if msg_type == MSG_ASSIGN:
+                        self._apply_assignment(decode_strings(payload))
+            except (OSError, ConnectionError, struct.error):
+                pass
+            self._close()
+            if self.running:
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 10)
+
+    def _apply_assignment(self, ranges):
+        """
+        Cambia los rangos a escanear. El escáner olvida los hosts de los rangos que
+        pasan a otro sensor (dejan de sondearse) y el próximo delta los envía como
+        bajas; el colector solo las aplica si el host sigue siendo de este sensor
+        """
+        self.assigned_ranges = ranges
+        self.scanner.network_range = list(ranges)
+        forget_outside = getattr(self.scanner, "forget_outside", None)
+        if forget_outside is not None:
+            forget_outside(ranges)
+        events.info("SENSOR", f"{self.sensor_id} asignado: {', '.join(ranges) or '(nada)'}", ranges=ranges)
+        if ranges:
+            self.scanner.start_continuous_scan(self.scan_interval)
+            self.scanner.start_continuous_ping()
+            self.scanner.start_cleanup_thread()
+
+    def _in_assigned_ranges(self, ip, networks):
+        address = ipaddress.ip_address(ip)
+        return any(address.version == n.version and address in n for n in networks)
+
+    def _send_loop(self, sock):
+        last_version = None
+        last_send = 0.0
+        while self.running and sock is self.sock:
+            time.sleep(self.delta_interval)
+            try:
+                version = self.scanner.get_state_version()
+                if version == last_version and time.time() - last_send < 1.0:
+                    continue
+                if version == last_version:
+                    send_frame(sock, MSG_HEARTBEAT)
+                    last_send = time.time()
+                    continue
+                last_version = version
+
+                networks = [ipaddress.ip_network(r, strict=False) for r in self.assigned_ranges]
+                hosts = {ip: info for ip, info in self.scanner.get_active_hosts().items()
+                         if self._in_assigned_ranges(ip, networks)}
+                macs = self.scanner.get_learned_macs()
+
+                with self.send_lock:
+                    upserts = {ip: info for ip, info in hosts.items()
+                               if self.sent_hosts.get(ip) != (info['latency'], info['last_seen'])}
+                    removals = [ip for ip in self.sent_hosts if ip not in hosts]
+                    self.sent_hosts = {ip: (info['latency'], info['last_seen'])
+                                       for ip, info in hosts.items()}
+                if upserts or removals:
+                    for payload in encode_deltas(upserts, removals, macs, category="SENSOR"):
+                        send_frame(sock, MSG_DELTA, payload)
+                else:
+                    send_frame(sock, MSG_HEARTBEAT)
+                last_send = time.time()
+            except (OSError, ValueError):
+                break  # Conexión cerrada: el thread principal reconecta
+            except Exception as e:
+                # Cualquier otro fallo no debe dejar al sensor sin enviar deltas
+                events.error("SENSOR", f"Error preparando delta: {e}")
+
+
+class SensorCollector:
+    def __init__(self, ranges, port=7700, host="0.0.0.0", host_persistence=30, sensor_timeout=5):
+        """
+        Colector central: reparte rangos entre sensores y fusiona sus deltas.
+        Expone la misma interfaz de lectura que ICMPScanner (get_active_hosts,
+        get_learned_macs, get_state_version, change_event) para alimentar RadarDisplay.
+
+        Args:
+            ranges (str|list): Rangos a repartir entre los sensores
+            port (int): Puerto TCP de escucha (0 = cualquiera libre)
+            host (str): Dirección de escucha
+            host_persistence (int): Segundos sin noticias antes de expirar un host
+            sensor_timeout (float): Segundos sin mensajes antes de dar un sensor por caído
+        """
+        if isinstance(ranges, str):
+            ranges = [r.strip() for r in ranges.split(",") if r.strip()]
+        self.ranges = list(ranges)
+        self.networks = [(r, ipaddress.ip_network(r, strict=False)) for r in self.ranges]
+        self.host = host
+        self.port = port
+        self.host_persistence = host_persistence
+        self.sensor_timeout = sensor_timeout
+
+        self.sensors = {}  # id -> {sock, ranges, last_message, send_lock}
+        self.sensors_lock = RLock()
+        self.rebalance_lock = Lock()  # Evita que una asignación vieja llegue después de una nueva
+        self.active_hosts = {}
+        self.learned_macs = {}
+        self.hosts_lock = RLock()
+        self.state_version = 0
+        self.change_event = threading.Event()
+
+        self.server = None
+        self.running = False
+        self.threads = []
+
+    # --- Interfaz compatible con ICMPScanner ---
+
+    def get_active_hosts(self):
+        with self.hosts_lock:
+            return self.active_hosts.copy()
+
+    def get_learned_macs(self):
+        with self.hosts_lock:
+            return self.learned_macs.copy()
+
+    def get_learned_macs_count(self):
+        return len(self.learned_macs)
+
+    def get_state_version(self):
+        return self.state_version
+
+    def get_assignments(self):
+        """
+        Returns:
+            dict: {id de sensor: [rangos asignados]}
+        """
+        with self.sensors_lock:
+            return {sensor_id: list(info['ranges']) for sensor_id, info in self.sensors.items()}
+
+    # --- Ciclo de vida ---
+
+    def start(self):
+        """
+        Empieza a aceptar sensores
+        """
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind((self.host, self.port))
+        self.server.listen()
+        self.server.settimeout(0.5)
+        self.port = self.server.getsockname()[1]
+        self.running = True
+        for target in (self._accept_loop, self._maintenance_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        print(f"[COLLECTOR] Escuchando en {self.host}:{self.port} ({len(self.ranges)} rangos)")
+
+    def stop_scan(self):
+        """
+        Detiene el colector (mismo nombre que en ICMPScanner)
+        """
+        self.running = False
+        if self.server is not None:
+            self.server.close()
+        with self.sensors_lock:
+            for info in self.sensors.values():
+                close_socket(info['sock'])
+            self.sensors.clear()
+        for thread in self.threads:
+            thread.join(timeout=2)
+
+    def _mark_changed(self):
+        self.state_version += 1
+        self.change_event.set()
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                conn, _ = self.server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            conn.settimeout(None)
+            threading.Thread(target=self._handle_sensor, args=(conn,), daemon=True).start()
+
+    def _handle_sensor(self, conn):
+        sensor_id = None
+        try:
+            msg_type, payload = recv_frame(conn)
+            if msg_type != MSG_HELLO:
+                conn.close()
+                return
+            sensor_id = payload.decode()
+            with self.sensors_lock:
+                old = self.sensors.get(sensor_id)
+                if old is not None:
+                    close_socket(old['sock'])
+                self.sensors[sensor_id] = {
+                    'sock': conn, 'ranges': [], 'last_message': time.time(), 'send_lock': Lock()
+                }
+            events.info("COLLECTOR", f"Sensor conectado: {sensor_id}", sensor=sensor_id)
+            self._rebalance()
+
+            while self.running:
+                msg_type, payload = recv_frame(conn)
+                with self.sensors_lock:
+                    info = self.sensors.get(sensor_id)
+                    if info is None or info['sock'] is not conn:
+                        break  # Reemplazado por una conexión más nueva
+                    info['last_message'] = time.time()
+                if msg_type == MSG_DELTA:
+                    self._apply_delta(sensor_id, payload)
+        except (OSError, ConnectionError, struct.error, UnicodeDecodeError):
+            pass
+        finally:
+            close_socket(conn)
+            if sensor_id is not None:
+                self._drop_sensor(sensor_id, conn)
+
+    def _drop_sensor(self, sensor_id, conn=None):
+        with self.sensors_lock:
+            info = self.sensors.get(sensor_id)
+            if info is None or (conn is not None and info['sock'] is not conn):
+                return
+            del self.sensors[sensor_id]
+        if self.running:
+            events.warning("COLLECTOR", f"Sensor caído: {sensor_id}, repartiendo sus rangos", sensor=sensor_id)
+            self._rebalance()
+
+    def _rebalance(self):
+        """
+        Reparte los rangos entre los sensores conectados (reparto estable: ver
+        _compute_assignments) y envía la asignación a los que cambian
+        """
+        with self.rebalance_lock:
+            self._send_assignments(self._compute_assignments())
+
+    def _compute_assignments(self):
+        """
+        Reparto estable: cada sensor conserva sus rangos (y su historial de
+        vivacidad); solo se mueven los huérfanos de un sensor caído y, cuando
+        entra uno nuevo, lo imprescindible para que nadie supere el reparto equitativo
+
+        Returns:
+            list: (info del sensor, rangos) de los sensores cuya asignación cambió
+        """
+        with self.sensors_lock:
+            sensor_ids = sorted(self.sensors)
+            if not sensor_ids:
+                return []
+            fair_share = -(-len(self.ranges) // len(sensor_ids))  # Techo de rangos por sensor
+            pending = set(self.ranges)
+            assignments = {}
+            surplus = []
+            for sensor_id in sensor_ids:
+                kept = [r for r in self.sensors[sensor_id]['ranges'] if r in pending]
+                pending.difference_update(kept)
+                assignments[sensor_id] = kept[:fair_share]
+                surplus.extend(kept[fair_share:])
+            # Huérfanos y excedentes (en el orden de configuración) al sensor con menos rangos
+            orphans = [r for r in self.ranges if r in pending] + surplus
+            for network_range in orphans:
+                least_loaded = min(sensor_ids, key=lambda sensor_id: len(assignments[sensor_id]))
+                assignments[least_loaded].append(network_range)
+            changed = []
+            for sensor_id, ranges in assignments.items():
+                info = self.sensors[sensor_id]
+                if info['ranges'] != ranges:
+                    info['ranges'] = ranges
+                    changed.append((info, ranges))
+        return changed
+
+    def _send_assignments(self, changed):
+        for info, ranges in changed:
+            try:
+                with info['send_lock']:
+                    send_frame(info['sock'], MSG_ASSIGN, encode_strings(ranges))
+            except OSError:
+                pass  # Se detectará la caída en su thread de lectura
+
+    def _apply_delta(self, sensor_id, payload):
+        sensor_time, upserts, removals, macs = decode_delta(payload)
+        now = time.time()
+        with self.hosts_lock:
+            for ip, info in upserts.items():
+                # Convertir last_seen al reloj local usando la antigüedad según el sensor
+                age = max(sensor_time - info['last_seen'], 0)
+                info['last_seen'] = now - age
+                info['sensor'] = sensor_id
+                info['interface'] = sensor_id  # El panel de hover muestra "Red: subred (sensor)"
+                info['subnet'] = self._subnet_of(ip)
+                info['family'] = 6 if ":" in ip else 4
+                self.active_hosts[ip] = info
+            for ip in removals:
+                existing = self.active_hosts.get(ip)
+                if existing is not None and existing.get('sensor') == sensor_id:
+                    del self.active_hosts[ip]
+                    self.learned_macs.pop(ip, None)  # Vuelve con el host si reaparece
+            self.learned_macs.update(macs)
+            if upserts or removals or macs:
+                self._mark_changed()
+
+    def _subnet_of(self, ip):
+        address = ipaddress.ip_address(ip)
+        for network_range, network in self.networks:
+            if address.version == network.version and address in network:
+                return network_range
+        return None
+
+    def _maintenance_loop(self):
+        """
+        Expira hosts sin noticias y da por caídos los sensores silenciosos
+        """
+        while self.running:
+            time.sleep(1)
+            now = time.time()
+            with self.sensors_lock:
+                silent = [sensor_id for sensor_id, info in self.sensors.items()
+                          if now - info['last_message'] > self.sensor_timeout]
+            for sensor_id in silent:
+                with self.sensors_lock:
+                    info = self.sensors.get(sensor_id)
+                if info is not None:
+                    close_socket(info['sock'])
+                    self._drop_sensor(sensor_id)
+
+            with self.hosts_lock:
+                expired = [ip for ip, info in self.active_hosts.items()
+                           if now - info['last_seen'] > self.host_persistence]
+                for ip in expired:
+                    del self.active_hosts[ip]
+                    self.learned_macs.pop(ip, None)
+                if expired:
+                    self._mark_changed()
+
+
+def run_demo(sensor_count=3):
+    """
+    Colector y varios sensores simulados en localhost; a mitad de la demo se
+    cae un sensor y se comprueba que sus rangos pasan a los demás
+    """
+    ranges = [f"10.0.{i}.0/24" for i in range(sensor_count * 2)]
+    collector = SensorCollector(ranges, port=0, host="127.0.0.1")
+    collector.start()
+
+    sensors = []
+    for i in range(sensor_count):
+        sensor = SensorNode(("127.0.0.1", collector.port), sensor_id=f"sensor-{i}",
+                            scanner=SimulatedScanner(seed=i), delta_interval=0.2)
+        sensor.start()
+        sensors.append(sensor)
+
+    time.sleep(2)
+    print(f"[DEMO] Asignación: {collector.get_assignments()}")
+    print(f"[DEMO] Hosts fusionados: {len(collector.get_active_hosts())}")
+
+    print(f"[DEMO] Deteniendo {sensors[0].sensor_id}...")
+    sensors[0].stop()
+    time.sleep(2)
+    assignments = collector.get_assignments()
+    print(f"[DEMO] Asignación tras la caída: {assignments}")
+    covered = sorted(r for rs in assignments.values() for r in rs)
+    ok = sensors[0].sensor_id not in assignments and covered == sorted(ranges)
+    print(f"[DEMO] Rangos del sensor caído repartidos: {ok}")
+    print(f"[DEMO] Hosts fusionados: {len(collector.get_active_hosts())}")
+
+    collector.stop_scan()
+    for sensor in sensors[1:]:
+        sensor.stop()
+    return 0 if ok else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ICMP Radar - Sensores distribuidos")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sensor_parser = subparsers.add_parser("sensor", help="Ejecutar un sensor")
+    sensor_parser.add_argument("collector", help="Dirección del colector HOST:PUERTO")
+    sensor_parser.add_argument("--id", help="Identificador del sensor", default=None)
+    sensor_parser.add_argument("--simulate", action="store_true",
+                               help="Usar una red simulada (sin ICMP real)")
+    sensor_parser.add_argument("-i", "--interval", type=float, default=1.0,
+                               help="Intervalo entre escaneos en segundos (default: 1.0)")
+
+    demo_parser = subparsers.add_parser("demo", help="Colector + sensores simulados en localhost")
+    demo_parser.add_argument("--sensors", type=int, default=3, help="Número de sensores (default: 3)")
+
+    args = parser.parse_args()
+
+    if args.command == "demo":
+        return run_demo(args.sensors)
+
+    host, _, port = args.collector.rpartition(":")
+    scanner = SimulatedScanner() if args.simulate else None
+    sensor = SensorNode((host or "127.0.0.1", int(port)), sensor_id=args.id, scanner=scanner,
+                        scan_interval=args.interval)
+    sensor.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n[STOP] Deteniendo sensor...")
+    finally:
+        sensor.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
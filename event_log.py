@@ -0,0 +1,243 @@
+"""
+Registro de eventos estructurado y no bloqueante
+
+Los threads de escaneo solo encolan el evento (sin locks ni escritura a la
+terminal); un thread de fondo lo escribe aplicando límites de frecuencia por
+categoría. Los eventos quedan además en un buffer circular en memoria que se
+puede volcar a demanda (dump, o SIGUSR1 con install_dump_signal); el buffer
+tiene su propio nivel (DEBUG por defecto), así que un volcado incluye el detalle
+que no se escribe en la terminal.
+
+Uso:
+  from event_log import events
+  events.debug("MAC-SKIP", "Ya conocemos MAC, omitiendo ARP", ip=ip)
+  events.info("ARP-LEARN", f"{ip} -> {mac}", ip=ip, mac=mac)
+"""
+
+import sys
+import json
+import atexit
+import time
+import queue
+import signal
+import threading
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+LEVELS = {name: level for level, name in LEVEL_NAMES.items()}
+
+
+class EventLogger:
+    def __init__(self, level=INFO, ring_size=4096, stream=None, json_output=False, ring_level=DEBUG):
+        """
+        Inicializa el registro de eventos
+
+        Args:
+            level (int|str): Nivel mínimo de los eventos escritos
+            ring_size (int): Eventos que se conservan en memoria para dump()
+            stream: Destino de la salida (por defecto sys.stdout)
+            json_output (bool): Escribir una línea JSON por evento en vez de "[CATEGORÍA] mensaje"
+            ring_level (int|str): Nivel mínimo de los eventos que se guardan en el buffer circular
+        """
+        self.level = LEVELS.get(level, level) if isinstance(level, str) else level
+        self.ring_level = LEVELS.get(ring_level, ring_level) if isinstance(ring_level, str) else ring_level
+        self.stream = stream
+        self.json_output = json_output
+
+        self.queue = queue.SimpleQueue()  # put() sin lock de Python, seguro entre threads
+        self.ring = deque(maxlen=ring_size)
+
+        # Por categoría: 1 de cada N eventos (muestreo) y eventos/s escritos (límite)
+        self.sampling = {}
+        self.sample_counters = {}
+        self.rate_limits = {}
+        self.buckets = {}     # categoría -> [tokens, último rellenado]
+        self.suppressed = {}  # categoría -> eventos no escritos por el límite
+
+        self.enqueued = 0
+        self.processed = 0  # Eventos ya pasados por el thread escritor (ver flush)
+        self.written = 0
+        self.writer_thread = None
+        self.writer_lock = threading.Lock()
+
+    def set_level(self, level):
+        self.level = LEVELS.get(level, level) if isinstance(level, str) else level
+
+    def set_ring_level(self, level):
+        self.ring_level = LEVELS.get(level, level) if isinstance(level, str) else level
+
+    def set_sampling(self, category, one_in):
+        """
+        Registrar solo 1 de cada `one_in` eventos de la categoría (1 = todos)
+        """
+        self.sampling[category] = max(1, int(one_in))
+
+    def set_rate_limit(self, category, per_second, burst=None):
+        """
+        Escribir como máximo `per_second` eventos/s de la categoría (los demás van
+        solo al buffer circular y se resumen como "suprimidos")
+        """
+        self.rate_limits[category] = (per_second, burst or max(1, per_second))
+
+    def log(self, level, category, message, **fields):
+        """
+        Encola un evento (no bloquea ni escribe en el thread que llama)
+
+        Args:
+            level (int): DEBUG, INFO, WARNING o ERROR
+            category (str): Categoría del evento (ej: "ARP-LEARN")
+            message (str): Texto legible
+            **fields: Datos estructurados del evento
+        """
+        if level < self.level and level < self.ring_level:
+            return
+        one_in = self.sampling.get(category)
+        if one_in is not None:
+            count = self.sample_counters.get(category, 0) + 1
+            self.sample_counters[category] = count  # Carrera inocua: solo afecta al muestreo
+            if count % one_in:
+                return
+        if self.writer_thread is None:
+            self._start_writer()
+        self.queue.put((time.time(), level, category, message, fields))
+        self.enqueued += 1
+
+    def debug(self, category, message, **fields):
+        self.log(DEBUG, category, message, **fields)
+
+    def info(self, category, message, **fields):
+        self.log(INFO, category, message, **fields)
+
+    def warning(self, category, message, **fields):
+        self.log(WARNING, category, message, **fields)
+
+    def error(self, category, message, **fields):
+        self.log(ERROR, category, message, **fields)
+
+    def _start_writer(self):
+        with self.writer_lock:
+            if self.writer_thread is None:
+                self.writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+                self.writer_thread.start()
+
+    def _allow(self, category, now):
+        limit = self.rate_limits.get(category)
+        if limit is None:
+            return True
+        per_second, burst = limit
+        bucket = self.buckets.setdefault(category, [burst, now])
+        bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * per_second)
+        bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return True
+        self.suppressed[category] = self.suppressed.get(category, 0) + 1
+        return False
+
+    def _format(self, event):
+        timestamp, level, category, message, fields = event
+        if self.json_output:
+            return json.dumps({'time': timestamp, 'level': LEVEL_NAMES.get(level, level),
+                               'category': category, 'message': message, **fields}, default=str)
+        return f"[{category}] {message}"
+
+    def _writer_loop(self):
+        last_summary = time.time()
+        while True:
+            event = self.queue.get()
+            lines = []
+            batch = 0
+            while event is not None:
+                batch += 1
+                if event[1] >= self.ring_level:
+                    self.ring.append(event)
+                if event[1] >= self.level and self._allow(event[2], event[0]):
+                    lines.append(self._format(event))
+                try:
+                    event = self.queue.get_nowait()  # Vaciar lo acumulado en una sola escritura
+                except queue.Empty:
+                    event = None
+
+            now = time.time()
+            if self.suppressed and now - last_summary >= 5:
+                summary = ", ".join(f"{c}: {n}" for c, n in sorted(self.suppressed.items()))
+                lines.append(f"[LOG] Eventos suprimidos por límite de frecuencia (5s): {summary}")
+                self.suppressed = {}
+                last_summary = now
+
+            if lines:
+                stream = self.stream or sys.stdout
+                try:
+                    stream.write("\n".join(lines) + "\n")
+                    stream.flush()
+                except (OSError, ValueError):
+                    pass
+                self.written += len(lines)
+            self.processed += batch
+
+    def flush(self, timeout=1.0):
+        """
+        Espera a que el thread escritor procese los eventos ya encolados (el
+        thread es daemon: sin esto, lo encolado justo antes de salir se pierde)
+
+        Args:
+            timeout (float): Espera máxima en segundos
+
+        Returns:
+            bool: True si se escribió todo a tiempo
+        """
+        target = self.enqueued
+        deadline = time.time() + timeout
+        while self.processed < target:
+            if self.writer_thread is None or time.time() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def dump(self, stream=None, last=None):
+        """
+        Escribe los eventos del buffer circular (incluidos los suprimidos en la salida)
+
+        Args:
+            stream: Destino (por defecto sys.stderr)
+            last (int): Solo los últimos N eventos
+        """
+        stream = stream or sys.stderr
+        buffered = list(self.ring)
+        if last is not None:
+            buffered = buffered[-last:]
+        for timestamp, level, category, message, fields in buffered:
+            clock = time.strftime("%H:%M:%S", time.localtime(timestamp))
+            extra = " ".join(f"{k}={v}" for k, v in fields.items())
+            stream.write(f"{clock}.{int(timestamp % 1 * 1000):03d} {LEVEL_NAMES.get(level, level):7} "
+                         f"[{category}] {message}{'  ' + extra if extra else ''}\n")
+        stream.flush()
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: {enqueued, written, pending, buffered}
+        """
+        return {'enqueued': self.enqueued, 'written': self.written,
+                'pending': self.queue.qsize(), 'buffered': len(self.ring)}
+
+    def install_dump_signal(self, signum=getattr(signal, "SIGUSR1", None)):
+        """
+        Vuelca el buffer circular a stderr al recibir la señal (kill -USR1 <pid>)
+        """
+        if signum is not None:
+            signal.signal(signum, lambda *_: self.dump())
+
+
+# Registro compartido por todos los módulos (se vacía al salir del intérprete)
+events = EventLogger()
+atexit.register(events.flush)
+events.set_rate_limit("PING-CONT", 20)
+events.set_rate_limit("ARP-LEARN", 20)
+events.set_rate_limit("NDP-LEARN", 20)
+events.set_rate_limit("CLEANUP", 10)
@@ -31,6 +31,11 @@ import warnings
 import logging
 from icmp_scanner import ICMPScanner
 from radar_display import RadarDisplay
+from distributed import SensorCollector
+from scanner_daemon import DaemonClient
+from shared_table import SharedHostTable, SharedHostTableReader
+from event_log import events
+from reply_listener import has_raw_socket_privileges
 
 # Suprimir warnings de Scapy threading en Windows
 warnings.filterwarnings("ignore", category=RuntimeWarning, module="scapy")
@@ -47,22 +52,217 @@ def handle_thread_exception(args):
 
 threading.excepthook = handle_thread_exception
 
+class RenderScheduler:
+    WAKE_EVENT = pygame.USEREVENT + 1  # Lo publica el hilo que vigila los cambios del escáner
+    
+    def __init__(self, active_fps=60, idle_fps=2, sweep_fps=10, input_linger=1.0, sweep_linger=10.0):
+        """
+        Decide cuándo renderizar un frame para no gastar CPU si nada cambia
+        
+        Args:
+            active_fps (int): FPS mientras hay interacción del usuario
+            idle_fps (float): FPS cuando no hay cambios ni interacción recientes
+            sweep_fps (float): FPS para animar el barrido tras actividad reciente (0 = sin animar)
+            input_linger (float): Segundos a FPS activos tras el último evento de entrada
+            sweep_linger (float): Segundos animando el barrido tras el último cambio o evento
+        """
+        self.active_fps = active_fps
+        self.idle_fps = idle_fps
+        self.sweep_fps = sweep_fps
+        self.input_linger = input_linger
+        self.sweep_linger = sweep_linger
+        
+        self.last_input_time = 0.0
+        self.last_activity_time = time.time()
+        self.last_frame_time = 0.0
+        self.change_pending = True  # Renderizar el primer frame enseguida
+        
+        # Puente entre change_event y la cola de eventos de Pygame: wait() bloquea en
+        # pygame.event.wait y este hilo lo despierta publicando WAKE_EVENT
+        self.wake_lock = threading.Lock()
+        self.wake_armed = threading.Event()
+        self.wake_thread = None
+        
+        # Estadísticas de render (ventana actual)
+        self.window_start = time.time()
+        self.window_frames = 0
+        self.window_cpu = 0.0
+        self.last_stats = {'fps': 0.0, 'render_cpu_percent': 0.0}
+    
+    def notify_input(self):
+        """
+        Registra un evento de entrada (mouse, teclado, ventana)
+        """
+        self.last_input_time = self.last_activity_time = time.time()
+        self.change_pending = True
+    
+    def notify_change(self):
+        """
+        Registra un cambio de datos: el próximo frame se renderiza de inmediato
+        """
+        self.last_activity_time = time.time()
+        self.change_pending = True
+    
+    def current_interval(self, now=None):
+        """
+        Retorna el intervalo objetivo entre frames según la actividad: FPS activos
+        con interacción, FPS del barrido tras cambios recientes y FPS de reposo
+        el resto del tiempo
+        
+        Returns:
+            float: Segundos entre frames
+        """
+        if now is None:
+            now = time.time()
+        if now - self.last_input_time < self.input_linger:
+            return 1.0 / self.active_fps
+        if self.sweep_fps > 0 and now - self.last_activity_time < self.sweep_linger:
+            return 1.0 / max(self.idle_fps, self.sweep_fps)
+        return 1.0 / max(self.idle_fps, 0.1)
+    
+    def frame_due(self):
+        """
+        Indica si toca renderizar un frame ahora
+        """
+        now = time.time()
+        if self.change_pending:
+            # Aun con cambios, no superar los FPS activos
+            return now - self.last_frame_time >= 1.0 / self.active_fps
+        return now - self.last_frame_time >= self.current_interval(now)
+    
+    def render(self, render_fn):
+        """
+        Ejecuta render_fn midiendo el tiempo de CPU del hilo de render
+        
+        Args:
+            render_fn (callable): Función que dibuja el frame
+        """
+        cpu_start = time.thread_time()
+        render_fn()
+        self.window_cpu += time.thread_time() - cpu_start
+        self.window_frames += 1
+        self.last_frame_time = time.time()
+        self.change_pending = False
+    
+    def _wake_loop(self, change_event):
+        # Solo publica mientras wait() está bloqueado (armado): sin esperas activas
+        while True:
+            self.wake_armed.wait()
+            change_event.wait()
+            with self.wake_lock:
+                if self.wake_armed.is_set():
+                    self.wake_armed.clear()
+                    pygame.event.post(pygame.event.Event(self.WAKE_EVENT))
+    
+    def wait(self, change_event):
+        """
+        Espera hasta el próximo frame bloqueado en la cola de eventos de Pygame:
+        despierta antes si llega un evento de entrada o si el escáner activa
+        change_event
+        
+        Args:
+            change_event (threading.Event): Evento que el escáner activa con cada cambio visible
+        """
+        now = time.time()
+        remaining = self.last_frame_time + self.current_interval(now) - now
+        if self.change_pending or remaining <= 0:
+            # Ceder el resto del intervalo mínimo entre frames activos
+            remaining = self.last_frame_time + 1.0 / self.active_fps - now
+            if remaining > 0:
+                time.sleep(remaining)
+            return
+        if change_event.is_set() or pygame.event.peek():
+            return
+        
+        if self.wake_thread is None:
+            self.wake_thread = threading.Thread(target=self._wake_loop, args=(change_event,),
+                                                daemon=True)
+            self.wake_thread.start()
+        self.wake_armed.set()
+        event = pygame.event.wait(max(int(remaining * 1000), 1))
+        with self.wake_lock:
+            self.wake_armed.clear()
+        pygame.event.clear(self.WAKE_EVENT)
+        if event.type not in (pygame.NOEVENT, self.WAKE_EVENT):
+            pygame.event.post(event)  # Devolverlo a la cola para handle_events
+    
+    def get_stats(self):
+        """
+        Retorna FPS y porcentaje de CPU usado por el render (se recalcula cada 5s)
+        
+        Returns:
+            dict: {fps, render_cpu_percent}
+        """
+        elapsed = time.time() - self.window_start
+        if elapsed >= 5.0:
+            self.last_stats = {
+                'fps': self.window_frames / elapsed,
+                'render_cpu_percent': 100.0 * self.window_cpu / elapsed
+            }
+            self.window_start = time.time()
+            self.window_frames = 0
+            self.window_cpu = 0.0
+        return self.last_stats
+
 class ICMPRadarApp:
-    def __init__(self, network_range=None, scan_interval=1, window_size=(800, 600)):
+    def __init__(self, network_range=None, scan_interval=1, window_size=(800, 600),
+                 idle_fps=2, sweep_fps=10, verbose=False, all_interfaces=False, ipv6=False,
+                 broadcast=False, max_interval=30, collector_port=None, daemon_socket=None,
+                 export_shm=None, attach_shm=None, hops=False):
         """
         Inicializa la aplicación ICMP Radar
         
         Args:
-            network_range (str): Rango de red a escanear (None para auto-detectar)
+            network_range (str): Rango(s) de red a escanear, separados por comas (None para auto-detectar)
             scan_interval (int): Intervalo entre escaneos en segundos
             window_size (tuple): Tamaño de la ventana (ancho, alto)
+            idle_fps (float): FPS cuando no hay cambios ni interacción recientes
+            sweep_fps (float): FPS para animar el barrido tras cambios o interacción recientes
+            verbose (bool): Mostrar estadísticas de render periódicamente
+            all_interfaces (bool): Al auto-detectar, escanear todas las subredes conectadas
+            ipv6 (bool): Descubrir también hosts IPv6 por eco multicast
+            broadcast (bool): Pre-barrido con eco a la dirección de broadcast de cada red
+            max_interval (float): Intervalo máximo entre barridos cuando la red está estable
+            collector_port (int): Si se indica, no escanear: actuar como colector de sensores
+                distribuidos en ese puerto, repartiéndoles network_range
+            daemon_socket (str): Si se indica, no escanear: suscribirse al demonio de escaneo
+                (scanner_daemon.py) en ese socket Unix
+            export_shm (str): Publicar la tabla de hosts en este segmento de memoria compartida
+            attach_shm (str): Si se indica, no escanear: leer la tabla de hosts del segmento de
+                memoria compartida que publica otro proceso
+            hops (bool): Trazar rutas a redes remotas y situar los hosts por saltos de red
         """
         self.network_range = network_range
+        self.all_interfaces = all_interfaces
         self.scan_interval = scan_interval
+        self.verbose = verbose
+        self.scheduler = RenderScheduler(active_fps=60, idle_fps=idle_fps, sweep_fps=sweep_fps)
+        
+        self.collector_mode = collector_port is not None
+        self.subscriber_mode = daemon_socket is not None
+        self.shm_mode = attach_shm is not None
+        self.shared_table = None
         
         # Inicializar componentes
-        self.scanner = ICMPScanner(timeout=0.5, host_persistence=30)
-        self.radar = RadarDisplay(window_size[0], window_size[1])
+        if self.shm_mode:
+            self.scanner = SharedHostTableReader(attach_shm)
+        elif self.subscriber_mode:
+            self.scanner = DaemonClient(daemon_socket, host_persistence=30)
+        elif self.collector_mode:
+            # La tabla fusionada del colector tiene la misma interfaz de lectura que el escáner
+            self.scanner = SensorCollector(network_range or [], port=collector_port, host_persistence=30)
+        else:
+            if export_shm:
+                self.shared_table = SharedHostTable(export_shm)
+            self.scanner = ICMPScanner(timeout=0.5, host_persistence=30, ipv6_discovery=ipv6,
+                                       broadcast_discovery=broadcast, shared_table=self.shared_table,
+                                       path_discovery=hops)
+            self.scanner.cadence.min_interval = scan_interval
+            self.scanner.cadence.max_interval = max(max_interval, scan_interval)
+            self.scanner.cadence.interval = scan_interval
+        self.window_size = window_size
+        self.hops = hops
+        self.radar = None  # La ventana se abre en run(), con el escaneo ya en marcha
         
         # Variables de estado
         self.running = False
@@ -76,9 +276,25 @@ class ICMPRadarApp:
         """
         Configura el rango de red a escanear
         """
-        if self.network_range:
+        if self.shm_mode:
+            self.scan_status = f"Memoria compartida: {self.scanner.shm.name}"
+        elif self.subscriber_mode:
+            self.scan_status = f"Demonio: {self.scanner.socket_path}"
+        elif self.collector_mode:
+            self.scan_status = f"Colector: {len(self.scanner.ranges)} rangos, esperando sensores"
+        elif self.network_range:
             self.scanner.network_range = self.network_range
             self.scan_status = f"Red configurada: {self.network_range}"
+        elif self.all_interfaces:
+            # Auto-detectar todas las subredes conectadas (se escanean en paralelo)
+            networks = self.scanner.get_local_networks()
+            if networks:
+                self.scanner.network_range = [n['network'] for n in networks]
+                summary = ", ".join(f"{n['network']} ({n['interface']})" for n in networks)
+                self.scan_status = f"Redes detectadas: {summary}"
+            else:
+                self.scanner.network_range = self.scanner.get_local_network()
+                self.scan_status = f"Red detectada: {self.scanner.network_range}"
         else:
             # Auto-detectar red local
             detected_network = self.scanner.get_local_network()
@@ -105,10 +321,15 @@ class ICMPRadarApp:
                     
                     hosts_found = len(self.scanner.get_active_hosts())
                     macs_learned = self.scanner.get_learned_macs_count()
-                    self.scan_status = f"Completado - {hosts_found} hosts, {macs_learned} MACs ({scan_duration:.1f}s)"
+                    probe_rate = self.scanner.get_probe_rate()
+                    self.scanner.observe_sweep_churn()
+                    next_interval = self.scanner.cadence.interval
+                    self.scan_status = (f"Completado - {hosts_found} hosts, {macs_learned} MACs "
+                                        f"({scan_duration:.1f}s, {probe_rate:.0f} pps, "
+                                        f"próximo en {next_interval:.0f}s)")
                     
-                    # Esperar antes del próximo escaneo
-                    time.sleep(self.scan_interval)
+                    # Esperar antes del próximo escaneo (menos si la red cambia)
+                    self.scanner.cadence.wait()
                     
                 except Exception as e:
                     self.scan_status = f"Error: {str(e)}"
@@ -117,54 +338,158 @@ class ICMPRadarApp:
         self.scan_thread = threading.Thread(target=scan_worker, daemon=True)
         self.scan_thread.start()
     
+    def start_collector(self):
+        """
+        Inicia el colector y mantiene actualizado el estado con los sensores conectados
+        """
+        self.scanner.start()
+        
+        def status_worker():
+            while self.running:
+                assignments = self.scanner.get_assignments()
+                hosts_found = len(self.scanner.get_active_hosts())
+                self.scan_status = (f"Colector :{self.scanner.port} - {len(assignments)} sensores, "
+                                    f"{hosts_found} hosts")
+                time.sleep(1)
+        
+        self.scan_thread = threading.Thread(target=status_worker, daemon=True)
+        self.scan_thread.start()
+    
+    def start_subscription(self):
+        """
+        Se suscribe al demonio de escaneo y muestra su estado
+        """
+        self.scanner.start()
+        
+        def status_worker():
+            while self.running:
+                self.scan_status = self.scanner.scan_status
+                time.sleep(0.5)
+        
+        self.scan_thread = threading.Thread(target=status_worker, daemon=True)
+        self.scan_thread.start()
+    
     def run(self):
         """
         Ejecuta el bucle principal de la aplicación
         """
         print("[START] Iniciando ICMP Radar...")
         print("[INFO] Presiona ESC o cierra la ventana para salir")
+        start_time = time.perf_counter()
         
-        # Verificar permisos
-        if not self._check_permissions():
+        # Verificar permisos (colector y visores no envían ICMP)
+        remote = self.collector_mode or self.subscriber_mode or self.shm_mode
+        if not remote and not self._check_permissions():
             return
         
         self.running = True
         
         try:
-            # Iniciar todos los threads de escaneo
-            self.start_scanning()
-            self.scanner.start_continuous_ping()
-            self.scanner.start_cleanup_thread()
+            if self.shm_mode:
+                self.scanner.start()
+            elif self.subscriber_mode:
+                self.start_subscription()
+            elif self.collector_mode:
+                self.start_collector()
+            else:
+                # Iniciar todos los threads de escaneo
+                self.start_scanning()
+                self.scanner.start_continuous_ping()
+                self.scanner.start_cleanup_thread()
             
-            # Bucle principal de visualización
-            clock = pygame.time.Clock()
-            frame_count = 0
-            fps_timer = time.time()
+            # Abrir la ventana mientras el primer barrido ya está sondeando
+            self.radar = RadarDisplay(self.window_size[0], self.window_size[1])
+            if self.hops:
+                self.radar.toggle_radius_mode()  # Radio por saltos (tecla H para volver a latencia)
+            if self.verbose:
+                print(f"[START] Ventana lista en {(time.perf_counter() - start_time) * 1000:.0f}ms")
+            
+            # Bucle principal de visualización (ritmo adaptativo: solo se renderiza
+            # cuando hay cambios, interacción o toca animar el barrido)
+            scheduler = self.scheduler
+            last_version = None
+            last_status = None
+            active_hosts = {}
+            learned_macs = {}
+            # Con escáner local solo se releen los hosts que cambiaron; el resto de
+            # fuentes entregan la tabla completa y el radar la compara al llegar
+            incremental = hasattr(self.scanner, "get_changes_since")
+            # Solo los cambios que se ven: los refrescos de last_seen no despiertan al radar
+            get_version = getattr(self.scanner, "get_display_version", self.scanner.get_state_version)
+            changed_ips = None  # IPs pendientes de dibujar (None = tabla releída completa)
+            stats_timer = time.time()
+            # Cuantiles de latencia (solo con escáner local), refrescados cada segundo
+            latency_source = getattr(self.scanner, "get_latency_stats", None)
+            latency_stats = None
+            latency_timer = 0
             
             while self.running:
                 # Manejar eventos de Pygame
+                self.scanner.change_event.clear()
                 if not self.radar.handle_events():
                     break
+                if self.radar.input_pending:
+                    self.radar.input_pending = False
+                    scheduler.notify_input()
+                
+                # Copiar hosts y MACs solo si el escáner reporta cambios (thread-safe)
+                version = get_version()
+                if version != last_version:
+                    changes = None
+                    if incremental and last_version is not None:
+                        changes = self.scanner.get_changes_since(last_version)
+                    if changes is None:
+                        active_hosts = self.scanner.get_active_hosts()
+                        learned_macs = self.scanner.get_learned_macs()
+                        changed_ips = None
+                    else:
+                        version, ips = changes
+                        hosts, macs = self.scanner.get_hosts(ips)
+                        for ip in ips:
+                            if hosts[ip] is None:
+                                active_hosts.pop(ip, None)
+                            else:
+                                active_hosts[ip] = hosts[ip]
+                            if macs[ip] is None:
+                                learned_macs.pop(ip, None)
+                            else:
+                                learned_macs[ip] = macs[ip]
+                        if changed_ips is not None:
+                            changed_ips |= ips
+                    last_version = version
+                    scheduler.notify_change()
+                if self.scan_status != last_status:
+                    last_status = self.scan_status
+                    scheduler.notify_change()
                 
-                # Obtener hosts activos y MACs aprendidas (cache para evitar múltiples accesos)
-                # Obtener hosts activos y MACs aprendidas (thread-safe)
-                active_hosts = self.scanner.get_active_hosts()
-                learned_macs = self.scanner.get_learned_macs()
+                if latency_source is not None and time.time() - latency_timer > 1.0:
+                    latency_stats = latency_source()
+                    latency_timer = time.time()
                 
                 # Actualizar visualización
-                self.radar.update_display(active_hosts, self.scan_status, learned_macs)
+                if scheduler.frame_due():
+                    scheduler.render(lambda: self.radar.update_display(active_hosts, self.scan_status,
+                                                                       learned_macs, latency_stats,
+                                                                       changed_ips))
+                    changed_ips = set() if incremental else None
                 
-                # Control preciso de FPS
-                clock.tick(60)  # 60 FPS exactos
+                # Estadísticas de render cada 5 segundos
+                if time.time() - stats_timer > 5.0:
+                    stats = scheduler.get_stats()
+                    if self.verbose:
+                        text = self.radar.text_cache.get_stats()
+                        print(f"[RENDER] {stats['fps']:.1f} FPS, CPU render {stats['render_cpu_percent']:.1f}%, "
+                              f"caché de textos {text['entries']}/{text['max_entries']} "
+                              f"({text['hit_ratio']:.0%} aciertos)")
+                        if hasattr(self.scanner, "get_memory_stats"):
+                            memory = self.scanner.get_memory_stats()
+                            print(f"[MEMORY] {memory['total_bytes'] / 1024:.0f} KiB en tablas del escáner ("
+                                  + ", ".join(f"{name}: {info['entries']}" for name, info in memory.items()
+                                              if name != 'total_bytes') + ")")
+                    stats_timer = time.time()
                 
-                # Debug FPS cada 5 segundos
-                frame_count += 1
-                if time.time() - fps_timer > 5.0:
-                    actual_fps = frame_count / 5.0
-                    if actual_fps < 30:  # Solo mostrar si hay problemas de rendimiento
-                        print(f"[FPS] Rendimiento: {actual_fps:.1f} FPS")
-                    frame_count = 0
-                    fps_timer = time.time()
+                # Esperar al próximo frame (despierta antes con cambios o eventos)
+                scheduler.wait(self.scanner.change_event)
         
         except KeyboardInterrupt:
             print("\n[STOP] Deteniendo aplicación...")
@@ -177,26 +502,18 @@ class ICMPRadarApp:
     
     def _check_permissions(self):
         """
-        Verifica si tenemos permisos para enviar paquetes ICMP
+        Verifica si tenemos permisos para enviar paquetes ICMP (abriendo un socket
+        raw, sin esperar a un ping de prueba)
         
         Returns:
             bool: True si tenemos permisos, False en caso contrario
         """
-        try:
-            # Intentar un ping de prueba
-            test_result = self.scanner.ping_host("127.0.0.1")
-            if test_result[1] is not None:
-                print("[OK] Permisos ICMP verificados")
-                return True
-            else:
-                print("[ERROR] No se pudieron enviar paquetes ICMP")
-                print("[TIP] Ejecuta como administrador/root para usar ICMP")
-                return False
-        
-        except Exception as e:
-            print(f"[ERROR] Error verificando permisos: {e}")
-            print("[TIP] Asegurate de ejecutar como administrador/root")
-            return False
+        if has_raw_socket_privileges():
+            print("[OK] Permisos ICMP verificados")
+            return True
+        print("[ERROR] No se pudieron enviar paquetes ICMP")
+        print("[TIP] Ejecuta como administrador/root para usar ICMP")
+        return False
     
     def cleanup(self):
         """
@@ -209,9 +526,11 @@ class ICMPRadarApp:
         # Detener escaneo
         if hasattr(self, 'scanner'):
             self.scanner.stop_scan()
+        if getattr(self, 'shared_table', None) is not None:
+            self.shared_table.close()
         
         # Limpiar Pygame
-        if hasattr(self, 'radar'):
+        if getattr(self, 'radar', None) is not None:
             self.radar.cleanup()
         
         print("[OK] Aplicación terminada correctamente")
@@ -228,6 +547,10 @@ Ejemplos de uso:
   python icmp_radar.py                          # Auto-detectar red local
   python icmp_radar.py -n 192.168.1.0/24       # Escanear red específica
   python icmp_radar.py -i 5 -s 1000x800        # Intervalo 5s, ventana 1000x800
+  python icmp_radar.py --collector 7700 -n 10.0.0.0/24,10.0.1.0/24   # Colector de sensores
+  python icmp_radar.py --connect /tmp/icmp-radar.sock   # Visor del demonio (scanner_daemon.py)
+  python icmp_radar.py --export-shm radar       # Publicar la tabla en memoria compartida
+  python icmp_radar.py --attach-shm radar       # Visor de esa tabla desde otro proceso
   
 Nota: Requiere permisos de administrador para enviar paquetes ICMP
         """
@@ -235,10 +558,34 @@ Nota: Requiere permisos de administrador para enviar paquetes ICMP
     
     parser.add_argument(
         "-n", "--network",
-        help="Rango de red a escanear (ej: 192.168.1.0/24)",
+        help="Rango(s) de red a escanear, separados por comas (ej: 192.168.1.0/24,10.0.0.0/24)",
         default=None
     )
     
+    parser.add_argument(
+        "-a", "--all-interfaces",
+        action="store_true",
+        help="Escanear en paralelo todas las subredes conectadas (si no se indica -n)"
+    )
+    
+    parser.add_argument(
+        "-6", "--ipv6",
+        action="store_true",
+        help="Descubrir también hosts IPv6 (eco ICMPv6 a ff02::1 en cada interfaz)"
+    )
+    
+    parser.add_argument(
+        "-b", "--broadcast",
+        action="store_true",
+        help="Pre-barrido con eco a la dirección de broadcast (el barrido unicast omite a quien responda)"
+    )
+    
+    parser.add_argument(
+        "--hops",
+        action="store_true",
+        help="Trazar la ruta a cada red remota (todos los TTL en paralelo) y situar los hosts por saltos"
+    )
+    
     parser.add_argument(
         "-i", "--interval",
         type=float,
@@ -246,6 +593,44 @@ Nota: Requiere permisos de administrador para enviar paquetes ICMP
         default=1.0
     )
     
+    parser.add_argument(
+        "--max-interval",
+        type=float,
+        help="Intervalo máximo entre escaneos con la red estable (default: 30)",
+        default=30
+    )
+    
+    parser.add_argument(
+        "--collector",
+        type=int,
+        metavar="PORT",
+        help="Modo colector: repartir los rangos de -n entre sensores (distributed.py sensor) "
+             "conectados a este puerto y mostrar la tabla fusionada",
+        default=None
+    )
+    
+    parser.add_argument(
+        "--connect",
+        metavar="SOCKET",
+        help="Modo visor: mostrar los hosts del demonio de escaneo (scanner_daemon.py) "
+             "suscrito a este socket Unix, sin escanear",
+        default=None
+    )
+    
+    parser.add_argument(
+        "--export-shm",
+        metavar="NAME",
+        help="Publicar la tabla de hosts en un segmento de memoria compartida",
+        default=None
+    )
+    
+    parser.add_argument(
+        "--attach-shm",
+        metavar="NAME",
+        help="Modo visor: leer la tabla de hosts del segmento de memoria compartida de otro proceso",
+        default=None
+    )
+    
     parser.add_argument(
         "-s", "--size",
         help="Tamaño de ventana WIDTHxHEIGHT (default: 800x600)",
@@ -258,6 +643,12 @@ Nota: Requiere permisos de administrador para enviar paquetes ICMP
         help="Mostrar información detallada"
     )
     
+    parser.add_argument(
+        "--log-json",
+        action="store_true",
+        help="Escribir los eventos como líneas JSON (kill -USR1 <pid> vuelca los últimos eventos)"
+    )
+    
     parser.add_argument(
         "-p", "--persist",
         type=int,
@@ -265,8 +656,26 @@ Nota: Requiere permisos de administrador para enviar paquetes ICMP
         default=30
     )
     
+    parser.add_argument(
+        "--idle-fps",
+        type=float,
+        help="FPS en reposo, sin cambios ni interacción (default: 2)",
+        default=2
+    )
+    
+    parser.add_argument(
+        "--sweep-fps",
+        type=float,
+        help="FPS para animar el barrido tras cambios recientes, 0 para detenerlo (default: 10)",
+        default=10
+    )
+    
     args = parser.parse_args()
     
+    if args.collector is not None and not args.network:
+        print("[ERROR] El modo colector requiere los rangos a repartir (-n)")
+        return 1
+    
     # Parsear tamaño de ventana
     try:
         width, height = map(int, args.size.split('x'))
@@ -275,13 +684,20 @@ Nota: Requiere permisos de administrador para enviar paquetes ICMP
         print("[ERROR] Formato de tamaño invalido. Usa WIDTHxHEIGHT (ej: 800x600)")
         return 1
     
+    # Registro de eventos: con -v también los eventos por ping (MAC-SKIP, PING-CONT)
+    if args.verbose:
+        events.set_level("DEBUG")
+    events.json_output = args.log_json
+    events.install_dump_signal()
+    
     # Mostrar información si es verbose
     if args.verbose:
         print("[CONFIG] Configuracion:")
-        print(f"   Red: {args.network or 'Auto-detectar'}")
-        print(f"   Intervalo: {args.interval}s")
+        print(f"   Red: {args.network or ('Todas las interfaces' if args.all_interfaces else 'Auto-detectar')}")
+        print(f"   Intervalo: {args.interval}s (hasta {args.max_interval}s con la red estable)")
         print(f"   Persistencia: {args.persist}s")
         print(f"   Ventana: {window_size[0]}x{window_size[1]}")
+        print(f"   FPS reposo/barrido: {args.idle_fps}/{args.sweep_fps}")
         print()
     
     # Crear y ejecutar aplicación
@@ -289,7 +705,19 @@ Nota: Requiere permisos de administrador para enviar paquetes ICMP
         app = ICMPRadarApp(
             network_range=args.network,
             scan_interval=args.interval,
-            window_size=window_size
+            window_size=window_size,
+            idle_fps=args.idle_fps,
+            sweep_fps=args.sweep_fps,
+            verbose=args.verbose,
+            all_interfaces=args.all_interfaces,
+            ipv6=args.ipv6,
+            broadcast=args.broadcast,
+            max_interval=args.max_interval,
+            collector_port=args.collector,
+            daemon_socket=args.connect,
+            export_shm=args.export_shm,
+            attach_shm=args.attach_shm,
+            hops=args.hops
         )
         
         # Configurar tiempo de persistencia
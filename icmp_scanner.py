@@ -1,37 +1,330 @@
+import sys
+import zlib
+import math
 import time
+import heapq
+import random
+import itertools
 import threading
-from scapy.all import IP, ICMP, sr1, conf
 import psutil
+import socket
 import ipaddress
 import warnings
 from threading import Lock, RLock
-from collections import defaultdict
+from collections import defaultdict, deque
 import queue
+from reply_listener import ICMPReplyListener, read_kernel_arp_cache
+from event_log import events
+from path_discovery import PathDiscovery
+from latency_sketch import LatencyMonitor
 
-# Configurar Scapy para ser menos verboso y suprimir warnings
-conf.verb = 0
+# Scapy se importa de forma diferida y solo con las capas necesarias: cargar
+# todas sus capas tarda segundos en equipos pequeños y el camino rápido (socket
+# raw compartido) no lo necesita. Todas las llamadas de envío usan verbose=0.
 warnings.filterwarnings("ignore", message=".*Scapy.*")
 warnings.filterwarnings("ignore", message=".*threading.*")
 
+
+def _approx_size(container, sample=64):
+    """
+    Bytes aproximados de un dict o set: el contenedor más el tamaño medio de una
+    muestra de entradas (claves y valores, un nivel de anidación) por el total
+    """
+    size = sys.getsizeof(container)
+    if not container:
+        return size
+    items = container.items() if isinstance(container, dict) else ((key, None) for key in container)
+    sampled = 0
+    entry_bytes = 0
+    for key, value in itertools.islice(items, sample):
+        entry_bytes += sys.getsizeof(key)
+        if value is not None:
+            entry_bytes += sys.getsizeof(value)
+            if isinstance(value, dict):
+                entry_bytes += sum(sys.getsizeof(v) for v in value.values())
+        sampled += 1
+    return size + entry_bytes * len(container) // sampled
+
+class RateLimiter:
+    def __init__(self, rate):
+        """
+        Limitador de tasa tipo token bucket (thread-safe)
+        
+        Args:
+            rate (float): Envíos permitidos por segundo (0 o None = sin límite)
+        """
+        self.rate = rate
+        self.tokens = rate or 0
+        self.last_refill = time.monotonic()
+        self.lock = Lock()
+    
+    def acquire(self):
+        """
+        Bloquea hasta que haya un token disponible
+        """
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class AdaptiveRateLimiter(RateLimiter):
+    def __init__(self, initial_rate=100, min_rate=10, max_rate=2000, increase=10,
+                 decrease=0.5, window=50, loss_threshold=0.05):
+        """
+        Limitador con control de congestión AIMD: sube la tasa de forma aditiva
+        mientras las respuestas se mantienen y la reduce de forma multiplicativa
+        ante pérdidas o señales de rate-limiting ICMP
+        
+        Args:
+            initial_rate (float): Pings por segundo iniciales
+            min_rate (float): Tasa mínima
+            max_rate (float): Tasa máxima
+            increase (float): Incremento aditivo por ventana sin pérdidas (pps)
+            decrease (float): Factor multiplicativo al detectar congestión
+            window (int): Envíos por ventana de evaluación
+            loss_threshold (float): Proporción de pérdidas que se considera congestión
+        """
+        super().__init__(initial_rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.window = window
+        self.loss_threshold = loss_threshold
+        
+        # Ventana actual
+        self.window_sent = 0
+        self.window_expected = 0
+        self.window_lost = 0
+        self.window_throttled = 0
+        
+        # Métricas acumuladas
+        self.total_sent = 0
+        self.total_lost = 0
+        self.total_throttled = 0
+        self.increases = 0
+        self.decreases = 0
+        self.last_loss_ratio = 0.0
+    
+    def record(self, sent, expected, lost, throttled=0):
+        """
+        Registra el resultado de un ping y ajusta la tasa al cerrar cada ventana
+        
+        Args:
+            sent (int): Paquetes enviados (intentos)
+            expected (int): Intentos a hosts que se sabe que están vivos
+            lost (int): Intentos sin respuesta a hosts vivos
+            throttled (int): Respuestas ICMP que indican rate-limiting
+        """
+        with self.lock:
+            self.window_sent += sent
+            self.window_expected += expected
+            self.window_lost += lost
+            self.window_throttled += throttled
+            self.total_sent += sent
+            self.total_lost += lost
+            self.total_throttled += throttled
+            
+            if self.window_sent < self.window:
+                return
+            
+            loss_ratio = self.window_lost / self.window_expected if self.window_expected else 0.0
+            self.last_loss_ratio = loss_ratio
+            if self.window_throttled or loss_ratio > self.loss_threshold:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self.decreases += 1
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+                self.increases += 1
+            self.tokens = min(self.tokens, self.rate)
+            
+            self.window_sent = 0
+            self.window_expected = 0
+            self.window_lost = 0
+            self.window_throttled = 0
+    
+    def get_metrics(self):
+        """
+        Retorna las métricas del controlador
+        
+        Returns:
+            dict: {rate, loss_ratio, sent, lost, throttled, increases, decreases}
+        """
+        with self.lock:
+            return {
+                'rate': self.rate,
+                'loss_ratio': self.last_loss_ratio,
+                'sent': self.total_sent,
+                'lost': self.total_lost,
+                'throttled': self.total_throttled,
+                'increases': self.increases,
+                'decreases': self.decreases
+            }
+
+class SweepCadence:
+    def __init__(self, min_interval=1, max_interval=30, backoff=1.5):
+        """
+        Controla el intervalo entre barridos completos según la rotación de hosts:
+        lo acorta cuando aparecen o desaparecen hosts y lo alarga hacia
+        max_interval mientras la red está estable
+        
+        Args:
+            min_interval (float): Intervalo mínimo entre barridos en segundos
+            max_interval (float): Intervalo máximo entre barridos en segundos
+            backoff (float): Factor de alargamiento por barrido sin cambios
+        """
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.backoff = backoff
+        self.interval = min_interval
+        self.trigger_event = threading.Event()
+        self.triggers = 0
+        self.last_trigger = 0.0
+    
+    def observe(self, arrivals, departures):
+        """
+        Ajusta el intervalo tras un barrido
+        
+        Args:
+            arrivals (int): Hosts nuevos desde el barrido anterior
+            departures (int): Hosts perdidos desde el barrido anterior
+        """
+        if arrivals or departures:
+            self.interval = self.min_interval  # Red cambiando: volver al ritmo rápido
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+    
+    def trigger(self):
+        """
+        Pide un barrido adelantado (p. ej. al ver pasivamente una MAC nueva); como
+        mucho uno por min_interval
+        
+        Returns:
+            bool: True si se aceptó el disparador
+        """
+        now = time.time()
+        if now - self.last_trigger < self.min_interval:
+            return False
+        self.last_trigger = now
+        self.triggers += 1
+        self.interval = self.min_interval
+        self.trigger_event.set()
+        return True
+    
+    def wait(self):
+        """
+        Espera el intervalo actual o hasta que llegue un disparador (aun así, nunca
+        menos de min_interval desde el barrido anterior)
+        
+        Returns:
+            bool: True si se despertó por un disparador
+        """
+        start = time.time()
+        triggered = self.trigger_event.wait(self.interval)
+        self.trigger_event.clear()
+        if triggered:
+            remaining = self.min_interval - (time.time() - start)
+            if remaining > 0:
+                time.sleep(remaining)
+        return triggered
+
 class ICMPScanner:
-    def __init__(self, network_range="192.168.1.0/24", timeout=0.5, host_persistence=30):
+    def __init__(self, network_range="192.168.1.0/24", timeout=0.5, host_persistence=30,
+                 interface_rate=200, ipv6_discovery=False, broadcast_discovery=False,
+                 use_raw_socket=True, liveness_ordering=True, shared_table=None,
+                 path_discovery=False, max_hosts=65536, max_learned_macs=65536, mac_ttl=86400):
         """
         Inicializa el escáner ICMP
         
         Args:
-            network_range (str): Rango de red a escanear (ej: "192.168.1.0/24")
+            network_range (str|list): Rango(s) de red a escanear (ej: "192.168.1.0/24",
+                "192.168.1.0/24,10.0.0.0/24" o una lista de rangos)
             timeout (float): Tiempo de espera para cada ping en segundos
             host_persistence (int): Tiempo en segundos antes de considerar un host como inactivo
+            interface_rate (float): Pings por segundo iniciales por interfaz (luego se ajusta con AIMD)
+            ipv6_discovery (bool): Descubrir también hosts IPv6 (eco multicast a ff02::1)
+            broadcast_discovery (bool): Antes del barrido unicast, enviar ecos a la dirección
+                de broadcast de cada segmento y omitir del barrido a quienes respondan
+            use_raw_socket (bool): Usar un socket ICMP compartido con filtro BPF para los
+                pings IPv4 (si no está disponible se usa sr1 de Scapy)
+            liveness_ordering (bool): En barridos repetidos, omitir hosts confirmados
+                recientemente, sondear primero los probables y espaciar los muertos
+            shared_table (SharedHostTable): Tabla en memoria compartida donde publicar cada
+                cambio de host para lectores de otros procesos (el escáner es su único escritor)
+            path_discovery (bool): Trazar la ruta (todos los TTL en paralelo) hacia cada
+                prefijo remoto nuevo y anotar en cada host sus saltos y último router
+            max_hosts (int): Hosts activos como máximo (se descartan los vistos hace más tiempo)
+            max_learned_macs (int): MACs aprendidas como máximo
+            mac_ttl (float): Segundos que se conserva la MAC de un host que ya no responde
         """
         self.network_range = network_range
         self.timeout = timeout
         self.host_persistence = host_persistence
+        self.interface_rate = interface_rate
+        self.max_interface_rate = 2000
+        self.threads_per_segment = 20
+        self.ipv6_discovery = ipv6_discovery
+        self.broadcast_discovery = broadcast_discovery
+        self.broadcast_probes = 2  # Ecos de broadcast por segmento en el pre-barrido
+        
+        # Historial de vivacidad por dirección para ordenar y recortar barridos
+        self.liveness_ordering = liveness_ordering
+        self.liveness = {}  # ip -> {score, last_alive, last_probe, last_change, fail_streak, next_probe}
+        self.liveness_lock = Lock()
+        self.recent_confirm_window = 5  # No re-sondear hosts vistos hace menos de esto (s)
+        self.churn_window = 60  # Cambios de estado más recientes que esto van primero (s)
+        self.base_probe_backoff = 2  # Espera tras el primer fallo (s), se duplica por fallo
+        self.max_probe_backoff = 300  # Espera máxima para direcciones muertas (s)
+        self.liveness_ttl = 3600  # Historial de direcciones no sondeadas en este tiempo se descarta (s)
+        self.max_liveness_entries = 262144
+        self.last_sweep_stats = {}
+        
+        # Ritmo de barridos guiado por la rotación de hosts
+        self.cadence = SweepCadence()
+        self.host_arrivals = 0
+        self.host_departures = 0
+        self.churn_seen = (0, 0)  # (llegadas, salidas) al cerrar el último barrido
+        self.probing = defaultdict(int)  # ip -> pings en curso (sus ARP no son hosts nuevos)
+        self.probing_lock = Lock()
+        
+        # Receptor compartido de respuestas (se crea al primer ping)
+        self.use_raw_socket = use_raw_socket
+        self.reply_listener = None
+        self.reply_listener_lock = Lock()
+        
+        # Rutas por prefijo de destino (se crea al primer host remoto)
+        self.path_discovery = path_discovery
+        self.path_tracer = None
+        self.path_tracer_lock = Lock()
+        
+        # Presupuesto de envío por interfaz y redes locales detectadas
+        self.rate_limiters = {}
+        self.rate_limiters_lock = Lock()
+        self.local_networks = None
         
         # Thread-safe data structures
         self.active_hosts = {}
         self.learned_macs = {}
         self.known_hosts = set()
         
+        # Límites de memoria para despliegues de larga duración (los aplica el thread de limpieza)
+        self.max_hosts = max_hosts
+        self.max_learned_macs = max_learned_macs
+        self.mac_ttl = mac_ttl
+        self.mac_seen = {}  # ip -> última vez que su MAC se confirmó (host activo)
+        self.evictions = defaultdict(int)  # estructura -> entradas descartadas
+        
+        # Cuantiles de latencia y pérdida por ventanas (global y por subred), sin guardar muestras
+        self.latency_monitor = LatencyMonitor()
+        
         # Locks para thread safety
         self.hosts_lock = RLock()
         self.macs_lock = RLock()
@@ -48,34 +341,229 @@ class ICMPScanner:
         # Queue para comunicación entre threads
         self.host_updates_queue = queue.Queue(maxsize=1000)
         
+        # Versión del estado: cambia cada vez que se modifican hosts o MACs (incluido
+        # el refresco de last_seen, que necesitan los publicadores remotos)
+        self.state_version = 0
+        # Versión visible: solo cambios que el radar dibuja; despierta change_event
+        self.display_version = 0
+        self.version_lock = Lock()
+        self.change_event = threading.Event()
+        self.change_log = deque(maxlen=65536)  # (versión visible, ip) de los últimos cambios
+        self.shared_table = shared_table
+        
+    def _mark_changed(self, ip=None, visible=True):
+        """
+        Registra un cambio en hosts/MACs y, si se ve en el radar, despierta a
+        quien espere cambios
+        
+        Args:
+            ip (str): Host que cambió (se reescribe su registro en la tabla compartida)
+            visible (bool): False si solo se refrescó el host (last_seen o latencia
+                dentro de la misma cubeta): avanza la versión del estado pero no la visible
+        """
+        with self.version_lock:
+            self.state_version += 1
+            if visible:
+                self.display_version += 1
+                self.change_log.append((self.display_version, ip))
+        if self.shared_table is not None and ip is not None:
+            self.shared_table.update(ip, self.active_hosts.get(ip), self.learned_macs.get(ip),
+                                    visible=visible)
+        if visible:
+            self.change_event.set()
+    
+    @staticmethod
+    def _latency_bucket(latency):
+        """
+        Cubeta logarítmica de latencia (~10% de ancho): variaciones menores no se
+        consideran cambios visibles
+        """
+        return int(math.log1p(max(latency, 0)) * 10)
+    
+    def _is_visible_change(self, previous, current):
+        """
+        Indica si la nueva información de un host cambia lo que dibuja el radar:
+        host nuevo, otra cubeta de latencia u otro número de saltos
+        """
+        if not previous:
+            return True
+        return (self._latency_bucket(previous['latency']) != self._latency_bucket(current['latency']) or
+                previous.get('hops') != current.get('hops'))
+    
+    def get_state_version(self):
+        """
+        Retorna la versión actual del estado (permite saber si hubo cambios
+        sin copiar las tablas)
+        
+        Returns:
+            int: Contador de cambios
+        """
+        return self.state_version
+    
+    def get_display_version(self):
+        """
+        Retorna la versión de los cambios visibles (hosts que aparecen o expiran,
+        cambios de cubeta de latencia o de saltos, MACs)
+        
+        Returns:
+            int: Contador de cambios visibles
+        """
+        return self.display_version
+    
+    def get_changes_since(self, version):
+        """
+        IPs con cambios visibles desde una versión, para no copiar las tablas
+        completas en cada cambio
+        
+        Args:
+            version (int): Versión leída anteriormente con get_display_version
+            
+        Returns:
+            tuple: (versión actual, set de IPs cambiadas), o None si el registro ya no
+                cubre esa versión o hubo cambios sin IP (hay que releer las tablas)
+        """
+        with self.version_lock:
+            current = self.display_version
+            if version >= current:
+                return current, set()
+            if not self.change_log or self.change_log[0][0] > version + 1:
+                return None
+            changed = set()
+            for logged_version, ip in reversed(self.change_log):
+                if logged_version <= version:
+                    break
+                if ip is None:
+                    return None
+                changed.add(ip)
+            return current, changed
+    
+    def get_hosts(self, ips):
+        """
+        Retorna el estado de unos hosts concretos (thread-safe)
+        
+        Args:
+            ips (iterable): IPs a consultar
+            
+        Returns:
+            tuple: ({ip: info o None si expiró}, {ip: MAC o None})
+        """
+        with self.hosts_lock:
+            hosts = {ip: self.active_hosts.get(ip) for ip in ips}
+        with self.macs_lock:
+            macs = {ip: self.learned_macs.get(ip) for ip in ips}
+        return hosts, macs
+        
     def get_local_network(self):
         """
         Detecta automáticamente la red local
         """
+        networks = self.get_local_networks()
+        if networks:
+            return networks[0]['network']
+        return "192.168.1.0/24"  # Fallback por defecto
+    
+    def get_local_networks(self):
+        """
+        Detecta todas las subredes IPv4 conectadas (una entrada por red)
+        
+        Returns:
+            list: Lista de dicts {interface, network, address}
+        """
+        networks = []
+        seen = set()
         try:
-            # Obtener la interfaz de red activa
             for interface, addrs in psutil.net_if_addrs().items():
                 for addr in addrs:
                     if addr.family == 2:  # IPv4
                         ip = addr.address
                         netmask = addr.netmask
-                        if ip != "127.0.0.1" and not ip.startswith("169.254"):
+                        if ip != "127.0.0.1" and not ip.startswith("169.254") and netmask:
                             # Calcular la red
-                            network = ipaddress.IPv4Network(f"{ip}/{netmask}", strict=False)
-                            return str(network)
-        except:
+                            network = str(ipaddress.IPv4Network(f"{ip}/{netmask}", strict=False))
+                            if network not in seen:
+                                seen.add(network)
+                                networks.append({
+                                    'interface': interface,
+                                    'network': network,
+                                    'address': ip
+                                })
+        except Exception:
             pass
-        return "192.168.1.0/24"  # Fallback por defecto
+        return networks
+    
+    def get_segments(self):
+        """
+        Resuelve los rangos configurados en segmentos (red + interfaz de salida)
+        
+        Returns:
+            list: Lista de dicts {network (IPv4Network), subnet (str), interface (str o None)}
+        """
+        ranges = self.network_range
+        if isinstance(ranges, str):
+            ranges = [r.strip() for r in ranges.split(',') if r.strip()]
+        
+        if self.local_networks is None:
+            self.local_networks = self.get_local_networks()
+        
+        segments = []
+        for network_range in ranges:
+            network = ipaddress.IPv4Network(network_range, strict=False)
+            interface = None
+            for local in self.local_networks:
+                if network.overlaps(ipaddress.IPv4Network(local['network'])):
+                    interface = local['interface']
+                    break
+            segments.append({
+                'network': network,
+                'subnet': str(network),
+                'interface': interface
+            })
+        return segments
+    
+    def _get_rate_limiter(self, interface):
+        """
+        Retorna el controlador de tasa de una interfaz (uno por interfaz)
+        """
+        with self.rate_limiters_lock:
+            limiter = self.rate_limiters.get(interface)
+            if limiter is None:
+                limiter = self.rate_limiters[interface] = AdaptiveRateLimiter(
+                    initial_rate=self.interface_rate,
+                    max_rate=max(self.max_interface_rate, self.interface_rate))
+            return limiter
+    
+    def get_rate_metrics(self):
+        """
+        Retorna las métricas del control de tasa por interfaz
+        
+        Returns:
+            dict: {interfaz: {rate, loss_ratio, sent, lost, throttled, increases, decreases}}
+        """
+        with self.rate_limiters_lock:
+            limiters = dict(self.rate_limiters)
+        return {interface or "default": limiter.get_metrics()
+                for interface, limiter in limiters.items()}
+    
+    def get_probe_rate(self):
+        """
+        Retorna la tasa de envío actual sumando todas las interfaces
+        
+        Returns:
+            float: Pings por segundo
+        """
+        return sum(m['rate'] for m in self.get_rate_metrics().values())
     
-    def _learn_mac_via_arp(self, ip):
+    def _learn_mac_via_arp(self, ip, iface=None):
         """
         Aprende la dirección MAC de una IP usando ARP request
         
         Args:
             ip (str): Dirección IP para resolver
+            iface (str): Interfaz por la que enviar el ARP (None = la de la ruta)
         """
         try:
-            from scapy.all import ARP, Ether, srp
+            from scapy.layers.l2 import ARP, Ether
+            from scapy.sendrecv import srp
             
             # Crear request ARP
             arp_request = ARP(pdst=ip)
@@ -83,7 +571,10 @@ class ICMPScanner:
             arp_request_broadcast = broadcast / arp_request
             
             # Enviar y recibir
-            answered_list, _ = srp(arp_request_broadcast, timeout=1, verbose=0)
+            if iface:
+                answered_list, _ = srp(arp_request_broadcast, timeout=1, verbose=0, iface=iface)
+            else:
+                answered_list, _ = srp(arp_request_broadcast, timeout=1, verbose=0)
             
             if answered_list:
                 for element in answered_list:
@@ -91,47 +582,343 @@ class ICMPScanner:
                     # Actualizar MACs de forma thread-safe
                     with self.macs_lock:
                         self.learned_macs[ip] = mac_address
-                    print(f"[ARP-LEARN] {ip} -> {mac_address}")
+                        self._mark_changed(ip)
+                    events.info("ARP-LEARN", f"{ip} -> {mac_address}", ip=ip, mac=mac_address)
                     break
                     
         except Exception as e:
             # Si falla ARP, no es crítico
             pass
     
-    def ping_host(self, ip, retries=2):
+    def get_ipv6_interfaces(self):
+        """
+        Detecta las interfaces con dirección IPv6 de enlace local (fe80::/10)
+        
+        Returns:
+            dict: {interfaz: dirección de enlace local}
+        """
+        interfaces = {}
+        try:
+            for interface, addrs in psutil.net_if_addrs().items():
+                for addr in addrs:
+                    if addr.family == socket.AF_INET6:
+                        ip = addr.address.split('%')[0]
+                        if ipaddress.IPv6Address(ip).is_link_local:
+                            interfaces[interface] = ip
+        except Exception:
+            pass
+        return interfaces
+    
+    def get_ipv6_networks(self):
+        """
+        Detecta los prefijos IPv6 conectados de cada interfaz (según dirección y máscara)
+        
+        Returns:
+            dict: {interfaz: [IPv6Network, ...]}
+        """
+        networks = defaultdict(list)
+        try:
+            for interface, addrs in psutil.net_if_addrs().items():
+                for addr in addrs:
+                    if addr.family == socket.AF_INET6 and addr.netmask:
+                        ip = addr.address.split('%')[0]
+                        prefix = ipaddress.IPv6Address(addr.netmask.split('/')[0])
+                        prefixlen = bin(int(prefix)).count("1")
+                        networks[interface].append(
+                            ipaddress.IPv6Network(f"{ip}/{prefixlen}", strict=False))
+        except Exception:
+            pass
+        return networks
+    
+    @staticmethod
+    def _ipv6_subnet(ip, networks):
+        """
+        Prefijo en el enlace al que pertenece una IPv6 (/64 si ninguna dirección
+        de la interfaz lo cubre, que es el tamaño de prefijo habitual)
+        """
+        address = ipaddress.IPv6Address(ip)
+        for network in networks:
+            if address in network and network.prefixlen < 128:
+                return str(network)
+        return str(ipaddress.IPv6Network(f"{ip}/64", strict=False))
+    
+    @staticmethod
+    def _host_angle(ip):
+        """
+        Ángulo del host en el radar: estable entre procesos y ejecuciones (hash()
+        de str cambia con cada intérprete)
+        """
+        return zlib.crc32(ip.encode()) % 360
+    
+    def discover_ipv6(self, interfaces=None):
+        """
+        Descubre hosts IPv6 con un único eco ICMPv6 a ff02::1 por interfaz.
+        Todas las respuestas llegan en una sola ventana de recepción, así que el
+        coste no depende del tamaño del prefijo.
+        
+        Args:
+            interfaces (list): Interfaces a sondear (None = todas las que tengan IPv6)
+            
+        Returns:
+            list: Tuplas (ip, latencia_ms, interfaz) de los hosts que respondieron
+        """
+        from scapy.layers.l2 import Ether
+        from scapy.layers.inet6 import IPv6, ICMPv6EchoRequest
+        from scapy.sendrecv import srp
+        
+        v6_interfaces = self.get_ipv6_interfaces()
+        v6_networks = self.get_ipv6_networks()
+        if interfaces is None:
+            interfaces = list(v6_interfaces)
+        
+        found = []
+        for iface in interfaces:
+            if iface not in v6_interfaces:
+                continue
+            try:
+                probe = (Ether(dst="33:33:00:00:00:01") /
+                         IPv6(src=v6_interfaces[iface], dst="ff02::1") /
+                         ICMPv6EchoRequest())
+                answered, _ = srp(probe, iface=iface, timeout=self.timeout * 2,
+                                  multi=True, verbose=0)
+            except Exception as e:
+                events.warning("IPV6", f"Error sondeando {iface}: {e}", interface=iface)
+                continue
+            
+            current_time = time.time()
+            for sent, received in answered:
+                ip = received[IPv6].src
+                if ip == v6_interfaces[iface]:
+                    continue  # Nuestra propia respuesta
+                latency = (received.time - sent.sent_time) * 1000
+                mac_address = received[Ether].src
+                
+                with self.macs_lock:
+                    self.learned_macs[ip] = mac_address
+                with self.hosts_lock:
+                    existing = self.active_hosts.get(ip, {})
+                    if not existing:
+                        self.host_arrivals += 1
+                    self.active_hosts[ip] = {
+                        'latency': latency,
+                        'last_seen': current_time,
+                        'angle': existing.get('angle', self._host_angle(ip)),
+                        'interface': iface,
+                        'subnet': self._ipv6_subnet(ip, v6_networks[iface]),
+                        'family': 6
+                    }
+                    self._mark_changed(ip)
+                with self.known_hosts_lock:
+                    self.known_hosts.add(ip)
+                found.append((ip, latency, iface))
+        return found
+    
+    def _learn_mac_via_ns(self, ip, iface=None):
+        """
+        Aprende la dirección MAC de una IPv6 con Neighbor Solicitation (equivalente a ARP)
+        
+        Args:
+            ip (str): Dirección IPv6 para resolver
+            iface (str): Interfaz por la que enviar la solicitud
+        """
+        try:
+            from scapy.layers.l2 import Ether
+            from scapy.layers.inet6 import neighsol, ICMPv6NDOptDstLLAddr
+            
+            v6_interfaces = self.get_ipv6_interfaces()
+            if iface is None or iface not in v6_interfaces:
+                return
+            
+            reply = neighsol(ip, v6_interfaces[iface], iface, timeout=1)
+            if reply:
+                if ICMPv6NDOptDstLLAddr in reply:
+                    mac_address = reply[ICMPv6NDOptDstLLAddr].lladdr
+                else:
+                    mac_address = reply[Ether].src
+                with self.macs_lock:
+                    self.learned_macs[ip] = mac_address
+                    self._mark_changed(ip)
+                events.info("NDP-LEARN", f"{ip} -> {mac_address}", ip=ip, mac=mac_address)
+        
+        except Exception as e:
+            # Si falla NDP, no es crítico
+            pass
+    
+    def _get_reply_listener(self):
+        """
+        Retorna el receptor compartido de respuestas ICMP, creándolo la primera vez.
+        Si no se puede crear (sin permisos, sistema no Linux) se desactiva y se usa Scapy.
+        """
+        if not self.use_raw_socket:
+            return None
+        if self.reply_listener is not None:
+            return self.reply_listener
+        with self.reply_listener_lock:
+            if self.reply_listener is None and self.use_raw_socket:
+                try:
+                    self.reply_listener = ICMPReplyListener(on_arp=self._on_arp_reply)
+                except (OSError, AttributeError) as e:
+                    events.warning("RAW-SOCKET", f"No disponible ({e}), usando Scapy")
+                    self.use_raw_socket = False
+            return self.reply_listener
+    
+    def _get_path_tracer(self):
+        """
+        Retorna el trazador de rutas, creándolo la primera vez (se desactiva si no hay permisos)
+        """
+        if not self.path_discovery:
+            return None
+        if self.path_tracer is not None:
+            return self.path_tracer
+        with self.path_tracer_lock:
+            if self.path_tracer is None and self.path_discovery:
+                try:
+                    self.path_tracer = PathDiscovery(on_path=self._on_path)
+                except OSError as e:
+                    events.warning("PATH", f"Descubrimiento de rutas no disponible ({e})")
+                    self.path_discovery = False
+            return self.path_tracer
+    
+    def _path_fields(self, ip, iface):
+        """
+        Campos de ruta de un host: 1 salto si está en una red conectada; si es remoto,
+        la ruta de su prefijo (o se pide trazarla y de momento no se anota nada)
+        
+        Returns:
+            dict: {hops, last_hop} o vacío
+        """
+        if not self.path_discovery:
+            return {}
+        if iface:
+            return {'hops': 1, 'last_hop': None}
+        tracer = self._get_path_tracer()
+        if tracer is None:
+            return {}
+        path = tracer.lookup(ip)
+        if path is None:
+            tracer.request(ip)
+            return {}
+        return {'hops': path['hops'], 'last_hop': path['last_hop']}
+    
+    def _on_path(self, prefix, path):
+        """
+        Anota la ruta recién trazada en los hosts activos de ese prefijo
+        """
+        network = ipaddress.ip_network(prefix)
+        with self.hosts_lock:
+            for ip, info in self.active_hosts.items():
+                if info.get('interface') or ":" in ip or ipaddress.ip_address(ip) not in network:
+                    continue
+                info['hops'] = path['hops']
+                info['last_hop'] = path['last_hop']
+                self._mark_changed(ip)
+    
+    def get_path_stats(self):
+        """
+        Returns:
+            dict: {prefixes, pending, traces}, o None si no se descubren rutas
+        """
+        return self.path_tracer.get_stats() if self.path_tracer is not None else None
+    
+    def _on_arp_reply(self, ip, mac_address):
+        """
+        Aprende MACs de las respuestas ARP que ve el receptor compartido.
+        Una MAC nueva de un host desconocido dentro de los rangos escaneados
+        adelanta el próximo barrido, salvo que sea el ARP de un ping nuestro en curso.
+        """
+        with self.macs_lock:
+            if self.learned_macs.get(ip) == mac_address:
+                return
+            self.learned_macs[ip] = mac_address
+            self._mark_changed(ip)
+        with self.hosts_lock:
+            if ip in self.active_hosts:
+                return
+        with self.probing_lock:
+            if self.probing.get(ip):
+                return  # El kernel resolvió la MAC para nuestro propio sondeo
+        if self._in_scanned_ranges(ip):
+            self.cadence.trigger()
+    
+    def _in_scanned_ranges(self, ip):
+        """
+        Indica si una IPv4 pertenece a alguno de los segmentos configurados
+        """
+        try:
+            address = ipaddress.IPv4Address(ip)
+            return any(address in segment['network'] for segment in self.get_segments())
+        except ValueError:
+            return False
+    
+    def ping_host(self, ip, retries=2, iface=None, subnet=None):
         """
         Envía un ping ICMP a una IP específica, aprendiendo direcciones MAC
         
         Args:
             ip (str): Dirección IP a hacer ping
             retries (int): Número de reintentos si falla el primer ping
+            iface (str): Interfaz de salida (None = la que indique la tabla de rutas)
+            subnet (str): Subred del host para las estadísticas de latencia (None = la
+                que tenga anotada en la tabla de hosts)
             
         Returns:
             tuple: (ip, latencia_ms) si responde, (ip, None) si no responde
         """
+        with self.probing_lock:
+            self.probing[ip] += 1
+        try:
+            return self._ping_host(ip, retries, iface, subnet)
+        finally:
+            with self.probing_lock:
+                self.probing[ip] -= 1
+                if not self.probing[ip]:
+                    del self.probing[ip]
+    
+    def _ping_host(self, ip, retries, iface, subnet):
+        # Los fallos a hosts que se saben vivos alimentan el control de tasa
+        limiter = self._get_rate_limiter(iface)
+        with self.known_hosts_lock:
+            expected_alive = ip in self.known_hosts
+        throttled = 0
+        
+        is_ipv6 = ':' in ip
+        listener = None if is_ipv6 else self._get_reply_listener()
+        
         # Intentar múltiples pings para mayor probabilidad de respuesta
         for attempt in range(retries + 1):
             try:
-                # Crear paquete ICMP (siempre a nivel IP)
-                packet = IP(dst=ip) / ICMP()
-                
-                # Enviar paquete y medir tiempo
-                start_time = time.time()
-                reply = sr1(packet, timeout=self.timeout, verbose=0)
-                end_time = time.time()
+                if listener is not None:
+                    # Camino rápido: socket compartido, el kernel filtra las respuestas
+                    latency, rate_limited = listener.probe(ip, self.timeout)
+                else:
+                    latency, rate_limited = self._ping_with_scapy(ip, iface, is_ipv6)
+                throttled += rate_limited
                 
-                if reply:
-                    latency = (end_time - start_time) * 1000  # Convertir a ms
+                if latency is not None:
+                    attempts = attempt + 1
+                    limiter.record(attempts, attempts, attempt, throttled)
+                    self._record_liveness(ip, True)
+                    self._record_rtt(ip, latency, lost=attempt, subnet=subnet)
                     
                     # Solo aprender MAC si no la conocemos (evita ARP redundantes)
                     # Verificar MACs de forma thread-safe
                     with self.macs_lock:
                         mac_known = ip in self.learned_macs
                     
+                    if not mac_known and listener is not None and listener.learns_arp:
+                        # El kernel ya resolvió la MAC para enviar el ping: leerla de su caché
+                        mac_address = read_kernel_arp_cache(ip)
+                        if mac_address:
+                            self._on_arp_reply(ip, mac_address)
+                            mac_known = True
+                    
                     if not mac_known:
-                        self._learn_mac_via_arp(ip)
+                        if is_ipv6:
+                            self._learn_mac_via_ns(ip, iface)
+                        else:
+                            self._learn_mac_via_arp(ip, iface)
                     else:
-                        print(f"[MAC-SKIP] Ya conocemos MAC de {ip}, omitiendo ARP")
+                        events.debug("MAC-SKIP", f"Ya conocemos MAC de {ip}, omitiendo ARP", ip=ip)
                     
                     return (ip, latency)
                 
@@ -143,31 +930,376 @@ class ICMPScanner:
                 if attempt < retries:
                     time.sleep(0.1)
                     continue
-                    
+        
+        self._record_liveness(ip, False)
+        attempts = retries + 1
+        if expected_alive:
+            limiter.record(attempts, attempts, attempts, throttled)
+            self._record_rtt(ip, None, lost=attempts, subnet=subnet)
+        else:
+            limiter.record(attempts, 0, 0, throttled)
         return (ip, None)
     
+    def _record_rtt(self, ip, latency, lost=0, subnet=None):
+        """
+        Añade un resultado de ping a los sketches de latencia (global y de la subred del host)
+        
+        Args:
+            ip (str): Host sondeado
+            latency (float): RTT en ms, o None si no respondió
+            lost (int): Intentos sin respuesta antes del resultado (cuentan como pérdida)
+            subnet (str): Subred del host, si la conoce quien sondea (un host nuevo aún
+                no está en la tabla de hosts)
+        """
+        if subnet is None:
+            with self.hosts_lock:
+                subnet = self.active_hosts.get(ip, {}).get('subnet')
+        now = time.time()
+        for _ in range(lost):
+            self.latency_monitor.record(subnet, None, now)
+        if latency is not None:
+            self.latency_monitor.record(subnet, latency, now)
+    
+    def get_latency_stats(self, subnet=None):
+        """
+        Cuantiles de latencia y pérdida del último minuto y la última hora
+        
+        Args:
+            subnet (str): Solo esta subred (None = global y todas las subredes)
+            
+        Returns:
+            dict: {'global': {ventana: {count, lost, loss, p50, p90, p99, min, max}},
+                   'subnets': {subred: {...}}}, o las ventanas de la subred pedida
+        """
+        return self.latency_monitor.get_summary(subnet)
+    
+    def _ping_with_scapy(self, ip, iface, is_ipv6):
+        """
+        Un ping con sr1 de Scapy (IPv6 o cuando no hay socket compartido)
+        
+        Returns:
+            tuple: (latencia_ms o None, True si la respuesta indica rate-limiting)
+        """
+        from scapy.sendrecv import sr1
+        
+        # Crear paquete ICMP (siempre a nivel IP); ICMPv6 para direcciones IPv6
+        if is_ipv6:
+            from scapy.layers.inet6 import IPv6, ICMPv6EchoRequest
+            packet = IPv6(dst=ip) / ICMPv6EchoRequest()
+        else:
+            from scapy.layers.inet import IP, ICMP
+            packet = IP(dst=ip) / ICMP()
+        
+        # Enviar paquete y medir tiempo
+        start_time = time.time()
+        if iface:
+            reply = sr1(packet, timeout=self.timeout, verbose=0, iface=iface)
+        else:
+            reply = sr1(packet, timeout=self.timeout, verbose=0)
+        end_time = time.time()
+        
+        if reply is None:
+            return None, False
+        if not self._is_echo_reply(reply):
+            # Error ICMP (inalcanzable, prohibido...): no cuenta como host vivo
+            return None, self._is_rate_limit_signal(reply)
+        return (end_time - start_time) * 1000, False  # Convertir a ms
+    
+    def _is_echo_reply(self, reply):
+        """
+        Indica si la respuesta es un echo reply (ICMP tipo 0 o ICMPv6 tipo 129)
+        """
+        from scapy.layers.inet import ICMP
+        if ICMP in reply:
+            return reply[ICMP].type == 0
+        from scapy.layers.inet6 import ICMPv6EchoReply
+        return ICMPv6EchoReply in reply
+    
+    def _is_rate_limit_signal(self, reply):
+        """
+        Respuestas ICMP que indican que un equipo intermedio está limitando el tráfico:
+        source quench (tipo 4) o comunicación prohibida administrativamente (tipo 3, código 13)
+        """
+        from scapy.layers.inet import ICMP
+        if ICMP not in reply:
+            return False
+        icmp = reply[ICMP]
+        return icmp.type == 4 or (icmp.type == 3 and icmp.code == 13)
+    
     def scan_network(self):
         """
-        Escanea toda la red en busca de hosts activos
+        Escanea todos los segmentos configurados en paralelo (uno por rango),
+        de modo que el barrido dura lo que el segmento más lento
         """
         try:
-            network = ipaddress.IPv4Network(self.network_range, strict=False)
+            segments = self.get_segments()
+        except ValueError as e:
+            events.error("SCAN", f"Error durante el escaneo: {e}")
+            return
+        
+        if len(segments) == 1 and not self.ipv6_discovery:
+            self._scan_segment(segments[0])
+            return
+        
+        threads = []
+        if self.ipv6_discovery:
+            # Un sondeo multicast por interfaz, en paralelo con el barrido IPv4
+            interfaces = sorted({seg['interface'] for seg in segments if seg['interface']}) or None
+            thread = threading.Thread(target=self.discover_ipv6, args=(interfaces,), daemon=True)
+            thread.start()
+            threads.append(thread)
+        for segment in segments:
+            thread = threading.Thread(target=self._scan_segment, args=(segment,), daemon=True)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+    
+    def _record_hosts(self, results, segment, macs=None):
+        """
+        Guarda en la tabla de hosts los resultados de un segmento (thread-safe),
+        etiquetados con interfaz y subred
+        
+        Args:
+            results (list): Tuplas (ip, latencia_ms)
+            segment (dict): Segmento devuelto por get_segments()
+            macs (dict): MACs observadas en las respuestas {ip: mac} (opcional)
+        """
+        current_time = time.time()
+        new_macs = set()
+        if macs:
+            with self.macs_lock:
+                new_macs = {ip for ip, mac in macs.items() if self.learned_macs.get(ip) != mac}
+                self.learned_macs.update(macs)
+        
+        for ip, latency in results:
+            host_info = {
+                'latency': latency,
+                'last_seen': current_time,
+                'angle': self._host_angle(ip),  # Ángulo estable basado en IP
+                'interface': segment['interface'],
+                'subnet': segment['subnet'],
+                'family': 4
+            }
+            host_info.update(self._path_fields(ip, segment['interface']))
+            
+            with self.hosts_lock:
+                previous = self.active_hosts.get(ip)
+                if previous is None:
+                    self.host_arrivals += 1
+                self.active_hosts[ip] = host_info
+                self._mark_changed(ip, visible=(ip in new_macs or
+                                                self._is_visible_change(previous, host_info)))
+            
+            with self.known_hosts_lock:
+                self.known_hosts.add(ip)
+    
+    def discover_broadcast(self, segment):
+        """
+        Pre-barrido: envía unos pocos ecos a la dirección de broadcast del segmento
+        y recoge a todos los que respondan en una sola ventana de recepción
+        
+        Args:
+            segment (dict): Segmento devuelto por get_segments()
+            
+        Returns:
+            list: Tuplas (ip, latencia_ms) de los hosts que respondieron
+        """
+        from scapy.layers.l2 import Ether
+        from scapy.layers.inet import IP, ICMP
+        from scapy.sendrecv import AsyncSniffer, send
+        
+        network = segment['network']
+        iface = segment['interface']
+        if network.num_addresses <= 2:
+            return []  # /31 y /32 no tienen broadcast
+        
+        ident = random.randint(0, 0xFFFF)
+        own_addresses = {n['address'] for n in (self.local_networks or [])}
+        
+        # Escuchar antes de enviar; el filtro descarta todo lo que no sea nuestra respuesta
+        started = threading.Event()
+        sniffer_args = {
+            'lfilter': lambda p: (ICMP in p and p[ICMP].type == 0 and p[ICMP].id == ident),
+            'started_callback': started.set,
+            'store': True
+        }
+        if iface:
+            sniffer_args['iface'] = iface
+        sniffer = AsyncSniffer(**sniffer_args)
+        sniffer.start()
+        started.wait(1)
+        
+        send_times = {}
+        broadcast = str(network.broadcast_address)
+        for seq in range(self.broadcast_probes):
+            send_times[seq] = time.time()
+            send(IP(dst=broadcast) / ICMP(id=ident, seq=seq), verbose=0)
+            time.sleep(0.05)
+        
+        time.sleep(self.timeout)
+        packets = sniffer.stop() or []
+        
+        # Primera respuesta de cada host dentro del segmento
+        responders = {}
+        macs = {}
+        for packet in packets:
+            ip = packet[IP].src
+            if ip in responders or ip in own_addresses:
+                continue
+            try:
+                if ipaddress.IPv4Address(ip) not in network:
+                    continue
+            except ValueError:
+                continue
+            sent = send_times.get(packet[ICMP].seq)
+            if sent is None:
+                continue
+            responders[ip] = max(packet.time - sent, 0) * 1000
+            if iface and Ether in packet:
+                macs[ip] = packet[Ether].src  # Solo en enlace directo la MAC es la del host
+        
+        results = list(responders.items())
+        for ip in responders:
+            self._record_liveness(ip, True)
+        self._record_hosts(results, segment, macs)
+        if results:
+            events.info("BROADCAST", f"{segment['subnet']}: {len(results)} hosts en un solo eco",
+                        subnet=segment['subnet'], hosts=len(results))
+        return results
+    
+    def _record_liveness(self, ip, alive, now=None):
+        """
+        Actualiza el historial de vivacidad de una dirección
+        
+        Args:
+            ip (str): Dirección IP
+            alive (bool): Si respondió
+            now (float): Instante del resultado (por defecto ahora)
+        """
+        if now is None:
+            now = time.time()
+        with self.liveness_lock:
+            entry = self.liveness.get(ip)
+            if entry is None:
+                entry = self.liveness[ip] = {
+                    'score': 0.0, 'last_alive': 0.0, 'last_probe': 0.0,
+                    'last_change': 0.0, 'fail_streak': 0, 'next_probe': 0.0,
+                    'alive': None
+                }
+            # Media móvil exponencial de la probabilidad de respuesta
+            entry['score'] = entry['score'] * 0.7 + (0.3 if alive else 0.0)
+            entry['last_probe'] = now
+            if entry['alive'] is not None and entry['alive'] != alive:
+                entry['last_change'] = now
+            entry['alive'] = alive
+            if alive:
+                entry['last_alive'] = now
+                entry['fail_streak'] = 0
+                entry['next_probe'] = now
+            else:
+                # Back-off exponencial para direcciones que no responden
+                entry['fail_streak'] += 1
+                backoff = min(self.base_probe_backoff * 2 ** (entry['fail_streak'] - 1),
+                              self.max_probe_backoff)
+                entry['next_probe'] = now + backoff
+    
+    def _plan_sweep(self, network, exclude=()):
+        """
+        Decide qué direcciones sondear en este barrido y en qué orden
+        
+        Se omiten las confirmadas hace poco (p. ej. por el ping continuo) y las que
+        siguen en back-off; el resto va primero por cambios recientes de estado
+        y después por probabilidad de estar vivas.
+        
+        Args:
+            network (IPv4Network): Red del segmento
+            exclude (set): Direcciones ya resueltas en este barrido
+            
+        Returns:
+            list: Direcciones IP (str) a sondear, en orden
+        """
+        addresses = [str(ip) for ip in network.hosts()]
+        if not self.liveness_ordering:
+            return [ip for ip in addresses if ip not in exclude]
+        
+        now = time.time()
+        planned = []
+        skipped_recent = 0
+        skipped_backoff = 0
+        with self.liveness_lock:
+            liveness = self.liveness
+            for ip in addresses:
+                if ip in exclude:
+                    continue
+                entry = liveness.get(ip)
+                if entry is None:
+                    planned.append((1, -0.05, ip))  # Nunca sondeada: prioridad baja pero se sondea
+                    continue
+                if now - entry['last_alive'] < self.recent_confirm_window:
+                    skipped_recent += 1
+                    continue
+                if entry['next_probe'] > now:
+                    skipped_backoff += 1
+                    continue
+                churned = now - entry['last_change'] < self.churn_window
+                planned.append((0 if churned else 1, -entry['score'], ip))
+        
+        planned.sort()
+        self.last_sweep_stats[str(network)] = {
+            'addresses': len(addresses),
+            'probed': len(planned),
+            'skipped_recent': skipped_recent,
+            'skipped_backoff': skipped_backoff
+        }
+        return [ip for _, _, ip in planned]
+    
+    def get_sweep_stats(self):
+        """
+        Retorna cuántas direcciones se sondearon y omitieron en el último barrido de cada segmento
+        
+        Returns:
+            dict: {subred: {addresses, probed, skipped_recent, skipped_backoff}}
+        """
+        return dict(self.last_sweep_stats)
+    
+    def _scan_segment(self, segment):
+        """
+        Escanea un segmento de red con su propio presupuesto de envío
+        
+        Args:
+            segment (dict): Segmento devuelto por get_segments()
+        """
+        try:
+            network = segment['network']
+            iface = segment['interface']
+            limiter = self._get_rate_limiter(iface)
             threads = []
             results = []
             
+            # Pre-barrido opcional: quienes respondan al broadcast no se sondean uno a uno
+            responded = set()
+            if self.broadcast_discovery:
+                try:
+                    responded = {ip for ip, _ in self.discover_broadcast(segment)}
+                except Exception as e:
+                    events.warning("BROADCAST", f"Error en {segment['subnet']}: {e}", subnet=segment['subnet'])
+            
             def ping_worker(ip_str):
-                result = self.ping_host(ip_str)
+                limiter.acquire()
+                result = self.ping_host(ip_str, iface=iface, subnet=segment['subnet'])
                 if result[1] is not None:  # Si el host responde
                     results.append(result)
             
-            # Crear threads para ping paralelo
-            for ip in network.hosts():
-                if len(threads) >= 20:  # Reducir threads concurrentes para mejor rendimiento
+            # Crear threads para ping paralelo (solo direcciones que no respondieron al
+            # broadcast, omitiendo las confirmadas hace poco y en orden de vivacidad)
+            for ip_str in self._plan_sweep(network, responded):
+                if len(threads) >= self.threads_per_segment:  # Limitar threads concurrentes por segmento
                     for t in threads:
                         t.join()
                     threads.clear()
                 
-                thread = threading.Thread(target=ping_worker, args=(str(ip),))
+                thread = threading.Thread(target=ping_worker, args=(ip_str,))
                 thread.start()
                 threads.append(thread)
             
@@ -175,23 +1307,11 @@ class ICMPScanner:
             for thread in threads:
                 thread.join()
             
-                # Actualizar hosts activos (thread-safe)
-                current_time = time.time()
-                for ip, latency in results:
-                    host_info = {
-                        'latency': latency,
-                        'last_seen': current_time,
-                        'angle': hash(ip) % 360  # Asignar ángulo único basado en IP
-                    }
-                    
-                    with self.hosts_lock:
-                        self.active_hosts[ip] = host_info
-                    
-                    with self.known_hosts_lock:
-                        self.known_hosts.add(ip)
+            # Actualizar hosts activos (thread-safe), etiquetados con interfaz y subred
+            self._record_hosts(results, segment)
                     
         except Exception as e:
-            print(f"Error durante el escaneo: {e}")
+            events.error("SCAN", f"Error durante el escaneo de {segment['subnet']}: {e}", subnet=segment['subnet'])
     
     def start_continuous_ping(self):
         """
@@ -210,22 +1330,38 @@ class ICMPScanner:
                         if not self.continuous_ping_running:
                             break
                             
-                        result = self.ping_host(ip, retries=1)  # Solo 1 reintento para ser rápido
+                        with self.hosts_lock:
+                            existing = self.active_hosts.get(ip, {})
+                        iface = existing.get('interface')
+                        
+                        result = self.ping_host(ip, retries=1, iface=iface,  # Solo 1 reintento para ser rápido
+                                                subnet=existing.get('subnet'))
                         
-                        if result[1] is not None:  # Si responde
+                        with self.known_hosts_lock:
+                            forgotten = ip not in self.known_hosts  # Expiró o se reasignó su rango
+                        if result[1] is not None and not forgotten:  # Si responde
                             # Actualizar información del host (thread-safe)
                             current_time = time.time()
+                            path_fields = self._path_fields(ip, iface)
                             with self.hosts_lock:
-                                existing_angle = self.active_hosts.get(ip, {}).get('angle', hash(ip) % 360)
-                                self.active_hosts[ip] = {
+                                previous = self.active_hosts.get(ip)
+                                existing = previous or existing
+                                info = {
                                     'latency': result[1],
                                     'last_seen': current_time,
-                                    'angle': existing_angle
+                                    'angle': existing.get('angle', self._host_angle(ip)),
+                                    'interface': existing.get('interface'),
+                                    'subnet': existing.get('subnet'),
+                                    'family': existing.get('family', 4),
+                                    **path_fields
                                 }
-                            print(f"[PING-CONT] {ip}: {result[1]:.1f}ms")
+                                self.active_hosts[ip] = info
+                                # Solo despertar al radar si cambia lo que dibuja
+                                self._mark_changed(ip, visible=self._is_visible_change(previous, info))
+                            events.debug("PING-CONT", f"{ip}: {result[1]:.1f}ms", ip=ip, latency=result[1])
                         
-                        # Pequeña pausa entre pings para no saturar
-                        time.sleep(0.1)
+                        # Pausa entre pings marcada por el control de tasa de la interfaz
+                        self._get_rate_limiter(iface).acquire()
                     
                     # Pausa antes del siguiente ciclo de ping continuo
                     time.sleep(2)  # Ping continuo cada 2 segundos
@@ -244,22 +1380,43 @@ class ICMPScanner:
         if self.continuous_ping_thread:
             self.continuous_ping_thread.join(timeout=2)
     
-    def start_continuous_scan(self, interval=5):
+    def observe_sweep_churn(self):
+        """
+        Informa al control de ritmo de los hosts que llegaron o se fueron desde
+        el barrido anterior (llamar al terminar cada barrido)
+        
+        Returns:
+            tuple: (llegadas, salidas) desde el barrido anterior
+        """
+        with self.hosts_lock:
+            current = (self.host_arrivals, self.host_departures)
+        arrivals = current[0] - self.churn_seen[0]
+        departures = current[1] - self.churn_seen[1]
+        self.churn_seen = current
+        self.cadence.observe(arrivals, departures)
+        return arrivals, departures
+    
+    def start_continuous_scan(self, interval=5, max_interval=None):
         """
         Inicia escaneo continuo en segundo plano
         
         Args:
-            interval (int): Intervalo entre escaneos en segundos
+            interval (int): Intervalo mínimo entre escaneos en segundos
+            max_interval (int): Intervalo máximo con la red estable (None = 6 veces interval)
         """
         if self.scanning:
             return
             
         self.scanning = True
+        self.cadence.min_interval = interval
+        self.cadence.max_interval = max_interval if max_interval is not None else interval * 6
+        self.cadence.interval = interval
         
         def scan_loop():
             while self.scanning:
                 self.scan_network()
-                time.sleep(interval)
+                self.observe_sweep_churn()
+                self.cadence.wait()
         
         self.scan_thread = threading.Thread(target=scan_loop, daemon=True)
         self.scan_thread.start()
@@ -269,9 +1426,15 @@ class ICMPScanner:
         Detiene todos los threads de escaneo
         """
         self.scanning = False
+        self.cadence.trigger()  # Despertar el bucle de barridos para que termine
         self.stop_continuous_ping()
         self.stop_cleanup_thread()
         
+        if self.reply_listener is not None:
+            self.reply_listener.close()
+        if self.path_tracer is not None:
+            self.path_tracer.close()
+        
         if self.scan_thread:
             self.scan_thread.join()
             
@@ -307,7 +1470,9 @@ class ICMPScanner:
                         for ip in expired_hosts:
                             if ip in self.active_hosts:
                                 del self.active_hosts[ip]
-                                print(f"[CLEANUP] Host expirado: {ip}")
+                                self.host_departures += 1
+                                self._mark_changed(ip)
+                                events.info("CLEANUP", f"Host expirado: {ip}", ip=ip)
                     
                     # Limpiar hosts conocidos también
                     if expired_hosts:
@@ -315,6 +1480,8 @@ class ICMPScanner:
                             for ip in expired_hosts:
                                 self.known_hosts.discard(ip)
                     
+                    self.prune_state(current_time)
+                    
                     # Ejecutar limpieza cada 5 segundos
                     time.sleep(5)
                     
@@ -324,6 +1491,155 @@ class ICMPScanner:
         self.cleanup_thread = threading.Thread(target=cleanup_worker, daemon=True)
         self.cleanup_thread.start()
     
+    def prune_state(self, now=None):
+        """
+        Mantiene acotada la memoria: aplica capacidad y caducidad a hosts activos,
+        hosts conocidos, MACs aprendidas, historial de vivacidad y rutas
+        
+        Args:
+            now (float): Instante de referencia (por defecto ahora)
+            
+        Returns:
+            dict: Entradas descartadas en esta pasada por estructura
+        """
+        now = now or time.time()
+        evicted = defaultdict(int)
+        
+        # Hosts activos por encima de la capacidad: fuera los vistos hace más tiempo
+        with self.hosts_lock:
+            excess = len(self.active_hosts) - self.max_hosts
+            if excess > 0:
+                oldest = heapq.nsmallest(excess, self.active_hosts.items(),
+                                         key=lambda item: item[1]['last_seen'])
+                for ip, info in oldest:
+                    del self.active_hosts[ip]
+                    self.mac_seen[ip] = info['last_seen']
+                    self.host_departures += 1
+                    self._mark_changed(ip)
+                evicted['active_hosts'] = excess
+            active = {ip: info['last_seen'] for ip, info in self.active_hosts.items()}
+        
+        # Hosts conocidos que ya no están activos (se añaden siempre después del activo)
+        with self.known_hosts_lock:
+            stale = self.known_hosts - active.keys()
+            self.known_hosts -= stale
+            evicted['known_hosts'] = len(stale)
+        
+        # MACs: caducan mac_ttl después de la última vez que su host respondió
+        with self.macs_lock:
+            for ip in self.learned_macs:
+                if ip in active:
+                    self.mac_seen[ip] = active[ip]
+                elif ip not in self.mac_seen:
+                    self.mac_seen[ip] = now  # Aprendida sin host activo: empieza a contar ahora
+            expired = [ip for ip, seen in self.mac_seen.items()
+                       if ip not in self.learned_macs or (ip not in active and now - seen > self.mac_ttl)]
+            for ip in expired:
+                del self.mac_seen[ip]
+            excess = len(self.mac_seen) - self.max_learned_macs
+            if excess > 0:
+                # Primero las de hosts inactivos, y entre ellas las vistas hace más tiempo
+                expired.extend(heapq.nsmallest(excess, self.mac_seen,
+                                               key=lambda ip: (ip in active, self.mac_seen[ip])))
+                for ip in expired[-excess:]:
+                    del self.mac_seen[ip]
+            for ip in expired:
+                if self.learned_macs.pop(ip, None) is not None:
+                    evicted['learned_macs'] += 1
+                    if ip in active:
+                        self._mark_changed(ip)
+        
+        # Vivacidad de direcciones que ya no se barren (rangos reasignados o retirados)
+        with self.liveness_lock:
+            expired = [ip for ip, entry in self.liveness.items()
+                       if now - entry['last_probe'] > self.liveness_ttl]
+            for ip in expired:
+                del self.liveness[ip]
+            excess = len(self.liveness) - self.max_liveness_entries
+            if excess > 0:
+                oldest = heapq.nsmallest(excess, self.liveness,
+                                         key=lambda ip: self.liveness[ip]['last_probe'])
+                for ip in oldest:
+                    del self.liveness[ip]
+                expired.extend(oldest)
+            evicted['liveness'] = len(expired)
+        
+        if self.path_tracer is not None:
+            evicted['path_cache'] = self.path_tracer.prune(now)
+        evicted['latency_subnets'] = self.latency_monitor.prune(now)
+        
+        evicted = {name: count for name, count in evicted.items() if count}
+        for name, count in evicted.items():
+            self.evictions[name] += count
+        if evicted:
+            events.debug("PRUNE", ", ".join(f"{n}: {c}" for n, c in evicted.items()), **evicted)
+        return evicted
+    
+    def forget_outside(self, ranges):
+        """
+        Olvida los hosts fuera de unos rangos (activos y conocidos, MACs y
+        vivacidad), p. ej. cuando un sensor deja de tener asignado un rango: si no,
+        el ping continuo los seguiría sondeando y manteniendo vivos
+        
+        Args:
+            ranges (list): Rangos que se siguen escaneando
+            
+        Returns:
+            int: Hosts activos descartados
+        """
+        networks = [ipaddress.ip_network(r, strict=False) for r in ranges]
+        
+        def outside(ip):
+            address = ipaddress.ip_address(ip)
+            return not any(address.version == n.version and address in n for n in networks)
+        
+        with self.known_hosts_lock:
+            self.known_hosts -= {ip for ip in self.known_hosts if outside(ip)}
+        with self.macs_lock:
+            for ip in [ip for ip in self.learned_macs if outside(ip)]:
+                del self.learned_macs[ip]
+            for ip in [ip for ip in self.mac_seen if outside(ip)]:
+                del self.mac_seen[ip]
+        with self.liveness_lock:
+            for ip in [ip for ip in self.liveness if outside(ip)]:
+                del self.liveness[ip]
+        with self.hosts_lock:
+            dropped = [ip for ip in self.active_hosts if outside(ip)]
+            for ip in dropped:
+                del self.active_hosts[ip]
+                self._mark_changed(ip)
+        if dropped:
+            events.info("SCAN", f"{len(dropped)} hosts fuera de los rangos asignados descartados")
+        return len(dropped)
+    
+    def get_memory_stats(self):
+        """
+        Tamaño de las estructuras que crecen con la red (entradas, límite y bytes
+        aproximados, estimados con una muestra de entradas)
+        
+        Returns:
+            dict: {estructura: {entries, limit, bytes, evicted}, 'total_bytes': int}
+        """
+        structures = {
+            'active_hosts': (self.active_hosts, self.max_hosts),
+            'known_hosts': (self.known_hosts, self.max_hosts),
+            'learned_macs': (self.learned_macs, self.max_learned_macs),
+            'mac_seen': (self.mac_seen, self.max_learned_macs),
+            'liveness': (self.liveness, self.max_liveness_entries),
+        }
+        if self.path_tracer is not None:
+            structures['path_cache'] = (self.path_tracer.cache, self.path_tracer.max_prefixes)
+        
+        stats = {}
+        total = 0
+        for name, (container, limit) in structures.items():
+            size = _approx_size(container)
+            total += size
+            stats[name] = {'entries': len(container), 'limit': limit, 'bytes': size,
+                           'evicted': self.evictions.get(name, 0)}
+        stats['total_bytes'] = total
+        return stats
+    
     def stop_cleanup_thread(self):
         """
         Detiene el thread de limpieza
@@ -337,7 +1653,7 @@ class ICMPScanner:
         Retorna la lista de hosts activos (thread-safe, sin limpieza)
         
         Returns:
-            dict: Diccionario con hosts activos {ip: {latency, last_seen, angle}}
+            dict: Diccionario con hosts activos {ip: {latency, last_seen, angle, interface, subnet, family}}
         """
         with self.hosts_lock:
             return self.active_hosts.copy()
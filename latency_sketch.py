@@ -0,0 +1,284 @@
+"""
+Cuantiles de latencia en streaming por ventanas de tiempo
+
+Cada RTT se añade a un DDSketch (cubetas logarítmicas con error relativo
+acotado): coste O(1) por muestra, memoria acotada y sketches combinables por
+suma de cubetas. Cada ventana (último minuto, última hora) es un anillo de
+sketches por franja de tiempo; al consultar se combinan las franjas vigentes.
+LatencyMonitor mantiene estas ventanas para toda la red y por subred, junto
+con los sondeos perdidos.
+
+Uso:
+  monitor = LatencyMonitor()
+  monitor.record("192.168.1.0/24", 4.2)        # RTT en ms
+  monitor.record("192.168.1.0/24", None)       # Sondeo perdido a un host vivo
+  monitor.get_summary()['global']['1m']        # {count, lost, loss, p50, p90, p99, min, max}
+"""
+
+import math
+import time
+import threading
+
+DEFAULT_WINDOWS = {
+    '1m': (60, 6),     # nombre -> (duración en s, franjas del anillo)
+    '1h': (3600, 12),
+}
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class DDSketch:
+    def __init__(self, relative_accuracy=0.02, max_bins=512, min_value=1e-3):
+        """
+        Sketch de cuantiles con error relativo acotado
+
+        Args:
+            relative_accuracy (float): Error relativo máximo de cada cuantil (0.02 = 2%)
+            max_bins (int): Cubetas como máximo (si se superan se juntan las más bajas)
+            min_value (float): Valores por debajo cuentan como cero
+        """
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_bins = max_bins
+        self.min_value = min_value
+        self.bins = {}  # índice -> muestras con valor en (gamma^(i-1), gamma^i]
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        """
+        Añade una muestra (O(1))
+        """
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if value <= self.min_value:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self.log_gamma)
+        bins = self.bins
+        bins[index] = bins.get(index, 0) + 1
+        if len(bins) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self):
+        # Juntar las cubetas más bajas: se pierde precisión solo en los cuantiles más bajos
+        keys = sorted(self.bins)
+        excess = len(keys) - self.max_bins
+        target = keys[excess]
+        for key in keys[:excess]:
+            self.bins[target] += self.bins.pop(key)
+
+    def merge(self, other):
+        """
+        Suma las cubetas de otro sketch con la misma precisión
+        """
+        if other.count == 0:
+            return
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def quantile(self, q):
+        """
+        Valor del cuantil q (0-1), o None si no hay muestras
+        """
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def clear(self):
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+
+class WindowedSketch:
+    def __init__(self, duration, slots, relative_accuracy=0.02):
+        """
+        Ventana deslizante de latencias y pérdidas como anillo de franjas
+
+        Args:
+            duration (float): Duración de la ventana en segundos
+            slots (int): Franjas del anillo (la ventana avanza de franja en franja)
+            relative_accuracy (float): Precisión de los sketches
+        """
+        self.slot_duration = duration / slots
+        self.sketches = [DDSketch(relative_accuracy) for _ in range(slots)]
+        self.lost = [0] * slots
+        self.epochs = [None] * slots  # Franja de tiempo a la que corresponde cada posición
+
+    def _slot(self, now):
+        epoch = int(now // self.slot_duration)
+        position = epoch % len(self.sketches)
+        if self.epochs[position] != epoch:
+            # Rotación: la posición guardaba una franja ya fuera de la ventana
+            self.sketches[position].clear()
+            self.lost[position] = 0
+            self.epochs[position] = epoch
+        return position
+
+    def add(self, latency, now):
+        self.sketches[self._slot(now)].add(latency)
+
+    def add_loss(self, now):
+        self.lost[self._slot(now)] += 1
+
+    def is_idle(self, now):
+        """
+        True si ninguna franja vigente tiene muestras ni pérdidas
+        """
+        oldest = int(now // self.slot_duration) - len(self.sketches) + 1
+        return not any(epoch is not None and epoch >= oldest and
+                       (self.sketches[position].count or self.lost[position])
+                       for position, epoch in enumerate(self.epochs))
+
+    def merged(self, now):
+        """
+        Returns:
+            tuple: (sketch combinado de las franjas vigentes, sondeos perdidos)
+        """
+        oldest = int(now // self.slot_duration) - len(self.sketches) + 1
+        total = DDSketch(self.sketches[0].relative_accuracy)
+        lost = 0
+        for position, epoch in enumerate(self.epochs):
+            if epoch is not None and epoch >= oldest:
+                total.merge(self.sketches[position])
+                lost += self.lost[position]
+        return total, lost
+
+
+class LatencyMonitor:
+    def __init__(self, windows=None, relative_accuracy=0.02, max_subnets=256):
+        """
+        Latencias y pérdidas de toda la red y por subred, por ventanas de tiempo
+
+        Args:
+            windows (dict): {nombre: (duración s, franjas)} (por defecto último minuto y última hora)
+            relative_accuracy (float): Error relativo de los cuantiles
+            max_subnets (int): Subredes con estadísticas propias (las demás solo cuentan en global)
+        """
+        self.windows = windows or DEFAULT_WINDOWS
+        self.relative_accuracy = relative_accuracy
+        self.max_subnets = max_subnets
+        self.lock = threading.Lock()
+        self.global_stats = self._new_windows()
+        self.subnet_stats = {}
+
+    def _new_windows(self):
+        return {name: WindowedSketch(duration, slots, self.relative_accuracy)
+                for name, (duration, slots) in self.windows.items()}
+
+    def record(self, subnet, latency, now=None):
+        """
+        Registra un RTT (ms) o un sondeo perdido (latency=None)
+
+        Args:
+            subnet (str): Subred del host (None = solo estadística global)
+            latency (float): RTT en ms, o None si se perdió
+            now (float): Instante de la muestra (por defecto ahora)
+        """
+        now = now or time.time()
+        with self.lock:
+            targets = [self.global_stats]
+            if subnet is not None:
+                stats = self.subnet_stats.get(subnet)
+                if stats is None and len(self.subnet_stats) < self.max_subnets:
+                    stats = self.subnet_stats[subnet] = self._new_windows()
+                if stats is not None:
+                    targets.append(stats)
+            for stats in targets:
+                for window in stats.values():
+                    if latency is None:
+                        window.add_loss(now)
+                    else:
+                        window.add(latency, now)
+
+    def _summarize(self, stats, now):
+        summary = {}
+        for name, window in stats.items():
+            sketch, lost = window.merged(now)
+            total = sketch.count + lost
+            entry = {'count': sketch.count, 'lost': lost, 'loss': lost / total if total else 0.0,
+                     'min': sketch.min if sketch.count else None,
+                     'max': sketch.max if sketch.count else None}
+            for q in QUANTILES:
+                entry[f"p{round(q * 100)}"] = sketch.quantile(q)
+            summary[name] = entry
+        return summary
+
+    def get_summary(self, subnet=None, now=None):
+        """
+        Cuantiles y pérdida por ventana
+
+        Args:
+            subnet (str): Solo esta subred (None = global y todas las subredes)
+
+        Returns:
+            dict: {window: {count, lost, loss, p50, p90, p99, min, max}} para una subred, o
+                {'global': {...}, 'subnets': {subred: {...}}}
+        """
+        now = now or time.time()
+        with self.lock:
+            if subnet is not None:
+                stats = self.subnet_stats.get(subnet)
+                return self._summarize(stats, now) if stats is not None else None
+            return {'global': self._summarize(self.global_stats, now),
+                    'subnets': {name: self._summarize(stats, now)
+                                for name, stats in self.subnet_stats.items()}}
+
+    def prune(self, now=None):
+        """
+        Olvida las subredes sin muestras en la ventana más larga
+
+        Returns:
+            int: Subredes descartadas
+        """
+        now = now or time.time()
+        longest = max(self.windows, key=lambda name: self.windows[name][0])
+        with self.lock:
+            idle = [name for name, stats in self.subnet_stats.items() if stats[longest].is_idle(now)]
+            for name in idle:
+                del self.subnet_stats[name]
+        return len(idle)
+
+
+if __name__ == "__main__":
+    # Ejemplo: precisión frente a los cuantiles exactos y coste por muestra
+    import random
+
+    samples = [random.lognormvariate(1.5, 0.8) for _ in range(200000)]
+    monitor = LatencyMonitor()
+    start = time.perf_counter()
+    for i, rtt in enumerate(samples):
+        monitor.record(f"10.0.{i % 4}.0/24", rtt if i % 100 else None)
+    per_sample = (time.perf_counter() - start) / len(samples) * 1e6
+
+    exact = sorted(rtt for i, rtt in enumerate(samples) if i % 100)
+    summary = monitor.get_summary()['global']['1m']
+    for q in QUANTILES:
+        key = f"p{round(q * 100)}"
+        real = exact[int(q * (len(exact) - 1))]
+        print(f"{key}: {summary[key]:.2f}ms (exacto {real:.2f}ms, error {abs(summary[key] - real) / real:.1%})")
+    print(f"pérdida: {summary['loss']:.1%}, {per_sample:.1f}µs por muestra, "
+          f"{len(monitor.get_summary()['subnets'])} subredes")
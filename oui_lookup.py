@@ -0,0 +1,258 @@
+import os
+import csv
+import re
+import threading
+from array import array
+from bisect import bisect_left
+
+# Archivos del registro IEEE que se buscan (en este orden) en el directorio de datos.
+# Se descargan de:
+#   https://standards-oui.ieee.org/oui/oui.csv       (MA-L, prefijos de 24 bits)
+#   https://standards-oui.ieee.org/oui28/mam.csv     (MA-M, prefijos de 28 bits)
+#   https://standards-oui.ieee.org/oui36/oui36.csv   (MA-S, prefijos de 36 bits)
+# También se acepta el formato de texto oui.txt.
+REGISTRY_FILES = ["oui.csv", "mam.csv", "oui36.csv", "oui.txt"]
+
+# Prefijos conocidos usados si no hay registro IEEE en disco
+BUILTIN_OUIS = {
+    "14825B": "TP-Link",
+    "586C25": "Intel",
+    "B4B024": "Samsung",
+    "C0956D": "Apple",
+    "1883BF": "Xiaomi",
+}
+
+# Tipo de dispositivo según palabras clave en el nombre del fabricante
+VENDOR_TYPES = [
+    ("TP-LINK", "Router/AP"),
+    ("NETGEAR", "Router/AP"),
+    ("UBIQUITI", "Router/AP"),
+    ("MIKROTIK", "Router/AP"),
+    ("CISCO", "Network Device"),
+    ("ARUBA", "Router/AP"),
+    ("INTEL", "PC/Laptop"),
+    ("DELL", "PC/Laptop"),
+    ("LENOVO", "PC/Laptop"),
+    ("HEWLETT", "PC/Printer"),
+    ("APPLE", "iPhone/iPad"),
+    ("SAMSUNG", "Phone/Tablet"),
+    ("XIAOMI", "Phone/IoT"),
+    ("HUAWEI", "Phone/Router"),
+    ("ESPRESSIF", "IoT"),
+    ("RASPBERRY", "IoT"),
+    ("VMWARE", "Virtual Device"),
+    ("QEMU", "Virtual Device"),
+]
+
+_TXT_LINE = re.compile(r"^([0-9A-F]{2})-([0-9A-F]{2})-([0-9A-F]{2})\s+\(hex\)\s+(.+)$")
+
+
+class OUIDatabase:
+    def __init__(self, data_dir=None, memo_size=65536):
+        """
+        Base de datos de fabricantes por prefijo MAC (registro IEEE)
+
+        El registro se carga de forma perezosa (en la primera consulta o con
+        preload_async) y se guarda como arrays ordenados de enteros, uno por
+        longitud de prefijo, consultados con búsqueda binaria.
+
+        Args:
+            data_dir (str): Directorio con los archivos del registro (por defecto el del módulo)
+            memo_size (int): Número máximo de MACs memorizadas
+        """
+        self.data_dir = data_dir or os.path.dirname(os.path.abspath(__file__))
+        self.memo_size = memo_size
+
+        # (bits del prefijo, prefijos ordenados, índice de fabricante por prefijo)
+        self.tables = []
+        self.vendors = []
+        self.loaded = False
+        self.source = None
+
+        self.load_lock = threading.Lock()
+        self.load_thread = None
+        self.memo = {}
+
+    def preload_async(self):
+        """
+        Carga el registro en un thread de fondo para no retrasar el arranque
+        """
+        if self.loaded or self.load_thread is not None:
+            return
+        self.load_thread = threading.Thread(target=self.load, daemon=True)
+        self.load_thread.start()
+
+    def load(self):
+        """
+        Carga y compacta el registro IEEE (solo la primera vez)
+        """
+        with self.load_lock:
+            if self.loaded:
+                return
+
+            entries = {}  # bits -> {prefijo: índice de fabricante}
+            vendor_ids = {}
+            sources = []
+            for filename in REGISTRY_FILES:
+                path = os.path.join(self.data_dir, filename)
+                if not os.path.exists(path):
+                    continue
+                try:
+                    for assignment, vendor in self._read_registry(path):
+                        bits = len(assignment) * 4
+                        vendor_id = vendor_ids.setdefault(vendor, len(vendor_ids))
+                        entries.setdefault(bits, {})[int(assignment, 16)] = vendor_id
+                    sources.append(filename)
+                except (OSError, ValueError, csv.Error) as e:
+                    print(f"[OUI] Error leyendo {path}: {e}")
+
+            if not sources:
+                # Sin registro en disco: usar los prefijos incorporados
+                for assignment, vendor in BUILTIN_OUIS.items():
+                    vendor_id = vendor_ids.setdefault(vendor, len(vendor_ids))
+                    entries.setdefault(24, {})[int(assignment, 16)] = vendor_id
+                sources.append("builtin")
+
+            tables = []
+            for bits in sorted(entries, reverse=True):  # Prefijo más largo primero
+                prefixes = sorted(entries[bits])
+                tables.append((bits,
+                               array('Q', prefixes),
+                               array('I', (entries[bits][p] for p in prefixes))))
+
+            self.vendors = [None] * len(vendor_ids)
+            for vendor, vendor_id in vendor_ids.items():
+                self.vendors[vendor_id] = vendor
+            self.tables = tables
+            self.source = ", ".join(sources)
+            self.loaded = True
+
+    def _read_registry(self, path):
+        """
+        Lee un archivo del registro IEEE (CSV o texto)
+
+        Yields:
+            tuple: (asignación en hexadecimal, nombre del fabricante)
+        """
+        with open(path, newline='', encoding='utf-8', errors='replace') as f:
+            if path.endswith(".csv"):
+                for row in csv.DictReader(f):
+                    assignment = (row.get("Assignment") or "").strip().upper()
+                    vendor = (row.get("Organization Name") or "").strip()
+                    if assignment and vendor:
+                        yield assignment, vendor
+            else:
+                for line in f:
+                    match = _TXT_LINE.match(line.strip())
+                    if match:
+                        yield "".join(match.group(1, 2, 3)), match.group(4).strip()
+
+    def lookup_vendor(self, mac_address):
+        """
+        Busca el fabricante de una MAC por su prefijo más largo registrado
+
+        Args:
+            mac_address (str): MAC en formato aa:bb:cc:dd:ee:ff (también acepta - o .)
+
+        Returns:
+            str: Nombre del fabricante, o None si no se conoce
+        """
+        if not self.loaded:
+            self.load()
+
+        digits = mac_address.replace(":", "").replace("-", "").replace(".", "")
+        try:
+            mac_int = int(digits, 16)
+        except ValueError:
+            return None
+
+        for bits, prefixes, vendor_ids in self.tables:
+            prefix = mac_int >> (48 - bits)
+            i = bisect_left(prefixes, prefix)
+            if i < len(prefixes) and prefixes[i] == prefix:
+                return self.vendors[vendor_ids[i]]
+        return None
+
+    def lookup(self, mac_address):
+        """
+        Retorna (fabricante, tipo de dispositivo) para una MAC, memorizando el resultado
+
+        Mientras el registro se está cargando en segundo plano retorna None sin
+        bloquear (y sin memorizar).
+
+        Args:
+            mac_address (str): Dirección MAC
+
+        Returns:
+            tuple: (nombre_fabricante, tipo_dispositivo), o None si no se identifica
+        """
+        cached = self.memo.get(mac_address, False)
+        if cached is not False:
+            return cached
+
+        if not self.loaded and self.load_lock.locked():
+            return None  # Carga en curso: no bloquear el frame
+
+        vendor = self.lookup_vendor(mac_address)
+        if vendor is not None:
+            result = (self._short_name(vendor), self._device_type(vendor))
+        elif self._is_locally_administered(mac_address):
+            result = ("Random", "Virtual Device")
+        else:
+            result = None
+
+        if len(self.memo) >= self.memo_size:
+            self.memo.clear()
+        self.memo[mac_address] = result
+        return result
+
+    def _short_name(self, vendor):
+        """
+        Acorta el nombre del fabricante para mostrarlo en el radar
+        """
+        return vendor.split(",")[0].strip()[:24]
+
+    def _device_type(self, vendor):
+        """
+        Deduce el tipo de dispositivo a partir del nombre del fabricante
+        """
+        vendor_upper = vendor.upper()
+        for keyword, device_type in VENDOR_TYPES:
+            if keyword in vendor_upper:
+                return device_type
+        return "Network Device"
+
+    def _is_locally_administered(self, mac_address):
+        """
+        MACs con el bit de administración local (aleatorias, VMs, contenedores)
+        """
+        try:
+            return bool(int(mac_address[:2], 16) & 0x02)
+        except ValueError:
+            return False
+
+
+if __name__ == "__main__":
+    # Ejemplo de uso y medición de tiempos
+    import sys
+    import time
+
+    db = OUIDatabase(sys.argv[1] if len(sys.argv) > 1 else None)
+    start = time.perf_counter()
+    db.load()
+    print(f"[OUI] Registro cargado ({db.source}) en {(time.perf_counter() - start) * 1000:.1f}ms, "
+          f"{len(db.vendors)} fabricantes")
+
+    test_macs = ["14:82:5b:00:00:20", "58:6c:25:f7:56:2f", "42:11:9e:00:00:01"]
+    for mac in test_macs:
+        print(f"  {mac} -> {db.lookup(mac)}")
+
+    iterations = 100000
+    start = time.perf_counter()
+    for _ in range(iterations):
+        db.lookup_vendor(test_macs[0])
+    print(f"[OUI] Búsqueda sin memo: {(time.perf_counter() - start) / iterations * 1e6:.2f}µs")
+    start = time.perf_counter()
+    for _ in range(iterations):
+        db.lookup(test_macs[0])
+    print(f"[OUI] Búsqueda memorizada: {(time.perf_counter() - start) / iterations * 1e6:.2f}µs")
@@ -0,0 +1,264 @@
+import time
+import heapq
+import queue
+import random
+import socket
+import struct
+import threading
+import ipaddress
+
+from reply_listener import (_checksum, _attach_filter, BPF_LDX_B_MSH, BPF_LD_B_IND, BPF_LD_H_IND,
+                            BPF_JEQ_K, BPF_RET_K, ICMP_ECHO_REPLY, ICMP_ECHO_REQUEST)
+from event_log import events
+
+ICMP_TIME_EXCEEDED = 11
+TTL_BITS = 6  # El número de secuencia lleva el TTL en los 6 bits bajos y el destino en los altos
+
+
+class PathDiscovery:
+    def __init__(self, max_ttl=16, timeout=1.0, batch_size=16, cache_ttl=600,
+                 prefix_v4=24, on_path=None, max_prefixes=4096):
+        """
+        Descubrimiento de rutas con todos los TTL en paralelo.
+
+        En vez de un traceroute salto a salto, se envían a la vez ecos con TTL 1..max_ttl
+        a cada destino y se recogen en una sola ventana de recepción los Time Exceeded de
+        los routers y el eco del destino (el menor TTL que obtiene eco es la distancia).
+        La ruta se guarda por prefijo de destino: los hosts que comparten prefijo se
+        trazan una sola vez, con un coste de un RTT por prefijo nuevo.
+
+        Args:
+            max_ttl (int): Saltos máximos a sondear (hasta 63)
+            timeout (float): Ventana de recepción de cada lote en segundos
+            batch_size (int): Prefijos trazados a la vez en una misma ventana
+            cache_ttl (float): Segundos que una ruta se considera válida
+            prefix_v4 (int): Longitud del prefijo IPv4 que comparte ruta
+            on_path (callable): Función (prefijo, ruta) llamada al completar cada traza
+            max_prefixes (int): Rutas guardadas como máximo (prune() descarta las más antiguas)
+
+        Raises:
+            OSError: Si no hay permisos para sockets raw
+        """
+        self.max_ttl = min(max_ttl, (1 << TTL_BITS) - 1)
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.cache_ttl = cache_ttl
+        self.prefix_v4 = prefix_v4
+        self.on_path = on_path
+        self.max_prefixes = max_prefixes
+
+        self.ident = random.randint(0, 0xFFFF)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+        self._filter = _attach_filter(self.sock, [
+            (BPF_LDX_B_MSH, 0, 0, 0),                  # X = longitud de cabecera IP
+            (BPF_LD_B_IND, 0, 0, 0),                   # A = tipo ICMP
+            (BPF_JEQ_K, 0, 2, ICMP_ECHO_REPLY),
+            (BPF_LD_H_IND, 0, 0, 4),                   # A = identificador
+            (BPF_JEQ_K, 1, 2, self.ident),
+            (BPF_JEQ_K, 0, 1, ICMP_TIME_EXCEEDED),
+            (BPF_RET_K, 0, 0, 0xFFFF),                 # Aceptar
+            (BPF_RET_K, 0, 0, 0),                      # Descartar
+        ])
+
+        self.cache = {}  # prefijo -> {hops, routers, last_hop, traced_at}
+        self.cache_lock = threading.Lock()
+        self.pending = set()
+        self.requests = queue.Queue()
+        self.running = True
+        self.traces = 0
+        self.thread = threading.Thread(target=self._worker, daemon=True)
+        self.thread.start()
+
+    def prefix_of(self, ip):
+        """
+        Prefijo de destino que comparte ruta con la IP (None para IPv6, no soportado)
+        """
+        if ":" in ip:
+            return None
+        return str(ipaddress.ip_network(f"{ip}/{self.prefix_v4}", strict=False))
+
+    def lookup(self, ip):
+        """
+        Ruta ya conocida hacia la IP, sin trazar (una consulta de diccionario)
+
+        Returns:
+            dict: {hops, routers, last_hop, traced_at}, o None si no se conoce
+        """
+        prefix = self.prefix_of(ip)
+        return self.cache.get(prefix) if prefix else None
+
+    def request(self, ip):
+        """
+        Pide trazar la ruta hacia la IP si su prefijo no está en caché (no bloquea)
+        """
+        prefix = self.prefix_of(ip)
+        if prefix is None:
+            return
+        with self.cache_lock:
+            entry = self.cache.get(prefix)
+            if entry is not None and time.time() - entry['traced_at'] < self.cache_ttl:
+                return
+            if prefix in self.pending:
+                return
+            self.pending.add(prefix)
+        self.requests.put((prefix, ip))
+
+    def _worker(self):
+        while self.running:
+            try:
+                batch = [self.requests.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.requests.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                results = self.trace_many([ip for _, ip in batch])
+            except OSError as e:
+                events.warning("PATH", f"Error trazando {len(batch)} prefijos: {e}")
+                results = {}
+            now = time.time()
+            for prefix, ip in batch:
+                path = results.get(ip) or {'hops': None, 'routers': [], 'last_hop': None}
+                path['traced_at'] = now
+                with self.cache_lock:
+                    self.cache[prefix] = path
+                    self.pending.discard(prefix)
+                events.info("PATH", f"{prefix}: {path['hops'] or '?'} saltos"
+                                    + (f" vía {path['last_hop']}" if path['last_hop'] else ""),
+                            prefix=prefix, hops=path['hops'], last_hop=path['last_hop'])
+                if self.on_path is not None:
+                    self.on_path(prefix, path)
+
+    def trace_many(self, targets):
+        """
+        Traza varios destinos a la vez: todos los TTL de todos los destinos se envían
+        seguidos y las respuestas se recogen en una única ventana
+
+        Args:
+            targets (list): IPs destino (IPv4)
+
+        Returns:
+            dict: {ip: {hops, routers, last_hop}}
+        """
+        slots = targets[:(1 << (16 - TTL_BITS))]
+        routers = [dict() for _ in slots]      # ttl -> router que respondió
+        reached = [None for _ in slots]        # menor TTL que obtuvo eco del destino
+        payload = b"icmp-radar-path".ljust(16, b"\x00")
+
+        for slot, ip in enumerate(slots):
+            for ttl in range(1, self.max_ttl + 1):
+                seq = (slot << TTL_BITS) | ttl
+                header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, self.ident, seq)
+                checksum = _checksum(header + payload)
+                packet = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum, self.ident, seq) + payload
+                self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_TTL, ttl)
+                self.sock.sendto(packet, (ip, 0))
+        self.traces += len(slots)
+
+        deadline = time.monotonic() + self.timeout
+        outstanding = len(slots)
+        while outstanding and time.monotonic() < deadline:
+            self.sock.settimeout(max(deadline - time.monotonic(), 0.001))
+            try:
+                data, (src, _) = self.sock.recvfrom(65535)
+            except socket.timeout:
+                break
+            ihl = (data[0] & 0x0F) * 4
+            if len(data) < ihl + 8:
+                continue
+            icmp_type = data[ihl]
+            if icmp_type == ICMP_ECHO_REPLY:
+                ident, seq = struct.unpack("!HH", data[ihl + 4:ihl + 8])
+            else:
+                # Time Exceeded: la cabecera original va citada tras los 8 bytes del error
+                inner = ihl + 8
+                if len(data) < inner + 1:
+                    continue
+                inner_icmp = inner + (data[inner] & 0x0F) * 4
+                if len(data) < inner_icmp + 8:
+                    continue
+                ident, seq = struct.unpack("!HH", data[inner_icmp + 4:inner_icmp + 8])
+            if ident != self.ident:
+                continue
+            slot, ttl = seq >> TTL_BITS, seq & ((1 << TTL_BITS) - 1)
+            if slot >= len(slots):
+                continue
+
+            if icmp_type == ICMP_ECHO_REPLY:
+                if src == slots[slot] and (reached[slot] is None or ttl < reached[slot]):
+                    reached[slot] = ttl
+            else:
+                routers[slot][ttl] = src
+
+            # Un destino está completo cuando se conoce su distancia y todos los saltos previos
+            outstanding = sum(1 for i in range(len(slots))
+                              if reached[i] is None or len(routers[i]) < reached[i] - 1)
+
+        results = {}
+        for slot, ip in enumerate(slots):
+            hops = reached[slot]
+            limit = hops - 1 if hops else max(routers[slot], default=0)
+            path = [routers[slot].get(ttl) for ttl in range(1, limit + 1)]
+            results[ip] = {
+                'hops': hops,
+                'routers': path,
+                'last_hop': next((r for r in reversed(path) if r), None)
+            }
+        return results
+
+    def prune(self, now=None):
+        """
+        Descarta las rutas caducadas (se volverán a trazar al pedirlas) y, si se
+        supera max_prefixes, las trazadas hace más tiempo
+
+        Returns:
+            int: Rutas descartadas
+        """
+        now = now or time.time()
+        with self.cache_lock:
+            expired = [p for p, entry in self.cache.items() if now - entry['traced_at'] > self.cache_ttl]
+            excess = len(self.cache) - len(expired) - self.max_prefixes
+            if excess > 0:
+                alive = ((entry['traced_at'], p) for p, entry in self.cache.items()
+                         if now - entry['traced_at'] <= self.cache_ttl)
+                expired.extend(p for _, p in heapq.nsmallest(excess, alive))
+            for prefix in expired:
+                del self.cache[prefix]
+        return len(expired)
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: {prefixes, pending, traces}
+        """
+        return {'prefixes': len(self.cache), 'pending': len(self.pending), 'traces': self.traces}
+
+    def close(self):
+        """
+        Detiene el thread de trazado y cierra el socket
+        """
+        self.running = False
+        self.thread.join(timeout=1)
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    # Ejemplo: trazar uno o varios destinos en una sola ventana
+    import sys
+
+    tracer = PathDiscovery()
+    targets = sys.argv[1:] or ["8.8.8.8"]
+    start = time.perf_counter()
+    results = tracer.trace_many(targets)
+    elapsed = (time.perf_counter() - start) * 1000
+    for ip, path in results.items():
+        hops = " -> ".join(r or "*" for r in path['routers'])
+        print(f"{ip}: {path['hops'] or '?'} saltos  [{hops}]")
+    print(f"[PATH] {len(targets)} destinos trazados en {elapsed:.0f}ms")
+    tracer.close()
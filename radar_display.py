@@ -1,7 +1,202 @@
 import pygame
 import math
 import time
+from collections import OrderedDict, defaultdict
 from typing import Dict, Tuple
+from oui_lookup import OUIDatabase
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:  # Sin NumPy se usa el dibujado host a host
+    np = None
+    HAS_NUMPY = False
+
+class TextCache:
+    def __init__(self, max_entries=512):
+        """
+        Cache LRU acotada de superficies de texto renderizadas
+        
+        Args:
+            max_entries (int): Número máximo de superficies guardadas
+        """
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def render(self, font, text, color):
+        """
+        Devuelve la superficie de texto, renderizándola solo si no está en cache
+        
+        Args:
+            font (pygame.font.Font): Fuente a usar
+            text (str): Texto a renderizar
+            color (tuple): Color RGB del texto
+            
+        Returns:
+            pygame.Surface: Superficie con el texto (compartida, no modificar)
+        """
+        key = (font, text, color)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surface
+        
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self.entries[key] = surface
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)  # Descartar la menos usada
+        return surface
+    
+    def clear(self):
+        """
+        Vacía la cache (las estadísticas se conservan)
+        """
+        self.entries.clear()
+    
+    def get_stats(self):
+        """
+        Retorna estadísticas de uso de la cache
+        
+        Returns:
+            dict: {entries, max_entries, hits, misses, hit_ratio}
+        """
+        total = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0
+        }
+
+class SpatialGrid:
+    def __init__(self, cell_size=50):
+        """
+        Índice espacial de rejilla uniforme para buscar hosts por posición
+        
+        Args:
+            cell_size (int): Lado de cada celda en píxeles
+        """
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+    
+    def rebuild(self, positions):
+        """
+        Reconstruye el índice a partir de las posiciones de los hosts
+        
+        Args:
+            positions (dict): {ip: {'x', 'y', 'radius', ...}} (como host_positions)
+        """
+        self.cells.clear()
+        cell_size = self.cell_size
+        for ip, pos_info in positions.items():
+            cell = (pos_info['x'] // cell_size, pos_info['y'] // cell_size)
+            self.cells[cell].append((ip, pos_info))
+    
+    def query(self, x, y, distance):
+        """
+        Busca los hosts a menos de `distance` píxeles de (x, y)
+        
+        Args:
+            x (int): Coordenada X
+            y (int): Coordenada Y
+            distance (float): Distancia máxima en píxeles
+            
+        Returns:
+            list: Tuplas (distancia², ip, pos_info) de los hosts encontrados
+        """
+        cell_size = self.cell_size
+        max_dist_sq = distance * distance
+        found = []
+        for cx in range(int(x - distance) // cell_size, int(x + distance) // cell_size + 1):
+            for cy in range(int(y - distance) // cell_size, int(y + distance) // cell_size + 1):
+                for ip, pos_info in self.cells.get((cx, cy), ()):
+                    dist_sq = (x - pos_info['x']) ** 2 + (y - pos_info['y']) ** 2
+                    if dist_sq <= max_dist_sq:
+                        found.append((dist_sq, ip, pos_info))
+        return found
+
+class HostClusterIndex:
+    def __init__(self, sector_degrees=10, band_ms=10, max_latency_ms=100):
+        """
+        Agregados incrementales de hosts por sector angular y banda de latencia
+        
+        Args:
+            sector_degrees (int): Ancho de cada sector angular en grados
+            band_ms (int): Ancho de cada banda de latencia en ms
+            max_latency_ms (int): Latencia a partir de la cual todo cae en la última banda
+        """
+        self.sector_degrees = sector_degrees
+        self.band_ms = band_ms
+        self.max_latency_ms = max_latency_ms
+        self.hosts = {}  # ip -> (ángulo, latencia, clave del cluster, saltos)
+        self.clusters = {}  # (sector, banda) -> {'members': set, 'latency_sum': float, 'hops': int}
+        self.dirty_keys = set()  # Clusters modificados desde el último dibujado
+    
+    def _key(self, angle, latency_ms, hops=None):
+        sector = int((angle % 360) // self.sector_degrees)
+        if hops is not None:
+            return (sector, -hops)  # Agrupar por anillo de saltos (bandas negativas)
+        band = int(min(latency_ms, self.max_latency_ms) // self.band_ms)
+        return (sector, band)
+    
+    def update_host(self, ip, angle, latency_ms, hops=None):
+        """
+        Añade o actualiza un host, ajustando solo los clusters afectados
+        
+        Args:
+            hops (int): Si se indica, el host se agrupa por saltos en vez de por latencia
+        """
+        self.remove_host(ip)
+        key = self._key(angle, latency_ms, hops)
+        cluster = self.clusters.get(key)
+        if cluster is None:
+            cluster = self.clusters[key] = {'members': set(), 'latency_sum': 0.0, 'hops': hops}
+        cluster['members'].add(ip)
+        cluster['latency_sum'] += latency_ms
+        self.hosts[ip] = (angle, latency_ms, key, hops)
+        self.dirty_keys.add(key)
+    
+    def remove_host(self, ip):
+        """
+        Quita un host de su cluster (no hace nada si no estaba)
+        """
+        entry = self.hosts.pop(ip, None)
+        if entry is None:
+            return
+        key = entry[2]
+        cluster = self.clusters[key]
+        cluster['members'].discard(ip)
+        cluster['latency_sum'] -= entry[1]
+        if not cluster['members']:
+            del self.clusters[key]
+        self.dirty_keys.add(key)
+    
+    def set_sector_degrees(self, sector_degrees):
+        """
+        Cambia la granularidad angular (zoom) reagrupando todos los hosts
+        """
+        if sector_degrees == self.sector_degrees:
+            return
+        self.sector_degrees = sector_degrees
+        hosts = self.hosts
+        self.hosts = {}
+        self.clusters = {}
+        for ip, (angle, latency_ms, _, hops) in hosts.items():
+            self.update_host(ip, angle, latency_ms, hops)
+    
+    def get_cluster_summary(self, key):
+        """
+        Returns:
+            tuple: (número de hosts, latencia media en ms) del cluster
+        """
+        cluster = self.clusters[key]
+        count = len(cluster['members'])
+        return count, cluster['latency_sum'] / count
 
 class RadarDisplay:
     def __init__(self, width=800, height=600):
@@ -16,7 +211,7 @@ class RadarDisplay:
         
         self.width = width
         self.height = height
-        self.screen = pygame.display.set_mode((width, height))
+        self.screen = pygame.display.set_mode((width, height), pygame.RESIZABLE)
         pygame.display.set_caption("ICMP Radar - Descubrimiento de Red")
         
         # Centro del radar
@@ -36,63 +231,234 @@ class RadarDisplay:
         
         # Variables de animación
         self.sweep_angle = 0
-        self.sweep_speed = 2  # Grados por frame
+        self.sweep_speed = 2  # Grados por frame a 60 FPS (el barrido avanza según el tiempo real)
         self.last_sweep_time = time.time()
         
         # Fuentes
         self.font_small = pygame.font.Font(None, 24)
         self.font_medium = pygame.font.Font(None, 32)
         self.font_large = pygame.font.Font(None, 48)
+        self.text_cache = TextCache(max_entries=512)
+        
+        # Fabricantes por OUI (registro IEEE cargado en segundo plano)
+        self.vendor_db = OUIDatabase()
+        self.vendor_db.preload_async()
         
         # Efectos visuales
         self.sweep_trail = []  # Para el efecto de estela del barrido
-        self.host_pulses = {}  # Para el efecto de pulso en hosts detectados
+        self.host_pulses = {}  # Para el efecto de pulso en hosts detectados (solo hosts activos)
         self.host_positions = {}  # Para tracking de posiciones de hosts (hover)
+        self.label_distance = 50  # Distancia del mouse a la que se muestran etiquetas
+        self.host_index = SpatialGrid(cell_size=self.label_distance)
         
         # Sistema de hover
         self.mouse_pos = (0, 0)
         self.hovered_host = None
+        self.input_pending = False  # Hubo eventos de entrada desde el último frame
         
         # Clock para controlar FPS
         self.clock = pygame.time.Clock()
         
-        # Cache para optimización
-        self.last_hosts_hash = None
-        self.cached_surface = None
+        # Cache para optimización (capas pre-renderizadas y rectángulos sucios)
+        self.last_hosts_snapshot = None  # {ip: (ángulo, latencia, saltos)} de lo dibujado
+        self.last_hosts_source = None  # Tabla de la que sale el resumen
+        self.force_recompose = True  # Recomponer la capa de hosts aunque no cambien
+        self.cached_surface = None  # Fondo + cuadrícula (estático)
+        self.hosts_layer = None  # Fondo + hosts + leyenda (cambia solo con los hosts)
+        self.legend_surface = None
+        self.info_panel_surface = None
+        self.info_panel_rect = None
+        self.latency_panel_surface = None
+        self.latency_panel_rect = None
+        self.show_latency_panel = True  # Panel de cuantiles de latencia (tecla P)
+        self.latency_panel_subnets = 3  # Subredes con peor p99 que se listan
+        self.overlay_rects = []  # Regiones dibujadas encima de la capa en el último frame
+        self.needs_full_redraw = True
+        self.max_dirty_rects = 64  # Por encima de esto se actualiza la pantalla completa
+        self.sweep_segments = 8  # Segmentos en los que se divide la línea de barrido
+        
+        # Dibujado masivo con NumPy (a partir de cierto número de hosts)
+        self.bulk_render_threshold = 200
+        self.dot_radius = 5
+        self.dot_sprites = []  # Sprites pre-renderizados por clase de latencia
+        self.angle_lut_steps = 3600  # Resolución de 0.1°
+        
+        # Nivel de detalle: agrupar hosts en clusters con redes muy grandes
+        self.lod_mode = "auto"  # "auto", "on" u "off" (tecla L)
+        self.lod_threshold = 2000  # Hosts a partir de los cuales "auto" agrupa
+        self.lod_sector_levels = [15, 10, 5, 2]  # Grados por sector en cada nivel de zoom
+        self.lod_level = 1
+        self.cluster_index = HostClusterIndex(sector_degrees=self.lod_sector_levels[self.lod_level])
+        self.cluster_positions = {}  # (sector, banda) -> posición y tamaño del glifo
+        self.cluster_grid = SpatialGrid(cell_size=self.label_distance)
+        self.lod_drawn = False  # Si la capa actual muestra clusters
+        self.expanded_cluster = None  # Cluster desplegado por hover
+        self.expanded_stale = False  # Sus miembros cambiaron y hay que recolocarlos
+        self.max_expanded_hosts = 500
+        
+        # Radio según latencia o según saltos de red (anillos por salto, tecla H)
+        self.radius_mode = "latency"  # "latency" o "hops"
+        self.max_hop_rings = 8  # Hosts más lejanos comparten el último anillo
+        if HAS_NUMPY:
+            lut_angles = np.radians(np.arange(self.angle_lut_steps) * (360.0 / self.angle_lut_steps))
+            self.cos_lut = np.cos(lut_angles)
+            self.sin_lut = np.sin(lut_angles)
+        
+        self._build_static_layers()
+    
+    def _build_static_layers(self):
+        """
+        Pre-renderiza las capas estáticas (cuadrícula, leyenda y fondo del panel).
+        Solo se ejecuta al iniciar y cuando cambia el tamaño de la ventana.
+        """
+        self.cached_surface = pygame.Surface((self.width, self.height)).convert()
+        self.cached_surface.fill(self.BLACK)
+        self.draw_radar_grid(self.cached_surface)
+        
+        self.legend_surface = self._render_legend()
+        
+        # Sprites de punto para el dibujado masivo (verde, amarillo, rojo)
+        size = self.dot_radius * 2 + 1
+        self.dot_sprites = []
+        for color in (self.GREEN, self.YELLOW, self.RED):
+            sprite = pygame.Surface((size, size)).convert()
+            sprite.fill(self.BLACK)
+            sprite.set_colorkey(self.BLACK)
+            pygame.draw.circle(sprite, color, (self.dot_radius, self.dot_radius), self.dot_radius)
+            self.dot_sprites.append(sprite)
+        
+        # Fondo y borde del panel de información (el texto se dibuja por frame)
+        panel_width = 250
+        panel_height = 120
+        self.info_panel_rect = pygame.Rect(self.width - panel_width - 10, 10,
+                                           panel_width, panel_height)
+        self.info_panel_surface = pygame.Surface((panel_width, panel_height), pygame.SRCALPHA)
+        self.info_panel_surface.fill((0, 0, 0, 180))
+        pygame.draw.rect(self.info_panel_surface, self.GREEN,
+                        (0, 0, panel_width, panel_height), 2)
+        
+        # Panel de latencia bajo el de información (cabecera + p50/p99/pérdida + subredes)
+        latency_height = 20 + (4 + self.latency_panel_subnets) * 20
+        self.latency_panel_rect = pygame.Rect(self.info_panel_rect.x, self.info_panel_rect.bottom + 10,
+                                              panel_width, latency_height)
+        self.latency_panel_surface = pygame.Surface((panel_width, latency_height), pygame.SRCALPHA)
+        self.latency_panel_surface.fill((0, 0, 0, 180))
+        pygame.draw.rect(self.latency_panel_surface, self.GREEN,
+                        (0, 0, panel_width, latency_height), 2)
+        
+        # La capa de hosts parte del fondo estático; se rellena en _rebuild_hosts_layer
+        self.hosts_layer = self.cached_surface.copy()
+        self.draw_legend(self.hosts_layer)
+        
+        self.force_recompose = True
+        self.overlay_rects = []
+        self.needs_full_redraw = True
+    
+    def resize(self, width, height):
+        """
+        Ajusta el radar a un nuevo tamaño de ventana y regenera las capas estáticas
+        
+        Args:
+            width (int): Nuevo ancho de la ventana
+            height (int): Nuevo alto de la ventana
+        """
+        self.width = width
+        self.height = height
+        self.screen = pygame.display.set_mode((width, height), pygame.RESIZABLE)
+        
+        self.center_x = width // 2
+        self.center_y = height // 2
+        self.max_radius = min(width, height) // 2 - 50
+        
+        # Las posiciones guardadas ya no son válidas con el nuevo centro/radio
+        self.host_positions.clear()
+        self.host_index.rebuild(self.host_positions)
+        self._build_static_layers()
         
-    def draw_radar_grid(self):
+    def draw_radar_grid(self, surface=None):
         """
         Dibuja la cuadrícula circular del radar
+        
+        Args:
+            surface (pygame.Surface): Superficie destino (por defecto la pantalla)
         """
+        if surface is None:
+            surface = self.screen
+        
         # Círculos concéntricos
         for i in range(1, 5):
             radius = (self.max_radius * i) // 4
-            pygame.draw.circle(self.screen, self.DARK_GREEN, 
+            pygame.draw.circle(surface, self.DARK_GREEN, 
                              (self.center_x, self.center_y), radius, 1)
         
+        # En modo saltos, límite interior de cada anillo con su número de saltos
+        if self.radius_mode == "hops":
+            for hops in range(1, self.max_hop_rings + 1):
+                radius = self.host_radius(0, hops)
+                pygame.draw.circle(surface, self.GRAY, (self.center_x, self.center_y), radius, 1)
+                label = f"{hops}+" if hops == self.max_hop_rings else str(hops)
+                text_surface = self.text_cache.render(self.font_small, label, self.GRAY)
+                surface.blit(text_surface, (self.center_x + 3, self.center_y - radius - 16))
+        
         # Líneas radiales (cada 30 grados)
         for angle in range(0, 360, 30):
             end_x = self.center_x + self.max_radius * math.cos(math.radians(angle))
             end_y = self.center_y + self.max_radius * math.sin(math.radians(angle))
-            pygame.draw.line(self.screen, self.DARK_GREEN,
+            pygame.draw.line(surface, self.DARK_GREEN,
                            (self.center_x, self.center_y), (end_x, end_y), 1)
         
         # Círculo exterior
-        pygame.draw.circle(self.screen, self.GREEN, 
+        pygame.draw.circle(surface, self.GREEN, 
                          (self.center_x, self.center_y), self.max_radius, 2)
     
     def draw_sweep_line(self):
         """
         Versión optimizada de la línea de barrido (sin estela para mejor rendimiento)
+        
+        Returns:
+            list: Rectángulos de pantalla que ocupa la línea
         """
-        # Actualizar ángulo de barrido
-        self.sweep_angle = (self.sweep_angle + self.sweep_speed) % 360
+        # Actualizar ángulo de barrido según el tiempo transcurrido, no por frame,
+        # para que la velocidad no dependa de la tasa de refresco
+        now = time.time()
+        elapsed = now - self.last_sweep_time
+        self.last_sweep_time = now
+        self.sweep_angle = (self.sweep_angle + self.sweep_speed * 60 * elapsed) % 360
         
         # Solo dibujar línea principal (sin estela para mejor rendimiento)
         end_x = self.center_x + self.max_radius * math.cos(math.radians(self.sweep_angle))
         end_y = self.center_y + self.max_radius * math.sin(math.radians(self.sweep_angle))
         pygame.draw.line(self.screen, self.BRIGHT_GREEN,
                         (self.center_x, self.center_y), (end_x, end_y), 2)
+        
+        return self._line_rects((self.center_x, self.center_y), (end_x, end_y), 2)
+    
+    def _line_rects(self, start, end, width):
+        """
+        Cubre una línea con varios rectángulos pequeños en lugar de uno solo
+        (una línea diagonal tendría una caja envolvente enorme)
+        
+        Args:
+            start (tuple): Punto inicial (x, y)
+            end (tuple): Punto final (x, y)
+            width (int): Grosor de la línea en píxeles
+            
+        Returns:
+            list: Lista de pygame.Rect que cubren la línea
+        """
+        rects = []
+        segments = self.sweep_segments
+        dx = (end[0] - start[0]) / segments
+        dy = (end[1] - start[1]) / segments
+        for i in range(segments):
+            x0 = start[0] + dx * i
+            y0 = start[1] + dy * i
+            x1 = x0 + dx
+            y1 = y0 + dy
+            rect = pygame.Rect(int(min(x0, x1)), int(min(y0, y1)),
+                               int(abs(x1 - x0)) + 1, int(abs(y1 - y0)) + 1)
+            rects.append(rect.inflate(width * 2 + 2, width * 2 + 2))
+        return rects
     
     def latency_to_radius(self, latency_ms):
         """
@@ -113,6 +479,38 @@ class RadarDisplay:
         
         return int(min_radius + (max_radius - min_radius) * normalized_latency)
     
+    def host_radius(self, latency_ms, hops=None):
+        """
+        Radio de un host según el modo: por latencia, o en modo "hops" un anillo
+        por salto de red (dentro del anillo, más afuera cuanto más latencia)
+        
+        Args:
+            latency_ms (float): Latencia en milisegundos
+            hops (int): Saltos hasta el host, si se conocen
+            
+        Returns:
+            int: Radio en píxeles desde el centro
+        """
+        if self.radius_mode != "hops" or not hops:
+            return self.latency_to_radius(latency_ms)
+        min_radius = self.max_radius * 0.2
+        max_radius = self.max_radius * 0.9
+        ring = min(hops, self.max_hop_rings) - 1
+        fraction = (ring + 0.8 * min(latency_ms / 100.0, 1.0)) / self.max_hop_rings
+        return int(min_radius + (max_radius - min_radius) * fraction)
+    
+    def toggle_radius_mode(self):
+        """
+        Alterna el radio entre latencia y saltos de red, recomponiendo capas y clusters
+        """
+        self.radius_mode = "hops" if self.radius_mode == "latency" else "latency"
+        # Todos los hosts se reagregan en el próximo frame (recomposición forzada)
+        self.cluster_index.hosts = {}
+        self.cluster_index.clusters = {}
+        self.cluster_positions = {}
+        self.host_positions.clear()
+        self._build_static_layers()
+    
     def get_host_byte(self, ip):
         """
         Extrae solo el último byte de la IP para mostrar
@@ -121,10 +519,26 @@ class RadarDisplay:
             ip (str): Dirección IP completa
             
         Returns:
-            str: Último octeto de la IP (ej: "157" de "192.168.20.157")
+            str: Último octeto de la IP (ej: "157" de "192.168.20.157"),
+                o último grupo si es IPv6 (ej: "3e1f" de "fe80::a00:27ff:fe4e:3e1f")
         """
+        if ':' in ip:
+            return ip.split(':')[-1]
         return ip.split('.')[-1]
     
+    def get_host_label(self, ip):
+        """
+        Etiqueta compacta del host para el radar
+        
+        Args:
+            ip (str): Dirección IP completa
+            
+        Returns:
+            str: ".157" para IPv4, ":3e1f" para IPv6
+        """
+        separator = ':' if ':' in ip else '.'
+        return f"{separator}{self.get_host_byte(ip)}"
+    
     def get_device_info(self, ip, mac_address=None):
         """
         Determina el tipo de dispositivo basado en IP y MAC
@@ -144,22 +558,10 @@ class RadarDisplay:
         elif host_byte in ["254", "253", "252"]:
             return ("Router", "Network Device")
         elif mac_address:
-            # Identificar por OUI (primeros 3 bytes de MAC)
-            oui = mac_address[:8].upper()
-            oui_map = {
-                "14:82:5B": ("TP-Link", "Router/AP"),
-                "58:6C:25": ("Intel", "PC/Laptop"),
-                "B4:B0:24": ("Samsung", "Phone/Tablet"),
-                "C0:95:6D": ("Apple", "iPhone/iPad"),
-                "18:83:BF": ("Xiaomi", "Phone/IoT"),
-                "42:11:9E": ("Random", "Virtual Device"),
-                "5E:55:48": ("Random", "Virtual Device"),
-                "0A:1B:E2": ("Random", "Virtual Device"),
-                "06:18:8F": ("Random", "Virtual Device")
-            }
-            
-            if oui in oui_map:
-                return oui_map[oui]
+            # Identificar por OUI (registro IEEE, resultado memorizado por MAC)
+            vendor_info = self.vendor_db.lookup(mac_address)
+            if vendor_info:
+                return vendor_info
         
         # Fallback genérico
         return (f"Host-{host_byte}", "Network Device")
@@ -205,12 +607,11 @@ class RadarDisplay:
         pygame.draw.circle(self.screen, self.WHITE, (int(x), int(y)), pulse_size, 2)
         
         # Etiqueta compacta con solo el byte de host
-        host_byte = self.get_host_byte(ip)
-        label = f".{host_byte}\n{latency_ms:.0f}ms"  # Sin decimales para ser más compacto
+        label = f"{self.get_host_label(ip)}\n{latency_ms:.0f}ms"  # Sin decimales para ser más compacto
         lines = label.split('\n')
         
         for i, line in enumerate(lines):
-            text_surface = self.font_small.render(line, True, self.WHITE)
+            text_surface = self.text_cache.render(self.font_small, line, self.WHITE)
             text_rect = text_surface.get_rect()
             text_rect.centerx = int(x)
             text_rect.centery = int(y) + 12 + (i * 16)  # Más compacto
@@ -230,18 +631,26 @@ class RadarDisplay:
             'latency': latency_ms
         }
     
-    def draw_host_optimized(self, ip, angle, latency_ms, is_recently_detected=False, mac_address=None):
+    def draw_host_optimized(self, ip, angle, latency_ms, is_recently_detected=False, mac_address=None,
+                            surface=None, hops=None):
         """
-        Versión optimizada de draw_host con menos operaciones gráficas
+        Versión optimizada de draw_host con menos operaciones gráficas.
+        La etiqueta se dibuja aparte (draw_host_label) porque depende del mouse.
+        
+        Returns:
+            pygame.Rect: Región ocupada por el punto del host
         """
-        radius = self.latency_to_radius(latency_ms)
+        if surface is None:
+            surface = self.screen
+        
+        radius = self.host_radius(latency_ms, hops)
         
         # Calcular posición
         x = self.center_x + radius * math.cos(math.radians(angle))
         y = self.center_y + radius * math.sin(math.radians(angle))
         
         # Tamaño simplificado (sin pulso para mejor rendimiento)
-        pulse_size = 5
+        pulse_size = self.dot_radius
         
         # Color basado en latencia
         if latency_ms < 10:
@@ -252,17 +661,7 @@ class RadarDisplay:
             color = self.RED
         
         # Dibujar solo el punto principal (sin borde para mejor rendimiento)
-        pygame.draw.circle(self.screen, color, (int(x), int(y)), pulse_size)
-        
-        # Etiqueta simplificada (solo si está cerca del mouse para mejor rendimiento)
-        mouse_distance = math.sqrt((self.mouse_pos[0] - x)**2 + (self.mouse_pos[1] - y)**2)
-        if mouse_distance < 50:  # Solo mostrar etiqueta si mouse está cerca
-            host_byte = self.get_host_byte(ip)
-            text_surface = self.font_small.render(f".{host_byte}", True, self.WHITE)
-            text_rect = text_surface.get_rect()
-            text_rect.centerx = int(x)
-            text_rect.centery = int(y) + 12
-            self.screen.blit(text_surface, text_rect)
+        pygame.draw.circle(surface, color, (int(x), int(y)), pulse_size)
         
         # Guardar información del host para hover
         self.host_positions[ip] = {
@@ -272,6 +671,90 @@ class RadarDisplay:
             'mac': mac_address,
             'latency': latency_ms
         }
+        
+        return self._host_rect(ip)
+    
+    def draw_hosts_bulk(self, active_hosts, learned_macs, surface):
+        """
+        Dibuja todos los hosts de una vez: posiciones y colores se calculan con
+        NumPy en una sola pasada y los puntos se copian con un único blits().
+        
+        Args:
+            active_hosts (dict): Diccionario de hosts activos
+            learned_macs (dict): Diccionario de MACs aprendidas
+            surface (pygame.Surface): Superficie destino
+        """
+        ips = list(active_hosts)
+        count = len(ips)
+        infos = [active_hosts[ip] for ip in ips]
+        angles = np.fromiter((info['angle'] for info in infos), dtype=np.float64, count=count)
+        latencies = np.fromiter((info['latency'] for info in infos), dtype=np.float64, count=count)
+        
+        # Mismo mapeo que host_radius, vectorizado
+        min_radius = self.max_radius * 0.2
+        max_radius = self.max_radius * 0.9
+        normalized = np.minimum(latencies / 100.0, 1.0)
+        if self.radius_mode == "hops":
+            hops = np.fromiter((info.get('hops') or 0 for info in infos), dtype=np.float64, count=count)
+            rings = self.max_hop_rings
+            by_hops = (np.minimum(hops, rings) - 1 + 0.8 * normalized) / rings
+            normalized = np.where(hops > 0, by_hops, normalized)
+        radii = (min_radius + (max_radius - min_radius) * normalized).astype(np.int64)
+        
+        # Polar -> pantalla usando la tabla de senos/cosenos precalculada
+        steps = self.angle_lut_steps
+        lut_index = np.rint(angles * (steps / 360.0)).astype(np.int64) % steps
+        xs = (self.center_x + radii * self.cos_lut[lut_index]).astype(np.int64)
+        ys = (self.center_y + radii * self.sin_lut[lut_index]).astype(np.int64)
+        
+        # Clase de color: 0 = < 10ms, 1 = 10-50ms, 2 = > 50ms
+        color_classes = np.digitize(latencies, (10.0, 50.0))
+        
+        offset = self.dot_radius
+        sprites = self.dot_sprites
+        xs_list = xs.tolist()
+        ys_list = ys.tolist()
+        surface.blits([(sprites[c], (x - offset, y - offset))
+                       for c, x, y in zip(color_classes.tolist(), xs_list, ys_list)],
+                      doreturn=False)
+        
+        # Guardar información de los hosts para hover
+        hover_radius = self.dot_radius + 5
+        for ip, x, y, latency in zip(ips, xs_list, ys_list, latencies.tolist()):
+            self.host_positions[ip] = {
+                'x': x,
+                'y': y,
+                'radius': hover_radius,
+                'mac': learned_macs.get(ip),
+                'latency': latency
+            }
+    
+    def _host_rect(self, ip):
+        """
+        Región de pantalla que ocupa el punto de un host ya dibujado
+        """
+        pos_info = self.host_positions[ip]
+        size = pos_info['radius'] - 4  # Radio del punto + 1px de margen
+        return pygame.Rect(pos_info['x'] - size, pos_info['y'] - size,
+                           size * 2 + 1, size * 2 + 1)
+    
+    def draw_host_label(self, ip):
+        """
+        Dibuja la etiqueta compacta (.157) de un host sobre la pantalla
+        
+        Args:
+            ip (str): Dirección IP del host (debe estar en host_positions)
+            
+        Returns:
+            pygame.Rect: Región ocupada por la etiqueta
+        """
+        pos_info = self.host_positions[ip]
+        text_surface = self.text_cache.render(self.font_small, self.get_host_label(ip), self.WHITE)
+        text_rect = text_surface.get_rect()
+        text_rect.centerx = pos_info['x']
+        text_rect.centery = pos_info['y'] + 12
+        self.screen.blit(text_surface, text_rect)
+        return text_rect
     
     def draw_info_panel(self, active_hosts_count, scan_status):
         """
@@ -280,52 +763,85 @@ class RadarDisplay:
         Args:
             active_hosts_count (int): Número de hosts activos
             scan_status (str): Estado del escaneo
+            
+        Returns:
+            pygame.Rect: Región ocupada por el panel
         """
-        # Panel de información
-        panel_width = 250
-        panel_height = 120
-        panel_x = self.width - panel_width - 10
-        panel_y = 10
-        
-        # Fondo del panel
-        panel_surface = pygame.Surface((panel_width, panel_height), pygame.SRCALPHA)
-        panel_surface.fill((0, 0, 0, 180))
-        self.screen.blit(panel_surface, (panel_x, panel_y))
-        
-        # Borde del panel
-        pygame.draw.rect(self.screen, self.GREEN, 
-                        (panel_x, panel_y, panel_width, panel_height), 2)
+        # Fondo y borde pre-renderizados
+        panel_x, panel_y = self.info_panel_rect.topleft
+        self.screen.blit(self.info_panel_surface, self.info_panel_rect)
         
         # Información
         info_lines = [
             "ICMP RADAR",
             f"Hosts Activos: {active_hosts_count}",
             f"Estado: {scan_status}",
-            f"Barrido: {self.sweep_angle:.0f}°"
+            # Ángulo en pasos de 5°: como mucho 72 textos distintos en la caché
+            f"Barrido: {int(self.sweep_angle) // 5 * 5}°"
         ]
         
         for i, line in enumerate(info_lines):
             font = self.font_medium if i == 0 else self.font_small
             color = self.BRIGHT_GREEN if i == 0 else self.WHITE
             
-            text_surface = font.render(line, True, color)
+            text_surface = self.text_cache.render(font, line, color)
             self.screen.blit(text_surface, (panel_x + 10, panel_y + 10 + i * 25))
+        
+        return self.info_panel_rect
     
-    def draw_legend(self):
+    def draw_latency_panel(self, latency_stats):
         """
-        Dibuja la leyenda del radar
+        Dibuja bajo el panel de información los cuantiles de latencia y la pérdida
+        de toda la red (último minuto y última hora) y las subredes con peor p99
+        
+        Args:
+            latency_stats (dict): Resultado de ICMPScanner.get_latency_stats()
+            
+        Returns:
+            pygame.Rect: Región ocupada por el panel
+        """
+        panel_x, panel_y = self.latency_panel_rect.topleft
+        self.screen.blit(self.latency_panel_surface, self.latency_panel_rect)
+        
+        def fmt_ms(value):
+            return f"{value:.1f}ms" if value is not None else "-"
+        
+        overall = latency_stats['global']
+        windows = list(overall)[:2]
+        rows = [("LATENCIA", windows, self.BRIGHT_GREEN)]
+        rows.append(("p50", [fmt_ms(overall[w]['p50']) for w in windows], self.WHITE))
+        rows.append(("p99", [fmt_ms(overall[w]['p99']) for w in windows], self.WHITE))
+        rows.append(("Pérdida", [f"{overall[w]['loss']:.1%}" for w in windows], self.WHITE))
+        
+        # Subredes con peor p99 en la ventana corta
+        short = windows[0]
+        ranked = sorted(((stats[short]['p99'], subnet, stats[short]['loss'])
+                         for subnet, stats in latency_stats['subnets'].items()
+                         if stats[short]['p99'] is not None), reverse=True)
+        for p99, subnet, loss in ranked[:self.latency_panel_subnets]:
+            rows.append((subnet, [fmt_ms(p99), f"{loss:.1%}"], self.GRAY))
+        
+        for i, (label, values, color) in enumerate(rows):
+            y = panel_y + 10 + i * 20
+            self.screen.blit(self.text_cache.render(self.font_small, label, color), (panel_x + 10, y))
+            for j, value in enumerate(values):
+                self.screen.blit(self.text_cache.render(self.font_small, value, color),
+                                 (panel_x + 140 + j * 55, y))
+        
+        return self.latency_panel_rect
+    
+    def _render_legend(self):
         """
-        legend_x = 10
-        legend_y = self.height - 100
+        Pre-renderiza la leyenda del radar en una superficie propia
         
-        # Fondo de la leyenda
+        Returns:
+            pygame.Surface: Leyenda lista para copiar (con transparencia)
+        """
         legend_surface = pygame.Surface((200, 90), pygame.SRCALPHA)
         legend_surface.fill((0, 0, 0, 180))
-        self.screen.blit(legend_surface, (legend_x, legend_y))
         
         # Borde
-        pygame.draw.rect(self.screen, self.GREEN, 
-                        (legend_x, legend_y, 200, 90), 2)
+        pygame.draw.rect(legend_surface, self.GREEN, (0, 0, 200, 90), 2)
         
         # Elementos de la leyenda
         legend_items = [
@@ -337,11 +853,23 @@ class RadarDisplay:
         
         for i, (text, color) in enumerate(legend_items):
             if color:
-                pygame.draw.circle(self.screen, color, 
-                                 (legend_x + 20, legend_y + 15 + i * 18), 6)
+                pygame.draw.circle(legend_surface, color, (20, 15 + i * 18), 6)
             
-            text_surface = self.font_small.render(text, True, self.WHITE)
-            self.screen.blit(text_surface, (legend_x + 35, legend_y + 10 + i * 18))
+            text_surface = self.text_cache.render(self.font_small, text, self.WHITE)
+            legend_surface.blit(text_surface, (35, 10 + i * 18))
+        
+        return legend_surface
+    
+    def draw_legend(self, surface=None):
+        """
+        Dibuja la leyenda del radar
+        
+        Args:
+            surface (pygame.Surface): Superficie destino (por defecto la pantalla)
+        """
+        if surface is None:
+            surface = self.screen
+        surface.blit(self.legend_surface, (10, self.height - 100))
     
     def check_hover(self, mouse_pos):
         """
@@ -353,23 +881,28 @@ class RadarDisplay:
         Returns:
             str: IP del host bajo el mouse, o None
         """
-        for ip, pos_info in self.host_positions.items():
-            distance = math.sqrt((mouse_pos[0] - pos_info['x'])**2 + 
-                               (mouse_pos[1] - pos_info['y'])**2)
-            if distance <= pos_info['radius']:
-                return ip
+        # Solo se revisan las celdas vecinas del índice espacial
+        candidates = self.host_index.query(mouse_pos[0], mouse_pos[1], self.label_distance)
+        hits = [(dist_sq, ip) for dist_sq, ip, pos_info in candidates
+                if dist_sq <= pos_info['radius'] ** 2]
+        if hits:
+            return min(hits)[1]  # El host más cercano al mouse
         return None
     
-    def draw_hover_info(self, ip, learned_macs):
+    def draw_hover_info(self, ip, learned_macs, host_info=None):
         """
         Dibuja información detallada del host en hover
         
         Args:
             ip (str): IP del host
             learned_macs (dict): Diccionario de MACs aprendidas
+            host_info (dict): Entrada del host en la tabla activa (opcional)
+            
+        Returns:
+            pygame.Rect: Región ocupada por el panel, o None si no se dibujó
         """
         if ip not in self.host_positions:
-            return
+            return None
             
         pos_info = self.host_positions[ip]
         mac_address = learned_macs.get(ip)
@@ -380,7 +913,7 @@ class RadarDisplay:
         # Crear panel de información
         info_lines = [
             f"IP: {ip}",
-            f"Host: .{self.get_host_byte(ip)}",
+            f"Host: {self.get_host_label(ip)}",
             f"Latencia: {pos_info['latency']:.1f}ms",
             f"Dispositivo: {device_name}",
             f"Tipo: {device_type}"
@@ -389,12 +922,22 @@ class RadarDisplay:
         if mac_address:
             info_lines.append(f"MAC: {mac_address}")
         
-        # Calcular tamaño del panel
-        max_width = 0
+        if host_info and host_info.get('subnet'):
+            interface = host_info.get('interface')
+            info_lines.append(f"Red: {host_info['subnet']}" + (f" ({interface})" if interface else ""))
+        
+        if host_info and host_info.get('hops'):
+            last_hop = host_info.get('last_hop')
+            info_lines.append(f"Saltos: {host_info['hops']}" + (f" (vía {last_hop})" if last_hop else ""))
+        
+        # Renderizar cada línea una sola vez (cacheada) y medir con el resultado
         line_height = 18
-        for line in info_lines:
-            text_surface = self.font_small.render(line, True, self.WHITE)
-            max_width = max(max_width, text_surface.get_width())
+        text_surfaces = [
+            self.text_cache.render(self.font_small, line,
+                                   self.BRIGHT_GREEN if i == 0 else self.WHITE)
+            for i, line in enumerate(info_lines)
+        ]
+        max_width = max(text_surface.get_width() for text_surface in text_surfaces)
         
         panel_width = max_width + 20
         panel_height = len(info_lines) * line_height + 10
@@ -421,19 +964,317 @@ class RadarDisplay:
                         (panel_x, panel_y, panel_width, panel_height), 2)
         
         # Dibujar líneas de información
-        for i, line in enumerate(info_lines):
-            color = self.BRIGHT_GREEN if i == 0 else self.WHITE
-            text_surface = self.font_small.render(line, True, color)
+        for i, text_surface in enumerate(text_surfaces):
             self.screen.blit(text_surface, (panel_x + 10, panel_y + 5 + i * line_height))
+        
+        return pygame.Rect(panel_x, panel_y, panel_width, panel_height)
+    
+    def _host_key(self, info):
+        """
+        Lo que determina cómo se dibuja un host: ángulo, latencia en ms y saltos
+        """
+        return (info['angle'], int(info['latency']), self._radial_hops(info))
     
-    def update_display(self, active_hosts, scan_status="Escaneando", learned_macs=None):
+    def _changed_hosts(self, active_hosts, changed_ips):
         """
-        Actualiza toda la pantalla del radar
+        Hosts cuya representación cambió desde el último frame, manteniendo el
+        resumen {ip: (ángulo, latencia, saltos)} de lo dibujado.
+        
+        Con changed_ips (los cambios que reporta el escáner) solo se revisan esas
+        IPs. Sin ellos se compara la tabla completa, pero solo cuando llega una
+        tabla nueva: el bucle principal copia la tabla únicamente si cambió.
+        
+        Args:
+            active_hosts (dict): Diccionario de hosts activos
+            changed_ips (set): IPs modificadas desde el frame anterior, o None si no se conocen
+            
+        Returns:
+            tuple: (IPs cambiadas, si hay que recomponer la capa aunque no haya cambios)
+        """
+        forced = self.force_recompose
+        self.force_recompose = False
+        if self.last_hosts_snapshot is None or (changed_ips is None and
+                                                active_hosts is not self.last_hosts_source):
+            previous = self.last_hosts_snapshot or {}
+            snapshot = {ip: self._host_key(info) for ip, info in active_hosts.items()}
+            changed = [ip for ip in previous.keys() | snapshot.keys()
+                       if previous.get(ip) != snapshot.get(ip)]
+            self.last_hosts_snapshot = snapshot
+            self.last_hosts_source = active_hosts
+            return changed, forced
+        
+        changed = []
+        snapshot = self.last_hosts_snapshot
+        for ip in changed_ips or ():
+            info = active_hosts.get(ip)
+            key = self._host_key(info) if info is not None else None
+            if snapshot.get(ip) != key:
+                changed.append(ip)
+                if key is None:
+                    snapshot.pop(ip, None)
+                else:
+                    snapshot[ip] = key
+        return changed, forced
+    
+    def _rebuild_hosts_layer(self, active_hosts, changed, learned_macs, forced=False):
+        """
+        Redibuja la capa de hosts cuando cambia la tabla de hosts
+        
+        Args:
+            active_hosts (dict): Diccionario de hosts activos
+            changed (list): IPs cuya representación cambió (ver _changed_hosts)
+            learned_macs (dict): Diccionario de MACs aprendidas
+            forced (bool): Recomposición forzada (zoom, modo de radio, tamaño): además se
+                sincronizan los clusters con la tabla completa
+            
+        Returns:
+            list: Rectángulos de pantalla afectados por los hosts que cambiaron
+        """
+        # Los agregados de clusters se actualizan solo con los hosts que cambiaron
+        for ip in changed:
+            info = active_hosts.get(ip)
+            if info is None:
+                self.cluster_index.remove_host(ip)
+                self.host_pulses.pop(ip, None)  # Si vuelve, vuelve a pulsar
+            else:
+                self.cluster_index.update_host(ip, info['angle'], info['latency'],
+                                               self._radial_hops(info))
+        if forced:
+            # El índice pudo vaciarse (cambio de modo de radio): quitar los que ya no
+            # están y reagregar los que falten
+            for ip in [ip for ip in self.cluster_index.hosts if ip not in active_hosts]:
+                self.cluster_index.remove_host(ip)
+            for ip, info in active_hosts.items():
+                if ip not in self.cluster_index.hosts:
+                    self.cluster_index.update_host(ip, info['angle'], info['latency'],
+                                                   self._radial_hops(info))
+        
+        use_lod = self.is_lod_active(len(active_hosts))
+        if use_lod != self.lod_drawn:
+            # Cambio entre clusters y hosts individuales: se repinta todo
+            self.lod_drawn = use_lod
+            self.needs_full_redraw = True
+            self.cluster_positions = {}
+            self.cluster_index.dirty_keys = set(self.cluster_index.clusters)
+            self.host_positions.clear()
+            self.expanded_cluster = None
+        
+        # Recomponer la capa: fondo estático + hosts (o clusters) + leyenda encima
+        self.hosts_layer.blit(self.cached_surface, (0, 0))
+        if use_lod:
+            # Las posiciones individuales solo existen para el cluster desplegado: se
+            # mantiene desplegado y se recalculan sus miembros en el próximo frame
+            self.expanded_stale = True
+            dirty = self.draw_clusters(self.hosts_layer)
+        else:
+            # Posición anterior de los hosts que cambiaron o desaparecieron
+            dirty = [self._host_rect(ip) for ip in changed if ip in self.host_positions]
+            
+            # Descartar posiciones de hosts que ya no están activos
+            for ip in changed:
+                if ip not in active_hosts:
+                    self.host_positions.pop(ip, None)
+            
+            if HAS_NUMPY and len(active_hosts) >= self.bulk_render_threshold:
+                self.draw_hosts_bulk(active_hosts, learned_macs, self.hosts_layer)
+            else:
+                current_time = time.time()
+                for ip, info in active_hosts.items():
+                    is_recent = (current_time - info['last_seen']) < 5.0  # Reciente si < 5 segundos
+                    mac_address = learned_macs.get(ip)
+                    self.draw_host_optimized(ip, info['angle'], info['latency'], is_recent,
+                                             mac_address, surface=self.hosts_layer,
+                                             hops=info.get('hops'))
+            
+            # Posición nueva de los hosts que cambiaron
+            dirty.extend(self._host_rect(ip) for ip in changed if ip in active_hosts)
+        self.draw_legend(self.hosts_layer)
+        
+        self.host_index.rebuild(self.host_positions)
+        
+        if len(dirty) > self.max_dirty_rects:
+            self.needs_full_redraw = True
+            return []
+        return dirty
+    
+    def _radial_hops(self, info):
+        """
+        Saltos que determinan la posición del host (solo en modo "hops")
+        """
+        return info.get('hops') if self.radius_mode == "hops" else None
+    
+    def is_lod_active(self, host_count):
+        """
+        Indica si los hosts se deben dibujar agrupados en clusters
+        
+        Args:
+            host_count (int): Número de hosts activos
+        """
+        if self.lod_mode == "on":
+            return True
+        if self.lod_mode == "off":
+            return False
+        return host_count >= self.lod_threshold
+    
+    def set_lod_level(self, level):
+        """
+        Cambia el nivel de zoom de los clusters (más nivel = sectores más finos)
+        
+        Args:
+            level (int): Índice en lod_sector_levels
+        """
+        level = max(0, min(level, len(self.lod_sector_levels) - 1))
+        if level == self.lod_level:
+            return
+        self.lod_level = level
+        self.cluster_index.set_sector_degrees(self.lod_sector_levels[level])
+        self.cluster_positions = {}
+        if self.lod_drawn:
+            self.needs_full_redraw = True
+            self.force_recompose = True
+    
+    def draw_clusters(self, surface):
+        """
+        Dibuja cada cluster como un glifo con número de hosts y latencia media
+        
+        Args:
+            surface (pygame.Surface): Superficie destino
+            
+        Returns:
+            list: Rectángulos de pantalla de los clusters que cambiaron
+        """
+        index = self.cluster_index
+        dirty_keys = index.dirty_keys
+        index.dirty_keys = set()
+        
+        # Región anterior de los clusters modificados
+        dirty = [self.cluster_positions[key]['rect'] for key in dirty_keys
+                 if key in self.cluster_positions]
+        for key in dirty_keys:
+            if key not in index.clusters:
+                self.cluster_positions.pop(key, None)
+        
+        for key in dirty_keys:
+            if key not in index.clusters:
+                continue
+            count, mean_latency = index.get_cluster_summary(key)
+            angle = (key[0] + 0.5) * index.sector_degrees
+            radius = self.host_radius(mean_latency, index.clusters[key]['hops'])
+            x = int(self.center_x + radius * math.cos(math.radians(angle)))
+            y = int(self.center_y + radius * math.sin(math.radians(angle)))
+            glyph_radius = min(self.dot_radius + int(2 * math.log2(count)), 16)
+            label = f"{count} · {mean_latency:.0f}ms" if count > 1 else ""
+            rect = pygame.Rect(x - glyph_radius - 1, y - glyph_radius - 1,
+                               glyph_radius * 2 + 3, glyph_radius * 2 + 3)
+            if label:
+                text_rect = self.text_cache.render(self.font_small, label, self.WHITE).get_rect()
+                text_rect.midtop = (x, y + glyph_radius + 2)
+                rect = rect.union(text_rect)
+            self.cluster_positions[key] = {
+                'x': x,
+                'y': y,
+                'radius': glyph_radius + 4,
+                'glyph_radius': glyph_radius,
+                'latency': mean_latency,
+                'label': label,
+                'rect': rect
+            }
+            dirty.append(rect)
+        
+        # La capa se recompone entera (los clusters son pocos); la pantalla solo en lo sucio
+        for key, pos_info in self.cluster_positions.items():
+            latency = pos_info['latency']
+            if latency < 10:
+                color = self.GREEN
+            elif latency < 50:
+                color = self.YELLOW
+            else:
+                color = self.RED
+            center = (pos_info['x'], pos_info['y'])
+            pygame.draw.circle(surface, color, center, pos_info['glyph_radius'])
+            if pos_info['label']:
+                pygame.draw.circle(surface, self.WHITE, center, pos_info['glyph_radius'], 1)
+                text_surface = self.text_cache.render(self.font_small, pos_info['label'], self.WHITE)
+                text_rect = text_surface.get_rect()
+                text_rect.midtop = (pos_info['x'], pos_info['y'] + pos_info['glyph_radius'] + 2)
+                surface.blit(text_surface, text_rect)
+        
+        self.cluster_grid.rebuild(self.cluster_positions)
+        return dirty
+    
+    def _update_expanded_cluster(self, learned_macs):
+        """
+        Despliega el cluster bajo el mouse en sus hosts individuales.
+        Se mantiene desplegado mientras el mouse siga cerca de alguno de sus hosts.
+        """
+        x, y = self.mouse_pos
+        hovered = [(dist_sq, key) for dist_sq, key, pos_info
+                   in self.cluster_grid.query(x, y, self.label_distance)
+                   if dist_sq <= pos_info['radius'] ** 2]
+        if hovered:
+            key = min(hovered)[1]
+        elif self.expanded_cluster is not None and self.host_index.query(x, y, self.label_distance):
+            key = self.expanded_cluster
+        else:
+            key = None
+        
+        if (key == self.expanded_cluster and not self.expanded_stale and
+                (key is None or key in self.cluster_index.clusters)):
+            return
+        
+        self.expanded_cluster = key
+        self.expanded_stale = False
+        self.host_positions.clear()
+        cluster = self.cluster_index.clusters.get(key) if key is not None else None
+        if cluster is not None and len(cluster['members']) <= self.max_expanded_hosts:
+            hover_radius = self.dot_radius + 5
+            for ip in cluster['members']:
+                angle, latency, _, hops = self.cluster_index.hosts[ip]
+                radius = self.host_radius(latency, hops)
+                self.host_positions[ip] = {
+                    'x': int(self.center_x + radius * math.cos(math.radians(angle))),
+                    'y': int(self.center_y + radius * math.sin(math.radians(angle))),
+                    'radius': hover_radius,
+                    'mac': learned_macs.get(ip),
+                    'latency': latency
+                }
+        self.host_index.rebuild(self.host_positions)
+    
+    def draw_expanded_cluster(self):
+        """
+        Dibuja sobre la pantalla los hosts del cluster desplegado
+        
+        Returns:
+            list: Rectángulos de pantalla ocupados
+        """
+        if not self.host_positions:
+            return []
+        offset = self.dot_radius
+        sprites = self.dot_sprites
+        blits = []
+        for pos_info in self.host_positions.values():
+            latency = pos_info['latency']
+            sprite = sprites[0] if latency < 10 else sprites[1] if latency < 50 else sprites[2]
+            blits.append((sprite, (pos_info['x'] - offset, pos_info['y'] - offset)))
+        rects = self.screen.blits(blits)
+        return [rects[0].unionall(rects[1:])]
+    
+    def update_display(self, active_hosts, scan_status="Escaneando", learned_macs=None,
+                       latency_stats=None, changed_ips=None):
+        """
+        Actualiza la pantalla del radar.
+        
+        La cuadrícula y la leyenda están pre-renderizadas; los hosts viven en una
+        capa que solo se redibuja cuando cambian. Por frame solo se restauran y
+        actualizan las regiones tocadas (barrido, hosts cambiados, etiquetas y paneles).
         
         Args:
             active_hosts (dict): Diccionario de hosts activos
             scan_status (str): Estado del escaneo
             learned_macs (dict): Diccionario de MACs aprendidas
+            latency_stats (dict): Cuantiles de latencia del escáner (opcional, panel extra)
+            changed_ips (set): IPs que cambiaron desde el frame anterior (None = desconocidas:
+                se compara la tabla completa cuando llega una tabla nueva)
         """
         if learned_macs is None:
             learned_macs = {}
@@ -441,46 +1282,86 @@ class RadarDisplay:
         # Actualizar posición del mouse
         self.mouse_pos = pygame.mouse.get_pos()
         
-        # Limpiar pantalla
-        self.screen.fill(self.BLACK)
+        # Regiones a restaurar desde la capa: lo dibujado encima en el frame anterior
+        restore_rects = self.overlay_rects
+        
+        # Redibujar la capa de hosts solo si cambiaron (ángulo o latencia en ms)
+        changed, forced = self._changed_hosts(active_hosts, changed_ips)
+        if changed or forced:
+            restore_rects = restore_rects + self._rebuild_hosts_layer(active_hosts, changed,
+                                                                      learned_macs, forced)
+        
+        if self.needs_full_redraw:
+            self.screen.blit(self.hosts_layer, (0, 0))
+        else:
+            for rect in restore_rects:
+                self.screen.blit(self.hosts_layer, rect, rect)
         
-        # Dibujar elementos del radar
-        self.draw_radar_grid()
-        self.draw_sweep_line()
+        # Elementos dinámicos dibujados directamente sobre la pantalla
+        overlay_rects = self.draw_sweep_line()
         
-        # Dibujar hosts detectados (optimizado)
-        current_time = time.time()
-        for ip, info in active_hosts.items():
-            is_recent = (current_time - info['last_seen']) < 5.0  # Reciente si < 5 segundos
-            mac_address = learned_macs.get(ip)
-            self.draw_host_optimized(ip, info['angle'], info['latency'], is_recent, mac_address)
+        # En modo clusters, desplegar el cluster bajo el mouse
+        if self.lod_drawn:
+            self._update_expanded_cluster(learned_macs)
+            overlay_rects.extend(self.draw_expanded_cluster())
+        
+        # Etiquetas solo para hosts cerca del mouse (consulta al índice espacial)
+        for _, ip, _ in self.host_index.query(self.mouse_pos[0], self.mouse_pos[1],
+                                              self.label_distance):
+            if ip in active_hosts:
+                overlay_rects.append(self.draw_host_label(ip))
         
         # Verificar hover y dibujar información detallada
         hovered_ip = self.check_hover(self.mouse_pos)
         if hovered_ip and hovered_ip in active_hosts:
-            self.draw_hover_info(hovered_ip, learned_macs)
+            hover_rect = self.draw_hover_info(hovered_ip, learned_macs, active_hosts[hovered_ip])
+            if hover_rect:
+                overlay_rects.append(hover_rect)
         
         # Dibujar interfaz
-        self.draw_info_panel(len(active_hosts), scan_status)
-        self.draw_legend()
-        
-        # Actualizar pantalla
-        pygame.display.flip()
+        overlay_rects.append(self.draw_info_panel(len(active_hosts), scan_status))
+        if latency_stats and self.show_latency_panel:
+            overlay_rects.append(self.draw_latency_panel(latency_stats))
+        
+        # Actualizar pantalla (completa solo tras iniciar/redimensionar o con muchos cambios)
+        if self.needs_full_redraw:
+            pygame.display.flip()
+            self.needs_full_redraw = False
+        else:
+            pygame.display.update(restore_rects + overlay_rects)
+        self.overlay_rects = overlay_rects
         # No usar clock.tick aquí, se maneja en el bucle principal
     
     def handle_events(self):
         """
-        Maneja eventos de Pygame
+        Maneja eventos de Pygame (marca input_pending si hubo alguno)
         
         Returns:
             bool: True si debe continuar, False si debe salir
         """
         for event in pygame.event.get():
+            self.input_pending = True
             if event.type == pygame.QUIT:
                 return False
+            elif event.type == pygame.VIDEORESIZE:
+                self.resize(event.w, event.h)
+            elif event.type == pygame.MOUSEWHEEL:
+                # Zoom de clusters: rueda arriba = sectores más finos
+                self.set_lod_level(self.lod_level + (1 if event.y > 0 else -1))
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     return False
+                elif event.key == pygame.K_p:
+                    # Mostrar/ocultar el panel de latencia
+                    self.show_latency_panel = not self.show_latency_panel
+                elif event.key == pygame.K_h:
+                    # Alternar radio por latencia / por saltos de red
+                    self.toggle_radius_mode()
+                elif event.key == pygame.K_l:
+                    # Alternar nivel de detalle: auto -> on -> off
+                    modes = ["auto", "on", "off"]
+                    self.lod_mode = modes[(modes.index(self.lod_mode) + 1) % len(modes)]
+                    self.force_recompose = True
         return True
     
     def cleanup(self):
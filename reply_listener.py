@@ -0,0 +1,281 @@
+import time
+import random
+import socket
+import struct
+import ctypes
+import threading
+
+# Constantes de Linux para filtros BPF clásicos
+SO_ATTACH_FILTER = 26
+ETH_P_ARP = 0x0806
+
+# Códigos de instrucción BPF
+BPF_LD_B_ABS = 0x30    # ldb [k]
+BPF_LD_H_ABS = 0x28    # ldh [k]
+BPF_LDX_B_MSH = 0xb1   # ldxb 4*([k]&0xf)
+BPF_LD_B_IND = 0x50    # ldb [x+k]
+BPF_LD_H_IND = 0x48    # ldh [x+k]
+BPF_JEQ_K = 0x15       # jeq #k, jt, jf
+BPF_RET_K = 0x06       # ret #k
+
+ICMP_ECHO_REPLY = 0
+ICMP_DEST_UNREACH = 3
+ICMP_SOURCE_QUENCH = 4
+ICMP_ECHO_REQUEST = 8
+
+
+def _checksum(data):
+    """
+    Checksum de Internet (RFC 1071)
+    """
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _attach_filter(sock, instructions):
+    """
+    Adjunta un programa BPF clásico al socket (el kernel descarta lo que no pase)
+
+    Args:
+        sock (socket.socket): Socket destino
+        instructions (list): Tuplas (code, jt, jf, k)
+    """
+    program = b"".join(struct.pack("HBBI", *insn) for insn in instructions)
+    buffer = ctypes.create_string_buffer(program)
+    fprog = struct.pack("HL", len(instructions), ctypes.addressof(buffer))
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, fprog)
+    return buffer  # Mantener referencia mientras se adjunta
+
+
+class ICMPReplyListener:
+    def __init__(self, learn_arp=True, on_arp=None):
+        """
+        Socket ICMP único y de larga duración para enviar pings y recibir respuestas.
+
+        Un filtro BPF en el kernel deja pasar solo los echo reply con nuestro
+        identificador (y errores ICMP, que son raros), y un único thread reparte
+        cada respuesta al ping que la espera por número de secuencia. El coste por
+        paquete no depende de cuántos pings haya en vuelo.
+
+        Args:
+            learn_arp (bool): Escuchar también respuestas ARP (las que provoca el kernel
+                al resolver los destinos) para aprender MACs sin enviar ARP propios
+            on_arp (callable): Función (ip, mac) llamada con cada respuesta ARP
+
+        Raises:
+            OSError: Si no hay permisos para sockets raw o el sistema no soporta BPF
+        """
+        self.ident = random.randint(0, 0xFFFF)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+        self.sock.settimeout(0.5)  # Permite terminar el thread de recepción al cerrar
+        self._filter = _attach_filter(self.sock, [
+            (BPF_LDX_B_MSH, 0, 0, 0),                  # X = longitud de cabecera IP
+            (BPF_LD_B_IND, 0, 0, 0),                   # A = tipo ICMP
+            (BPF_JEQ_K, 0, 2, ICMP_ECHO_REPLY),
+            (BPF_LD_H_IND, 0, 0, 4),                   # A = identificador
+            (BPF_JEQ_K, 2, 3, self.ident),
+            (BPF_JEQ_K, 1, 0, ICMP_DEST_UNREACH),
+            (BPF_JEQ_K, 0, 1, ICMP_SOURCE_QUENCH),
+            (BPF_RET_K, 0, 0, 0xFFFF),                 # Aceptar
+            (BPF_RET_K, 0, 0, 0),                      # Descartar
+        ])
+
+        self.arp_sock = None
+        self.on_arp = on_arp
+        if learn_arp and hasattr(socket, "AF_PACKET"):
+            try:
+                self.arp_sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW,
+                                              socket.htons(ETH_P_ARP))
+                self.arp_sock.settimeout(0.5)
+                self._arp_filter = _attach_filter(self.arp_sock, [
+                    (BPF_LD_H_ABS, 0, 0, 20),              # A = operación ARP
+                    (BPF_JEQ_K, 0, 1, 2),                  # 2 = reply
+                    (BPF_RET_K, 0, 0, 0xFFFF),
+                    (BPF_RET_K, 0, 0, 0),
+                ])
+            except OSError:
+                self.arp_sock = None
+
+        self.lock = threading.Lock()
+        self.next_seq = 0
+        self.waiters = {}  # seq -> [evento, ip destino, instante de envío, rtt_ms, limitado]
+        self.running = True
+
+        # Estadísticas
+        self.received = 0
+        self.dispatched = 0
+
+        self.threads = [threading.Thread(target=self._receive_loop, daemon=True)]
+        if self.arp_sock is not None:
+            self.threads.append(threading.Thread(target=self._arp_loop, daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+    @property
+    def learns_arp(self):
+        return self.arp_sock is not None
+
+    def probe(self, ip, timeout):
+        """
+        Envía un echo request y espera su respuesta
+
+        Args:
+            ip (str): Dirección IPv4 destino
+            timeout (float): Tiempo máximo de espera en segundos
+
+        Returns:
+            tuple: (latencia_ms o None, True si hubo señal de rate-limiting)
+        """
+        event = threading.Event()
+        with self.lock:
+            seq = self.next_seq
+            self.next_seq = (self.next_seq + 1) & 0xFFFF
+            waiter = [event, ip, 0.0, None, False]
+            self.waiters[seq] = waiter
+
+        header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, self.ident, seq)
+        payload = b"icmp-radar".ljust(16, b"\x00")
+        checksum = _checksum(header + payload)
+        packet = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum, self.ident, seq) + payload
+
+        try:
+            waiter[2] = time.perf_counter()
+            self.sock.sendto(packet, (ip, 0))
+            event.wait(timeout)
+        except OSError:
+            pass
+        finally:
+            with self.lock:
+                self.waiters.pop(seq, None)
+        return waiter[3], waiter[4]
+
+    def _receive_loop(self):
+        """
+        Recibe respuestas y las reparte al ping correspondiente por número de secuencia
+        """
+        while self.running:
+            try:
+                data, (src, _) = self.sock.recvfrom(65535)
+            except OSError:
+                if not self.running:
+                    break
+                continue
+            now = time.perf_counter()
+            self.received += 1
+
+            ihl = (data[0] & 0x0F) * 4
+            if len(data) < ihl + 8:
+                continue
+            icmp_type, icmp_code = data[ihl], data[ihl + 1]
+
+            if icmp_type == ICMP_ECHO_REPLY:
+                ident, seq = struct.unpack("!HH", data[ihl + 4:ihl + 8])
+                throttled = False
+            else:
+                # Error ICMP: la cabecera original va citada tras los 8 bytes del error
+                inner = ihl + 8
+                if len(data) < inner + 1:
+                    continue
+                inner_icmp = inner + (data[inner] & 0x0F) * 4
+                if len(data) < inner_icmp + 8:
+                    continue
+                ident, seq = struct.unpack("!HH", data[inner_icmp + 4:inner_icmp + 8])
+                throttled = (icmp_type == ICMP_SOURCE_QUENCH or
+                             (icmp_type == ICMP_DEST_UNREACH and icmp_code == 13))
+            if ident != self.ident:
+                continue
+
+            with self.lock:
+                waiter = self.waiters.get(seq)
+            if waiter is None:
+                continue
+            if icmp_type == ICMP_ECHO_REPLY:
+                if src != waiter[1]:
+                    continue
+                waiter[3] = (now - waiter[2]) * 1000
+            waiter[4] = throttled
+            waiter[0].set()  # Un error ICMP también despierta al ping (sin esperar el timeout)
+            self.dispatched += 1
+
+    def _arp_loop(self):
+        """
+        Recibe respuestas ARP y notifica (ip, mac) del emisor
+        """
+        while self.running:
+            try:
+                frame = self.arp_sock.recv(65535)
+            except OSError:
+                if not self.running:
+                    break
+                continue
+            if len(frame) < 42 or self.on_arp is None:
+                continue
+            sender_mac = ":".join(f"{b:02x}" for b in frame[22:28])
+            sender_ip = socket.inet_ntoa(frame[28:32])
+            try:
+                self.on_arp(sender_ip, sender_mac)
+            except Exception:
+                pass
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: {received, dispatched, pending}
+        """
+        with self.lock:
+            pending = len(self.waiters)
+        return {'received': self.received, 'dispatched': self.dispatched, 'pending': pending}
+
+    def close(self):
+        """
+        Cierra los sockets y detiene los threads de recepción
+        """
+        self.running = False
+        for sock in (self.sock, self.arp_sock):
+            if sock is not None:
+                try:
+                    sock.close()
+                except OSError:
+                    pass
+
+
+def has_raw_socket_privileges():
+    """
+    Comprueba si el proceso puede abrir sockets ICMP raw (root o CAP_NET_RAW),
+    sin enviar ningún paquete
+
+    Returns:
+        bool: True si se pueden enviar pings
+    """
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+    except (PermissionError, OSError):
+        return False
+    sock.close()
+    return True
+
+
+def read_kernel_arp_cache(ip):
+    """
+    Busca la MAC de una IP en la caché ARP del kernel (/proc/net/arp, solo Linux)
+
+    Args:
+        ip (str): Dirección IPv4
+
+    Returns:
+        str: MAC en minúsculas, o None si no está
+    """
+    try:
+        with open("/proc/net/arp") as f:
+            next(f)  # Cabecera
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 4 and fields[0] == ip and fields[3] != "00:00:00:00:00:00":
+                    return fields[3].lower()
+    except (OSError, StopIteration):
+        pass
+    return None
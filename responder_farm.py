@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Granja de hosts virtuales para pruebas de carga de extremo a extremo
+
+Crea una interfaz TAP (o TUN) en Linux, le asigna una red (por defecto
+10.99.0.0/16) y responde desde espacio de usuario a ARP y a ecos ICMP en nombre
+de miles de hosts virtuales, con retardo, jitter, pérdida y límite de tasa
+configurables. Así ICMPScanner e icmp_radar.py usan su camino real (socket raw,
+BPF, ARP del kernel) contra una red simulada.
+
+Requiere root y /dev/net/tun.
+
+Uso:
+  sudo python responder_farm.py serve --hosts 5000            # Dejar la granja en marcha
+  sudo python icmp_radar.py -n 10.99.0.0/16                   # ...y apuntar el radar a ella
+  sudo python responder_farm.py bench --hosts 2000 --kill 100 # Medir barrido, frescura y expiración
+"""
+
+import os
+import sys
+import time
+import heapq
+import fcntl
+import random
+import struct
+import socket
+import argparse
+import threading
+import ipaddress
+import subprocess
+import statistics
+
+from reply_listener import _checksum
+
+TUNSETIFF = 0x400454ca
+IFF_TUN = 0x0001
+IFF_TAP = 0x0002
+IFF_NO_PI = 0x1000
+
+ETH_P_IP = 0x0800
+ETH_P_ARP = 0x0806
+NEIGH_SYSCTL = "/proc/sys/net/ipv4/neigh/default/gc_thresh{}"
+
+
+class ResponderFarm:
+    def __init__(self, network="10.99.0.0/16", hosts=1000, mode="tap", ifname="radar0",
+                 delay_ms=1.0, jitter_ms=0.5, loss=0.0, rate_limit=0, rate_limit_reply=False, seed=1):
+        """
+        Inicializa la granja (la interfaz se crea en open())
+
+        Args:
+            network (str): Red simulada; la primera dirección es la del propio equipo
+            hosts (int): Hosts virtuales vivos (elegidos al azar dentro de la red)
+            mode (str): "tap" (Ethernet, responde también a ARP) o "tun" (solo IP)
+            ifname (str): Nombre de la interfaz a crear
+            delay_ms (float): Retardo medio de cada respuesta
+            jitter_ms (float): Desviación máxima (uniforme) del retardo
+            loss (float): Probabilidad de no responder a un eco (0-1)
+            rate_limit (float): Ecos por segundo respondidos como máximo (0 = sin límite)
+            rate_limit_reply (bool): Por encima del límite, responder "prohibido
+                administrativamente" (tipo 3, código 13) en vez de descartar
+            seed (int): Semilla para elegir hosts y retardos
+        """
+        self.network = ipaddress.ip_network(network)
+        self.gateway = str(next(self.network.hosts()))
+        self.mode = mode
+        self.ifname = ifname
+        self.delay_ms = delay_ms
+        self.jitter_ms = jitter_ms
+        self.loss = loss
+        self.rate_limit = rate_limit
+        self.rate_limit_reply = rate_limit_reply
+        self.random = random.Random(seed)
+
+        candidates = self.network.num_addresses - 3  # Sin red, broadcast ni el propio equipo
+        first = int(self.network.network_address) + 2
+        chosen = self.random.sample(range(candidates), min(hosts, candidates))
+        self.alive = {socket.inet_aton(str(ipaddress.ip_address(first + i))) for i in chosen}
+
+        self.fd = None
+        self.running = False
+        self.threads = []
+        self.pending = []  # Heap de (instante, orden, trama) con las respuestas programadas
+        self.pending_lock = threading.Condition()
+        self.order = 0
+        self.tokens = rate_limit
+        self.last_refill = time.monotonic()
+        self.saved_sysctls = {}
+
+        # Estadísticas
+        self.echo_requests = 0
+        self.echo_replies = 0
+        self.arp_replies = 0
+        self.dropped_loss = 0
+        self.dropped_rate = 0
+
+    @staticmethod
+    def mac_for(ip_bytes):
+        """
+        MAC virtual (administrada localmente) derivada de la IP
+        """
+        return b"\x02\x52" + ip_bytes
+
+    def alive_ips(self):
+        return [socket.inet_ntoa(ip) for ip in self.alive]
+
+    def kill(self, count):
+        """
+        Deja de responder por `count` hosts vivos elegidos al azar
+
+        Returns:
+            list: IPs que dejaron de responder
+        """
+        victims = self.random.sample(sorted(self.alive), min(count, len(self.alive)))
+        for ip in victims:
+            self.alive.discard(ip)
+        return [socket.inet_ntoa(ip) for ip in victims]
+
+    def open(self):
+        """
+        Crea la interfaz, le asigna la dirección del equipo y la levanta
+        """
+        flags = (IFF_TAP if self.mode == "tap" else IFF_TUN) | IFF_NO_PI
+        self.fd = os.open("/dev/net/tun", os.O_RDWR)
+        fcntl.ioctl(self.fd, TUNSETIFF, struct.pack("16sH", self.ifname.encode(), flags))
+        subprocess.run(["ip", "addr", "add", f"{self.gateway}/{self.network.prefixlen}",
+                        "dev", self.ifname], check=True)
+        subprocess.run(["ip", "link", "set", self.ifname, "up"], check=True)
+
+        if self.mode == "tap":
+            # Con miles de vecinos la tabla ARP del kernel se desborda con los valores por defecto
+            needed = len(self.alive) * 2
+            for level, value in ((1, needed // 4), (2, needed // 2), (3, needed)):
+                path = NEIGH_SYSCTL.format(level)
+                try:
+                    with open(path) as f:
+                        current = int(f.read())
+                    if current < value:
+                        self.saved_sysctls[path] = current
+                        with open(path, "w") as f:
+                            f.write(str(value))
+                except OSError:
+                    pass
+
+    def start(self):
+        """
+        Arranca los threads de recepción y de envío de respuestas
+        """
+        self.running = True
+        for target in (self._read_loop, self._write_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        print(f"[FARM] {self.ifname} ({self.mode}): {len(self.alive)} hosts en {self.network}, "
+              f"retardo {self.delay_ms}±{self.jitter_ms}ms, pérdida {self.loss:.0%}"
+              + (f", límite {self.rate_limit:.0f}/s" if self.rate_limit else ""))
+
+    def close(self):
+        """
+        Detiene la granja, elimina la interfaz y restaura los sysctl
+        """
+        self.running = False
+        with self.pending_lock:
+            self.pending_lock.notify()
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+        subprocess.run(["ip", "link", "del", self.ifname], stderr=subprocess.DEVNULL)
+        for path, value in self.saved_sysctls.items():
+            try:
+                with open(path, "w") as f:
+                    f.write(str(value))
+            except OSError:
+                pass
+
+    def _schedule(self, frame, delay_ms):
+        due = time.monotonic() + max(delay_ms, 0) / 1000.0
+        with self.pending_lock:
+            self.order += 1
+            heapq.heappush(self.pending, (due, self.order, frame))
+            self.pending_lock.notify()
+
+    def _write_loop(self):
+        while self.running:
+            with self.pending_lock:
+                while self.running and not self.pending:
+                    self.pending_lock.wait()
+                if not self.running:
+                    break
+                due, _, frame = self.pending[0]
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self.pending_lock.wait(wait)
+                    continue
+                heapq.heappop(self.pending)
+            try:
+                os.write(self.fd, frame)
+            except OSError:
+                pass
+
+    def _read_loop(self):
+        while self.running:
+            try:
+                frame = os.read(self.fd, 65535)
+            except OSError:
+                break
+            if self.mode == "tap":
+                if len(frame) < 14:
+                    continue
+                ethertype = struct.unpack("!H", frame[12:14])[0]
+                if ethertype == ETH_P_ARP:
+                    self._handle_arp(frame)
+                elif ethertype == ETH_P_IP:
+                    reply = self._handle_ip(frame[14:])
+                    if reply is not None:
+                        packet, src, delay = reply
+                        self._schedule(frame[6:12] + self.mac_for(src) + frame[12:14] + packet, delay)
+            else:
+                reply = self._handle_ip(frame)
+                if reply is not None:
+                    self._schedule(reply[0], reply[2])
+
+    def _handle_arp(self, frame):
+        arp = frame[14:42]
+        if len(arp) < 28 or struct.unpack("!H", arp[6:8])[0] != 1:
+            return  # Solo peticiones
+        sender_mac, sender_ip, target_ip = arp[8:14], arp[14:18], arp[24:28]
+        if target_ip not in self.alive:
+            return
+        mac = self.mac_for(target_ip)
+        reply = (sender_mac + mac + struct.pack("!H", ETH_P_ARP) +
+                 struct.pack("!HHBBH", 1, ETH_P_IP, 6, 4, 2) + mac + target_ip + sender_mac + sender_ip)
+        self.arp_replies += 1
+        self._schedule(reply, 0)
+
+    def _take_token(self):
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        self.tokens = min(self.rate_limit, self.tokens + (now - self.last_refill) * self.rate_limit)
+        self.last_refill = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def _handle_ip(self, packet):
+        """
+        Construye la respuesta a un eco ICMP dirigido a un host vivo
+
+        Returns:
+            tuple: (paquete IP de respuesta, IP origen de la respuesta, retardo en ms), o None
+        """
+        if len(packet) < 20 or packet[0] >> 4 != 4 or packet[9] != socket.IPPROTO_ICMP:
+            return None
+        ihl = (packet[0] & 0x0F) * 4
+        src, dst = packet[12:16], packet[16:20]
+        if len(packet) < ihl + 8 or packet[ihl] != 8 or dst not in self.alive:
+            return None
+        self.echo_requests += 1
+
+        if self.loss and self.random.random() < self.loss:
+            self.dropped_loss += 1
+            return None
+        if not self._take_token():
+            self.dropped_rate += 1
+            if not self.rate_limit_reply:
+                return None
+            # Prohibido administrativamente, citando la cabecera original
+            icmp = struct.pack("!BBHI", 3, 13, 0, 0) + packet[:ihl + 8]
+        else:
+            icmp = b"\x00" + packet[ihl + 1:ihl + 2] + b"\x00\x00" + packet[ihl + 4:]
+            self.echo_replies += 1
+        icmp = icmp[:2] + struct.pack("!H", _checksum(icmp)) + icmp[4:]
+
+        header = bytearray(packet[:20])
+        header[0] = 0x45
+        struct.pack_into("!H", header, 2, 20 + len(icmp))
+        header[8] = 64  # TTL
+        struct.pack_into("!H", header, 10, 0)
+        header[12:16], header[16:20] = dst, src
+        struct.pack_into("!H", header, 10, _checksum(bytes(header)))
+
+        delay = self.delay_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms)
+        return bytes(header) + icmp, dst, delay
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: Contadores de peticiones, respuestas y descartes
+        """
+        return {'echo_requests': self.echo_requests, 'echo_replies': self.echo_replies,
+                'arp_replies': self.arp_replies, 'dropped_loss': self.dropped_loss,
+                'dropped_rate': self.dropped_rate, 'pending': len(self.pending)}
+
+
+def run_bench(farm, args):
+    """
+    Apunta un ICMPScanner a la granja y mide barrido, frescura del ping continuo
+    y precisión de la expiración
+    """
+    from icmp_scanner import ICMPScanner
+
+    scanner = ICMPScanner(network_range=str(farm.network), host_persistence=args.persist,
+                          interface_rate=args.probe_rate)
+    alive = set(farm.alive_ips())
+
+    # 1. Barrido completo
+    start = time.time()
+    scanner.scan_network()
+    sweep = time.time() - start
+    found = set(scanner.get_active_hosts())
+    print(f"[BENCH] Barrido: {farm.network.num_addresses} direcciones en {sweep:.1f}s "
+          f"({farm.network.num_addresses / sweep:.0f} dir/s), "
+          f"{len(found & alive)}/{len(alive)} hosts encontrados, {len(found - alive)} falsos positivos")
+
+    # 2. Frescura del ping continuo
+    scanner.start_continuous_ping()
+    scanner.start_cleanup_thread()
+    time.sleep(args.settle)
+    now = time.time()
+    ages = [now - info['last_seen'] for ip, info in scanner.get_active_hosts().items() if ip in alive]
+    if ages:
+        ages.sort()
+        print(f"[BENCH] Frescura tras {args.settle:.0f}s de ping continuo: mediana "
+              f"{statistics.median(ages):.1f}s, p95 {ages[int(len(ages) * 0.95) - 1]:.1f}s, "
+              f"máx {ages[-1]:.1f}s")
+
+    # 3. Expiración de hosts que dejan de responder
+    if args.kill:
+        killed = set(farm.kill(args.kill))
+        killed_at = time.time()
+        gone_at = {}
+        deadline = killed_at + args.persist * 3 + 10
+        while len(gone_at) < len(killed) and time.time() < deadline:
+            active = scanner.get_active_hosts()
+            for ip in killed - active.keys() - gone_at.keys():
+                gone_at[ip] = time.time()
+            time.sleep(0.2)
+        lateness = [gone_at[ip] - killed_at - args.persist for ip in gone_at]
+        if lateness:
+            print(f"[BENCH] Expiración: {len(gone_at)}/{len(killed)} hosts retirados, retraso sobre "
+                  f"la persistencia ({args.persist}s): medio {statistics.mean(lateness):+.1f}s, "
+                  f"máx {max(lateness):+.1f}s")
+        else:
+            print(f"[BENCH] Expiración: ningún host retirado en {deadline - killed_at:.0f}s")
+
+    latency = scanner.get_latency_stats()['global']['1m']
+    if latency['count']:
+        print(f"[BENCH] Latencia (1m): p50 {latency['p50']:.1f}ms, p99 {latency['p99']:.1f}ms, "
+              f"pérdida {latency['loss']:.1%} (granja: {args.delay}±{args.jitter}ms, {args.loss:.0%})")
+    print(f"[BENCH] Granja: {farm.get_stats()}")
+    print(f"[BENCH] Escáner: {scanner.get_rate_metrics()}")
+    scanner.stop_scan()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ICMP Radar - Granja de hosts virtuales")
+    parser.add_argument("command", choices=["serve", "bench"], help="serve: dejar la granja en marcha; "
+                        "bench: medir un ICMPScanner contra ella")
+    parser.add_argument("-n", "--network", default="10.99.0.0/16", help="Red simulada (default: 10.99.0.0/16)")
+    parser.add_argument("--hosts", type=int, default=1000, help="Hosts vivos (default: 1000)")
+    parser.add_argument("--mode", choices=["tap", "tun"], default="tap",
+                        help="tap: Ethernet con ARP; tun: solo IP, sin vecinos (default: tap)")
+    parser.add_argument("--ifname", default="radar0", help="Nombre de la interfaz (default: radar0)")
+    parser.add_argument("--delay", type=float, default=1.0, help="Retardo medio en ms (default: 1)")
+    parser.add_argument("--jitter", type=float, default=0.5, help="Jitter en ms (default: 0.5)")
+    parser.add_argument("--loss", type=float, default=0.0, help="Probabilidad de pérdida 0-1 (default: 0)")
+    parser.add_argument("--rate-limit", type=float, default=0, help="Ecos/s respondidos como máximo (0 = sin límite)")
+    parser.add_argument("--rate-limit-reply", action="store_true",
+                        help="Por encima del límite responder 'prohibido administrativamente'")
+    parser.add_argument("--seed", type=int, default=1, help="Semilla (default: 1)")
+    parser.add_argument("--persist", type=int, default=10, help="bench: persistencia del escáner en s (default: 10)")
+    parser.add_argument("--probe-rate", type=float, default=2000, help="bench: pings/s iniciales (default: 2000)")
+    parser.add_argument("--settle", type=float, default=10, help="bench: segundos de ping continuo antes de medir")
+    parser.add_argument("--kill", type=int, default=0, help="bench: hosts a apagar para medir la expiración")
+    args = parser.parse_args()
+
+    farm = ResponderFarm(args.network, hosts=args.hosts, mode=args.mode, ifname=args.ifname,
+                         delay_ms=args.delay, jitter_ms=args.jitter, loss=args.loss,
+                         rate_limit=args.rate_limit, rate_limit_reply=args.rate_limit_reply, seed=args.seed)
+    try:
+        farm.open()
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"[ERROR] No se pudo crear {args.ifname}: {e}")
+        print("[TIP] Ejecuta como root en Linux con /dev/net/tun disponible")
+        return 1
+
+    farm.start()
+    try:
+        if args.command == "bench":
+            run_bench(farm, args)
+        else:
+            while True:
+                time.sleep(5)
+                print(f"[FARM] {farm.get_stats()}")
+    except KeyboardInterrupt:
+        print("\n[STOP] Deteniendo granja...")
+    finally:
+        farm.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
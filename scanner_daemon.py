@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+Demonio de escaneo con suscripción por socket Unix
+
+Un único ICMPScanner de larga duración publica la tabla de hosts por un socket
+de dominio Unix: al conectarse, cada cliente recibe una instantánea completa y
+después solo los deltas. Así varios radares sobre la misma red comparten un solo
+motor de escaneo (un solo tráfico de sondeo y una sola copia del estado).
+
+El protocolo es el mismo enmarcado binario que usan los sensores distribuidos
+(ver distributed.py).
+
+Uso:
+  sudo python scanner_daemon.py -n 192.168.1.0/24            # Demonio
+  python icmp_radar.py --connect /tmp/icmp-radar.sock          # Cada visor
+"""
+
+import os
+import sys
+import time
+import queue
+import socket
+import struct
+import argparse
+import threading
+from threading import RLock
+
+from event_log import events
+from distributed import (send_frame, recv_frame, close_socket, encode_deltas, decode_delta,
+                         MSG_DELTA, MSG_HEARTBEAT)
+
+DEFAULT_SOCKET_PATH = "/tmp/icmp-radar.sock"
+
+# Tipos de mensaje propios del demonio (los de distributed.py siguen siendo válidos)
+MSG_SNAPSHOT = 10   # Tabla completa: el cliente descarta lo que tenía
+MSG_STATUS = 11     # Texto de estado del escáner (utf-8)
+
+
+class ScannerDaemon:
+    def __init__(self, scanner, socket_path=DEFAULT_SOCKET_PATH, publish_interval=0.2,
+                 client_queue_size=64):
+        """
+        Publica la tabla de hosts de un escáner a clientes suscritos
+
+        Args:
+            scanner: ICMPScanner ya configurado (network_range, cadencia...)
+            socket_path (str): Ruta del socket Unix
+            publish_interval (float): Segundos mínimos entre publicaciones de deltas
+            client_queue_size (int): Mensajes pendientes por cliente antes de considerarlo
+                lento; a un cliente lento se le descarta la cola y recibe una instantánea
+        """
+        self.scanner = scanner
+        self.socket_path = socket_path
+        self.publish_interval = publish_interval
+        self.client_queue_size = client_queue_size
+
+        self.server = None
+        self.running = False
+        self.threads = []
+        self.scan_status = "Inicializando"
+
+        # Último estado publicado: base de los deltas y de las instantáneas de clientes nuevos
+        self.publish_lock = RLock()
+        self.published = {}  # {ip: info}
+        self.published_macs = {}
+        self.clients = []  # [{sock, queue, resync}]
+        self.clients_lock = RLock()
+
+    def start(self):
+        """
+        Abre el socket y arranca escaneo, publicación y aceptación de clientes
+        """
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o666)  # Los visores no necesitan ser root
+        self.server.listen()
+        self.server.settimeout(0.5)
+        self.running = True
+
+        self.scanner.start_continuous_ping()
+        self.scanner.start_cleanup_thread()
+        for target in (self._scan_loop, self._publish_loop, self._accept_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        print(f"[DAEMON] Publicando en {self.socket_path}")
+
+    def stop(self):
+        """
+        Detiene el escáner, desconecta a los clientes y elimina el socket
+        """
+        self.running = False
+        self.scanner.stop_scan()
+        self.scanner.cadence.trigger()
+        if self.server is not None:
+            self.server.close()
+        with self.clients_lock:
+            for client in self.clients:
+                client['queue'].put(None)
+                close_socket(client['sock'])
+            self.clients = []
+        for thread in self.threads:
+            thread.join(timeout=2)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def _scan_loop(self):
+        while self.running:
+            try:
+                self.scan_status = "Escaneando..."
+                start_time = time.time()
+                self.scanner.scan_network()
+                scan_duration = time.time() - start_time
+
+                hosts_found = len(self.scanner.get_active_hosts())
+                macs_learned = self.scanner.get_learned_macs_count()
+                probe_rate = self.scanner.get_probe_rate()
+                self.scanner.observe_sweep_churn()
+                self.scan_status = (f"Completado - {hosts_found} hosts, {macs_learned} MACs "
+                                    f"({scan_duration:.1f}s, {probe_rate:.0f} pps, "
+                                    f"próximo en {self.scanner.cadence.interval:.0f}s)")
+                self.scanner.cadence.wait()
+            except Exception as e:
+                self.scan_status = f"Error: {str(e)}"
+                time.sleep(2)
+
+    def _snapshot_frames(self):
+        """
+        Mensajes que ponen a un cliente al día (llamar con publish_lock): el primer
+        trozo de la tabla es la instantánea y los siguientes, deltas sobre ella
+        """
+        payloads = encode_deltas(self.published, [], self.published_macs, category="DAEMON")
+        return ([(MSG_STATUS, self.scan_status.encode())] +
+                [(MSG_SNAPSHOT if i == 0 else MSG_DELTA, payload) for i, payload in enumerate(payloads)])
+
+    def _publish_loop(self):
+        last_version = None
+        last_status = None
+        last_send = 0.0
+        while self.running:
+            self.scanner.change_event.wait(self.publish_interval)
+            self.scanner.change_event.clear()
+            version = self.scanner.get_state_version()
+            status = self.scan_status
+            if version == last_version and status == last_status:
+                if time.time() - last_send > 1.0:
+                    self._broadcast([(MSG_HEARTBEAT, b"")])
+                    last_send = time.time()
+                continue
+
+            try:
+                self._publish(version, last_version, status, last_status)
+            except Exception as e:
+                # Un fallo al preparar una publicación no debe parar al publicador
+                events.error("DAEMON", f"Error publicando cambios: {e}")
+            last_version, last_status = version, status
+            last_send = time.time()
+            time.sleep(self.publish_interval)  # Agrupar cambios seguidos en un solo delta
+
+    def _publish(self, version, last_version, status, last_status):
+        """
+        Difunde el estado y el delta de hosts desde la última publicación
+        """
+        with self.publish_lock:
+            frames = []
+            if status != last_status:
+                frames.append((MSG_STATUS, status.encode()))
+            if version != last_version:
+                hosts = self.scanner.get_active_hosts()
+                macs = self.scanner.get_learned_macs()
+                upserts = {ip: info for ip, info in hosts.items()
+                           if (ip not in self.published or
+                               self.published[ip]['last_seen'] != info['last_seen'] or
+                               self.published[ip]['latency'] != info['latency'])}
+                removals = [ip for ip in self.published if ip not in hosts]
+                new_macs = {ip: mac for ip, mac in macs.items()
+                            if self.published_macs.get(ip) != mac}
+                # Las MACs viajan con los hosts: reenviar los que aprendieron MAC
+                for ip in new_macs:
+                    if ip in hosts:
+                        upserts.setdefault(ip, hosts[ip])
+                self.published = hosts
+                self.published_macs = macs
+                if upserts or removals:
+                    frames.extend((MSG_DELTA, payload) for payload
+                                  in encode_deltas(upserts, removals, macs, category="DAEMON"))
+            self._broadcast(frames)
+
+    def _broadcast(self, frames):
+        with self.clients_lock:
+            clients = list(self.clients)
+        for client in clients:
+            if client['resync']:
+                continue  # Ya tiene una instantánea pendiente
+            try:
+                for frame in frames:
+                    client['queue'].put_nowait(frame)
+            except queue.Full:
+                self._resync(client)
+
+    def _resync(self, client):
+        """
+        Cliente lento: descartar su cola y mandarle una instantánea nueva
+        """
+        client['resync'] = True
+        while True:
+            try:
+                client['queue'].get_nowait()
+            except queue.Empty:
+                break
+        with self.publish_lock:
+            for frame in self._snapshot_frames():
+                client['queue'].put_nowait(frame)
+            client['resync'] = False
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                conn, _ = self.server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            conn.settimeout(None)
+            client = {'sock': conn, 'queue': queue.Queue(self.client_queue_size), 'resync': False}
+            try:
+                with self.publish_lock:
+                    # Instantánea y alta bajo el mismo lock: ningún delta se pierde ni se duplica
+                    for frame in self._snapshot_frames():
+                        client['queue'].put_nowait(frame)
+                    with self.clients_lock:
+                        self.clients.append(client)
+            except Exception as e:
+                events.error("DAEMON", f"No se pudo preparar la instantánea para un cliente: {e}")
+                close_socket(conn)
+                continue
+            threading.Thread(target=self._client_writer, args=(client,), daemon=True).start()
+            events.info("DAEMON", f"Cliente conectado ({len(self.clients)} en total)")
+
+    def _client_writer(self, client):
+        try:
+            while self.running:
+                frame = client['queue'].get()
+                if frame is None:
+                    break
+                send_frame(client['sock'], *frame)
+        except OSError:
+            pass
+        finally:
+            close_socket(client['sock'])
+            with self.clients_lock:
+                if client in self.clients:
+                    self.clients.remove(client)
+            if self.running:
+                events.info("DAEMON", f"Cliente desconectado ({len(self.clients)} en total)")
+
+
+class DaemonClient:
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH, host_persistence=30):
+        """
+        Suscriptor de un ScannerDaemon. Expone la misma interfaz de lectura que
+        ICMPScanner (get_active_hosts, get_learned_macs, get_state_version,
+        change_event) para alimentar RadarDisplay.
+
+        Args:
+            socket_path (str): Ruta del socket Unix del demonio
+            host_persistence (int): Segundos que se conserva un host si se pierde la conexión
+        """
+        self.socket_path = socket_path
+        self.host_persistence = host_persistence
+        self.active_hosts = {}
+        self.learned_macs = {}
+        self.hosts_lock = RLock()
+        self.state_version = 0
+        self.change_event = threading.Event()
+        self.scan_status = "Conectando al demonio..."
+        self.connected = False
+
+        self.sock = None
+        self.running = False
+        self.thread = None
+
+    def get_active_hosts(self):
+        with self.hosts_lock:
+            return self.active_hosts.copy()
+
+    def get_learned_macs(self):
+        with self.hosts_lock:
+            return self.learned_macs.copy()
+
+    def get_learned_macs_count(self):
+        return len(self.learned_macs)
+
+    def get_state_version(self):
+        return self.state_version
+
+    def start(self):
+        """
+        Se suscribe en segundo plano (reintenta si el demonio no está o se reinicia)
+        """
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop_scan(self):
+        """
+        Cierra la suscripción (mismo nombre que en ICMPScanner)
+        """
+        self.running = False
+        if self.sock is not None:
+            close_socket(self.sock)
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def _mark_changed(self):
+        self.state_version += 1
+        self.change_event.set()
+
+    def _run(self):
+        backoff = 0.5
+        while self.running:
+            try:
+                self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self.sock.connect(self.socket_path)
+                self.connected = True
+                backoff = 0.5
+                while self.running:
+                    msg_type, payload = recv_frame(self.sock)
+                    if msg_type == MSG_SNAPSHOT:
+                        self._apply(payload, reset=True)
+                    elif msg_type == MSG_DELTA:
+                        self._apply(payload)
+                    elif msg_type == MSG_STATUS:
+                        self.scan_status = payload.decode(errors="replace")
+                        self._mark_changed()
+            except (OSError, ConnectionError, struct.error):
+                pass
+            if self.sock is not None:
+                close_socket(self.sock)
+            if self.connected:
+                self.connected = False
+                self.scan_status = "Conexión con el demonio perdida, reintentando..."
+                self._mark_changed()
+            if self.running:
+                self._expire_hosts()
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 5)
+
+    def _apply(self, payload, reset=False):
+        daemon_time, upserts, removals, macs = decode_delta(payload)
+        now = time.time()
+        with self.hosts_lock:
+            if reset:
+                self.active_hosts = {}
+                self.learned_macs = {}
+            for ip, info in upserts.items():
+                # last_seen al reloj local según la antigüedad que indica el demonio
+                info['last_seen'] = now - max(daemon_time - info['last_seen'], 0)
+                info['family'] = 6 if ":" in ip else 4
+                self.active_hosts[ip] = info
+            for ip in removals:
+                self.active_hosts.pop(ip, None)
+                self.learned_macs.pop(ip, None)  # Las MACs llegan con los hosts: vuelve si reaparece
+            self.learned_macs.update(macs)
+        self._mark_changed()
+
+    def _expire_hosts(self):
+        """
+        Sin conexión no llegan bajas: expirar localmente los hosts antiguos
+        """
+        now = time.time()
+        with self.hosts_lock:
+            expired = [ip for ip, info in self.active_hosts.items()
+                       if now - info['last_seen'] > self.host_persistence]
+            for ip in expired:
+                del self.active_hosts[ip]
+                self.learned_macs.pop(ip, None)
+        if expired:
+            self._mark_changed()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ICMP Radar - Demonio de escaneo")
+    parser.add_argument("-n", "--network", default=None,
+                        help="Rango(s) de red a escanear, separados por comas (default: auto-detectar)")
+    parser.add_argument("-a", "--all-interfaces", action="store_true",
+                        help="Escanear todas las subredes conectadas (si no se indica -n)")
+    parser.add_argument("-6", "--ipv6", action="store_true", help="Descubrir también hosts IPv6")
+    parser.add_argument("-b", "--broadcast", action="store_true", help="Pre-barrido con eco a broadcast")
+    parser.add_argument("-i", "--interval", type=float, default=1.0,
+                        help="Intervalo mínimo entre escaneos en segundos (default: 1.0)")
+    parser.add_argument("--max-interval", type=float, default=30,
+                        help="Intervalo máximo con la red estable (default: 30)")
+    parser.add_argument("-p", "--persist", type=int, default=30,
+                        help="Tiempo de persistencia de hosts en segundos (default: 30)")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH,
+                        help=f"Ruta del socket Unix (default: {DEFAULT_SOCKET_PATH})")
+    parser.add_argument("--shm", metavar="NAME", default=None,
+                        help="Publicar también la tabla en este segmento de memoria compartida")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="Registrar también eventos por ping (nivel DEBUG)")
+    args = parser.parse_args()
+
+    if args.verbose:
+        events.set_level("DEBUG")
+    events.install_dump_signal()
+
+    from icmp_scanner import ICMPScanner
+    shared_table = None
+    if args.shm:
+        from shared_table import SharedHostTable
+        try:
+            shared_table = SharedHostTable(args.shm)
+        except FileExistsError as e:
+            print(f"[ERROR] {e}")
+            return 1
+    scanner = ICMPScanner(timeout=0.5, host_persistence=args.persist, ipv6_discovery=args.ipv6,
+                          broadcast_discovery=args.broadcast, shared_table=shared_table)
+    scanner.cadence.min_interval = args.interval
+    scanner.cadence.max_interval = max(args.max_interval, args.interval)
+    scanner.cadence.interval = args.interval
+
+    if args.network:
+        scanner.network_range = args.network
+    elif args.all_interfaces:
+        networks = scanner.get_local_networks()
+        scanner.network_range = [n['network'] for n in networks] or scanner.get_local_network()
+    else:
+        scanner.network_range = scanner.get_local_network()
+    print(f"[NETWORK] Red configurada: {scanner.network_range}")
+
+    daemon = ScannerDaemon(scanner, socket_path=args.socket)
+    daemon.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n[STOP] Deteniendo demonio...")
+    finally:
+        daemon.stop()
+        if shared_table is not None:
+            shared_table.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
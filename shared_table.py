@@ -0,0 +1,460 @@
+"""
+Tabla de hosts en memoria compartida
+
+El escáner (único escritor) mantiene cada host en un registro de tamaño fijo
+dentro de un segmento multiprocessing.shared_memory. Otros procesos del mismo
+equipo (el radar, exportadores, scripts de análisis) leen la tabla sin pasar por
+sockets ni serialización: una copia contigua de los registros validada con un
+seqlock (como bytes o como array NumPy sobre esa copia).
+
+Además de la secuencia del seqlock, que avanza con cada escritura (incluidos
+los refrescos de last_seen), la cabecera lleva una versión visible que solo
+avanza con los cambios que se ven en el radar, y cada registro guarda la
+versión visible de su último cambio: un lector que ya tiene la tabla decodifica
+solo los registros más nuevos que su copia.
+
+Disposición del segmento:
+  cabecera (48 bytes): magic, versión de formato, capacidad, slots usados,
+                       secuencia (seqlock), instante de la última escritura,
+                       PID del escritor, versión visible
+  registros (48 bytes cada uno): familia, flags, ángulo, latencia, last_seen,
+                                 dirección (16 bytes), MAC (6 bytes),
+                                 versión visible del último cambio
+"""
+
+import os
+import time
+import struct
+import socket
+import threading
+from multiprocessing import shared_memory
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+DEFAULT_NAME = "icmp_radar_hosts"
+MAGIC = b"IRHT"
+LAYOUT_VERSION = 3
+STALE_AFTER = 60.0  # Segmentos de otro formato: huérfanos si nadie escribe en este tiempo
+
+HEADER = struct.Struct("<4sIIIQdI4xQ")  # magic, versión, capacidad, usados, secuencia, escrito, PID, visible
+PREFIX = struct.Struct("<4sIIIQd")      # Parte común a todas las versiones del formato
+SEQ_OFFSET = 16
+SEQ = struct.Struct("<Q")
+DISPLAY_OFFSET = 40
+RECORD = struct.Struct("<BBHfd16s6s2xQ")  # familia, flags, ángulo, latencia, last_seen, ip, mac, visible
+STAMP = struct.Struct("<Q")
+STAMP_OFFSET = 40  # Dentro del registro
+
+FLAG_VALID = 0x01
+FLAG_HAS_MAC = 0x02
+
+if HAS_NUMPY:
+    RECORD_DTYPE = np.dtype([
+        ('family', 'u1'), ('flags', 'u1'), ('angle', '<u2'), ('latency', '<f4'),
+        ('last_seen', '<f8'), ('address', 'V16'), ('mac', 'V6'), ('_pad', 'V2'),
+        ('changed', '<u8')
+    ])
+
+
+def _pack_address(ip):
+    if ":" in ip:
+        return 6, socket.inet_pton(socket.AF_INET6, ip)
+    return 4, socket.inet_aton(ip)
+
+
+def _unpack_address(family, raw):
+    if family == 6:
+        return socket.inet_ntop(socket.AF_INET6, raw)
+    return socket.inet_ntoa(raw[:4])
+
+
+def _attach(name):
+    """
+    Abre un segmento existente sin que el resource_tracker lo borre al salir
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: evitar que el resource_tracker borre el segmento al salir
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _process_alive(pid):
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Existe, aunque sea de otro usuario
+    return True
+
+
+def _check_stale(name):
+    """
+    Comprueba que un segmento ya existente es un huérfano de una ejecución anterior
+    (su escritor terminó) antes de reemplazarlo
+
+    Raises:
+        FileExistsError: Si el segmento no es una tabla de hosts o su escritor sigue vivo
+    """
+    existing = _attach(name)
+    try:
+        if existing.size < HEADER.size:
+            raise FileExistsError(f"El segmento '{name}' existe y no es una tabla de hosts")
+        magic, layout, _, _, _, written = PREFIX.unpack_from(existing.buf, 0)
+        if magic != MAGIC:
+            raise FileExistsError(f"El segmento '{name}' existe y no es una tabla de hosts")
+        if layout == LAYOUT_VERSION:
+            owner = HEADER.unpack_from(existing.buf, 0)[6]
+            if _process_alive(owner):
+                raise FileExistsError(f"La tabla compartida '{name}' ya la publica el proceso {owner}")
+        elif time.time() - written < STALE_AFTER:
+            # Otro formato, sin PID: solo se considera huérfano si lleva tiempo sin escribirse
+            raise FileExistsError(f"La tabla compartida '{name}' se escribió hace menos de "
+                                  f"{STALE_AFTER:.0f}s (¿otra versión del escáner en marcha?)")
+    finally:
+        existing.close()
+
+
+class SharedHostTable:
+    def __init__(self, name=DEFAULT_NAME, capacity=65536):
+        """
+        Escritor de la tabla compartida (uno solo por segmento: el escáner)
+
+        Args:
+            name (str): Nombre del segmento de memoria compartida
+            capacity (int): Número máximo de hosts
+
+        Raises:
+            FileExistsError: Si el segmento ya existe y su escritor sigue en marcha
+        """
+        self.name = name
+        self.capacity = capacity
+        self.pid = os.getpid()
+        size = HEADER.size + capacity * RECORD.size
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Solo se reemplaza un segmento huérfano de una ejecución anterior
+            _check_stale(name)
+            stale = _attach(name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.buf = self.shm.buf
+
+        self.lock = threading.Lock()  # Serializa los threads del escritor
+        self.slots = {}  # ip -> índice de registro
+        self.stamps = {}  # índice de registro -> versión visible de su último cambio
+        self.free_slots = []
+        self.used = 0
+        self.seq = 0
+        self.display = 0
+        self.dropped = 0
+        HEADER.pack_into(self.buf, 0, MAGIC, LAYOUT_VERSION, capacity, 0, 0, time.time(), self.pid, 0)
+
+    def _begin_write(self):
+        self.seq += 1  # Impar: escritura en curso
+        SEQ.pack_into(self.buf, SEQ_OFFSET, self.seq)
+
+    def _end_write(self):
+        HEADER.pack_into(self.buf, 0, MAGIC, LAYOUT_VERSION, self.capacity, self.used,
+                         self.seq + 1, time.time(), self.pid, self.display)
+        self.seq += 1
+
+    def update(self, ip, info, mac=None, visible=True):
+        """
+        Escribe (o borra) el registro de un host
+
+        Args:
+            ip (str): Dirección del host
+            info (dict): {latency, last_seen, angle, ...}, o None si el host ya no está activo
+            mac (str): MAC aprendida, si se conoce
+            visible (bool): False si el cambio no se ve en el radar (refresco de last_seen):
+                se escribe el registro sin avanzar la versión visible
+        """
+        with self.lock:
+            slot = self.slots.get(ip)
+            if info is None:
+                if slot is None:
+                    return
+                self._begin_write()
+                self.display += 1
+                self.stamps[slot] = self.display
+                RECORD.pack_into(self.buf, HEADER.size + slot * RECORD.size,
+                                 0, 0, 0, 0.0, 0.0, b"", b"", self.display)
+                del self.slots[ip]
+                self.free_slots.append(slot)
+                self._end_write()
+                return
+
+            if slot is None:
+                if self.free_slots:
+                    slot = self.free_slots.pop()
+                elif self.used < self.capacity:
+                    slot = self.used
+                    self.used += 1
+                else:
+                    self.dropped += 1  # Tabla llena: el host no se publica
+                    return
+                self.slots[ip] = slot
+                visible = True  # Registro nuevo (o reutilizado): siempre visible
+
+            family, address = _pack_address(ip)
+            flags = FLAG_VALID
+            mac_raw = b""
+            if mac:
+                flags |= FLAG_HAS_MAC
+                mac_raw = bytes.fromhex(mac.replace(":", "").replace("-", ""))
+            self._begin_write()
+            if visible:
+                self.display += 1
+                self.stamps[slot] = self.display
+            RECORD.pack_into(self.buf, HEADER.size + slot * RECORD.size,
+                             family, flags, int(info.get('angle', 0)) % 360,
+                             info['latency'], info['last_seen'], address, mac_raw,
+                             self.stamps[slot])
+            self._end_write()
+
+    def close(self):
+        """
+        Libera y elimina el segmento (los lectores conectados dejan de ver cambios)
+        """
+        self.buf = None
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedHostTableReader:
+    def __init__(self, name=DEFAULT_NAME, poll_interval=0.01):
+        """
+        Lector de la tabla compartida. Expone la misma interfaz de lectura que
+        ICMPScanner (get_active_hosts, get_learned_macs, get_state_version,
+        get_display_version, get_changes_since, get_hosts, change_event) para
+        alimentar RadarDisplay desde otro proceso.
+
+        Args:
+            name (str): Nombre del segmento de memoria compartida
+            poll_interval (float): Cada cuánto se comprueba la secuencia al usar start()
+
+        Raises:
+            FileNotFoundError: Si el segmento no existe (el escáner no está publicando)
+            ValueError: Si el segmento no tiene el formato esperado
+        """
+        self.shm = _attach(name)
+        self.buf = self.shm.buf
+        magic, layout, self.capacity, _, _, _ = PREFIX.unpack_from(self.buf, 0)
+        if magic != MAGIC or layout != LAYOUT_VERSION:
+            self.shm.close()
+            raise ValueError(f"Formato de tabla compartida desconocido en '{name}'")
+
+        self.poll_interval = poll_interval
+        self.change_event = threading.Event()
+        self.running = False
+        self.thread = None
+        self.host_persistence = None  # Compatibilidad con ICMPScanner (la expiración la hace el escritor)
+
+        # Caché de la última decodificación: la tabla completa si cambió la secuencia,
+        # o solo los registros con cambios visibles (get_changes_since)
+        self.cached_seq = None
+        self.cached_display = None
+        self.cached_hosts = {}
+        self.cached_macs = {}
+        self.slot_ips = {}  # índice de registro -> IP decodificada
+
+    def get_state_version(self):
+        """
+        Returns:
+            int: Número de escrituras completadas (lectura de 8 bytes, sin copiar la tabla)
+        """
+        return SEQ.unpack_from(self.buf, SEQ_OFFSET)[0] // 2
+
+    def get_display_version(self):
+        """
+        Returns:
+            int: Versión visible: solo avanza con cambios que se ven en el radar
+                (lectura de 8 bytes, sin copiar la tabla)
+        """
+        return STAMP.unpack_from(self.buf, DISPLAY_OFFSET)[0]
+
+    def _read(self):
+        """
+        Copia consistente de los registros usados y de la versión visible
+
+        Returns:
+            tuple: (bytes con los registros, secuencia, versión visible)
+        """
+        while True:
+            seq = SEQ.unpack_from(self.buf, SEQ_OFFSET)[0]
+            if seq & 1:
+                time.sleep(0)  # Escritura en curso
+                continue
+            used = HEADER.unpack_from(self.buf, 0)[3]
+            display = STAMP.unpack_from(self.buf, DISPLAY_OFFSET)[0]
+            raw = bytes(self.buf[HEADER.size:HEADER.size + used * RECORD.size])
+            if SEQ.unpack_from(self.buf, SEQ_OFFSET)[0] == seq:
+                return raw, seq, display
+
+    def read_raw(self):
+        """
+        Copia consistente de los registros usados (un solo memcpy validado con el seqlock)
+
+        Returns:
+            tuple: (bytes con los registros, secuencia en la que se leyeron)
+        """
+        raw, seq, _ = self._read()
+        return raw, seq
+
+    def read_array(self):
+        """
+        Registros como array estructurado de NumPy (solo los válidos), para análisis.
+        Es una vista sobre la copia de read_raw, no sobre el segmento
+
+        Returns:
+            numpy.ndarray: Campos family, flags, angle, latency, last_seen, address, mac, changed
+        """
+        if not HAS_NUMPY:
+            raise RuntimeError("read_array requiere NumPy")
+        raw, _ = self.read_raw()
+        records = np.frombuffer(raw, dtype=RECORD_DTYPE)
+        return records[(records['flags'] & FLAG_VALID) != 0]
+
+    def _forget_slot(self, slot):
+        ip = self.slot_ips.pop(slot, None)
+        if ip is not None:
+            self.cached_hosts.pop(ip, None)
+            self.cached_macs.pop(ip, None)
+        return ip
+
+    def _decode_slot(self, slot, record):
+        family, flags, angle, latency, last_seen, address, mac, _ = record
+        if not flags & FLAG_VALID:
+            return None
+        ip = _unpack_address(family, address)
+        self.slot_ips[slot] = ip
+        self.cached_hosts[ip] = {'latency': latency, 'last_seen': last_seen, 'angle': angle, 'family': family}
+        if flags & FLAG_HAS_MAC:
+            self.cached_macs[ip] = ":".join(f"{b:02x}" for b in mac)
+        return ip
+
+    def _decode(self):
+        seq = SEQ.unpack_from(self.buf, SEQ_OFFSET)[0]
+        if seq == self.cached_seq:
+            return
+        raw, seq, display = self._read()
+        self.cached_hosts, self.cached_macs, self.slot_ips = {}, {}, {}
+        for slot, record in enumerate(RECORD.iter_unpack(raw)):
+            self._decode_slot(slot, record)
+        self.cached_seq, self.cached_display = seq, display
+
+    def _changed_slots(self, raw, version):
+        if HAS_NUMPY:
+            stamps = np.frombuffer(raw, dtype=RECORD_DTYPE)['changed']
+            return np.flatnonzero(stamps > version).tolist()
+        return [slot for slot in range(len(raw) // RECORD.size)
+                if STAMP.unpack_from(raw, slot * RECORD.size + STAMP_OFFSET)[0] > version]
+
+    def get_changes_since(self, version):
+        """
+        IPs con cambios visibles desde la última tabla entregada, decodificando solo
+        los registros que cambiaron (misma interfaz que ICMPScanner)
+
+        Args:
+            version (int): Versión leída con get_display_version antes de get_active_hosts
+
+        Returns:
+            tuple: (versión visible actual, set de IPs cambiadas), o None si aún no se
+                entregó ninguna tabla (hay que llamar a get_active_hosts)
+        """
+        if self.cached_display is None or version > self.cached_display:
+            return None
+        raw, seq, display = self._read()
+        slots = self._changed_slots(raw, self.cached_display)
+        # Primero se olvidan los ocupantes anteriores: un host que cambió de registro
+        # no debe borrarse al procesar su registro antiguo
+        changed = {ip for ip in map(self._forget_slot, slots) if ip is not None}
+        for slot in slots:
+            ip = self._decode_slot(slot, RECORD.unpack_from(raw, slot * RECORD.size))
+            if ip is not None:
+                changed.add(ip)
+        self.cached_display = display
+        self.cached_seq = None  # Los refrescos no visibles no se decodificaron
+        return display, changed
+
+    def get_hosts(self, ips):
+        """
+        Estado de unos hosts concretos según la última decodificación
+
+        Returns:
+            tuple: ({ip: info o None}, {ip: MAC o None})
+        """
+        return ({ip: self.cached_hosts.get(ip) for ip in ips},
+                {ip: self.cached_macs.get(ip) for ip in ips})
+
+    def get_active_hosts(self):
+        self._decode()
+        return dict(self.cached_hosts)
+
+    def get_learned_macs(self):
+        self._decode()
+        return dict(self.cached_macs)
+
+    def get_learned_macs_count(self):
+        return len(self.get_learned_macs())
+
+    def start(self):
+        """
+        Vigila la versión visible en segundo plano y activa change_event con cada
+        cambio que se ve en el radar
+        """
+        self.running = True
+
+        def watch():
+            last = self.get_display_version()
+            while self.running:
+                time.sleep(self.poll_interval)
+                current = self.get_display_version()
+                if current != last:
+                    last = current
+                    self.change_event.set()
+
+        self.thread = threading.Thread(target=watch, daemon=True)
+        self.thread.start()
+
+    def stop_scan(self):
+        """
+        Deja de vigilar y desconecta del segmento (mismo nombre que en ICMPScanner)
+        """
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=1)
+        self.cached_hosts, self.cached_macs = {}, {}
+        self.buf = None
+        self.shm.close()
+
+
+if __name__ == "__main__":
+    # Ejemplo: volcar la tabla publicada por un escáner en marcha
+    import sys
+
+    reader = SharedHostTableReader(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_NAME)
+    start = time.perf_counter()
+    hosts = reader.get_active_hosts()
+    elapsed = (time.perf_counter() - start) * 1e6
+    macs = reader.get_learned_macs()
+    for ip, info in sorted(hosts.items()):
+        print(f"{ip:<40} {info['latency']:7.1f}ms  {macs.get(ip, '-')}")
+    print(f"[SHM] {len(hosts)} hosts (versión {reader.get_state_version()}) leídos en {elapsed:.0f}µs")
+    reader.stop_scan()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark del tiempo de arranque
+
+Mide cada etapa del arranque en un intérprete nuevo (sin módulos ya cargados)
+y repite varias veces para quedarse con la mediana. Sale con código 1 si alguna
+etapa supera su presupuesto, falla, o si importar el escáner carga Scapy, para
+detectar regresiones.
+
+Uso:
+  python startup_benchmark.py
+  python startup_benchmark.py --repeat 10 --budget import_scanner=300 --budget first_frame=800
+  python startup_benchmark.py --allow-unavailable first_frame   # Sin pantalla ni pygame
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Cada etapa imprime un JSON con su duración en ms (y datos extra)
+STAGES = {
+    'import_scanner': """
+import sys, time, json
+start = time.perf_counter()
+import icmp_scanner
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({'ms': elapsed, 'scapy_loaded': any(m.startswith('scapy') for m in sys.modules)}))
+""",
+    'privilege_check': """
+import time, json
+from reply_listener import has_raw_socket_privileges
+start = time.perf_counter()
+allowed = has_raw_socket_privileges()
+print(json.dumps({'ms': (time.perf_counter() - start) * 1000, 'allowed': allowed}))
+""",
+    'scanner_init': """
+import time, json
+from icmp_scanner import ICMPScanner
+start = time.perf_counter()
+scanner = ICMPScanner()
+scanner.network_range = scanner.get_local_network()
+print(json.dumps({'ms': (time.perf_counter() - start) * 1000}))
+""",
+    'first_frame': """
+import os, time, json
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+start = time.perf_counter()
+from radar_display import RadarDisplay
+radar = RadarDisplay(800, 600)
+radar.update_display({}, "Inicializando", {})
+elapsed = (time.perf_counter() - start) * 1000
+radar.cleanup()
+print(json.dumps({'ms': elapsed}))
+""",
+}
+
+DEFAULT_BUDGETS_MS = {
+    'import_scanner': 500,
+    'privilege_check': 50,
+    'scanner_init': 500,
+    'first_frame': 1500,
+}
+
+
+def run_stage(code):
+    """
+    Ejecuta una etapa en un intérprete nuevo
+
+    Returns:
+        dict: Resultado de la etapa, o {'error': mensaje}
+    """
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)), timeout=60)
+    lines = result.stdout.strip().splitlines()
+    if result.returncode != 0 or not lines:
+        error = (result.stderr.strip().splitlines() or ["sin salida"])[-1]
+        return {'error': error}
+    return json.loads(lines[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ICMP Radar - Benchmark de arranque")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Repeticiones por etapa (default: 5)")
+    parser.add_argument("--budget", action="append", default=[], metavar="ETAPA=MS",
+                        help="Presupuesto en ms para una etapa (se puede repetir)")
+    parser.add_argument("--stages", default=",".join(STAGES),
+                        help="Etapas a medir, separadas por comas (default: todas)")
+    parser.add_argument("--allow-unavailable", action="append", default=[], metavar="ETAPA",
+                        help="Etapa que puede fallar sin dar el benchmark por fallido (se puede repetir)")
+    args = parser.parse_args()
+
+    budgets = dict(DEFAULT_BUDGETS_MS)
+    for item in args.budget:
+        stage, _, value = item.partition("=")
+        budgets[stage] = float(value)
+
+    failed = False
+    print(f"{'Etapa':<18}{'Mediana':>10}{'Mín':>10}{'Máx':>10}{'Presupuesto':>13}")
+    for stage in args.stages.split(","):
+        results = [run_stage(STAGES[stage]) for _ in range(args.repeat)]
+        errors = [r['error'] for r in results if 'error' in r]
+        if errors:
+            if stage in args.allow_unavailable:
+                print(f"{stage:<18}  no disponible (permitido): {errors[0]}")
+            else:
+                print(f"{stage:<18}  ERROR: {errors[0]}")
+                failed = True
+            continue
+
+        times = [r['ms'] for r in results]
+        median = statistics.median(times)
+        budget = budgets.get(stage)
+        over = budget is not None and median > budget
+        failed |= over
+        print(f"{stage:<18}{median:>9.1f}ms{min(times):>8.1f}ms{max(times):>8.1f}ms"
+              f"{(f'{budget:.0f}ms' if budget else '-'):>13}{'  EXCEDIDO' if over else ''}")
+
+        if stage == 'import_scanner' and any(r.get('scapy_loaded') for r in results):
+            print("  [REGRESIÓN] Importar icmp_scanner carga Scapy (debe importarse solo al usarse)")
+            failed = True
+        if stage == 'privilege_check' and not results[0].get('allowed'):
+            print("  (sin permisos para sockets raw: el radar no podrá sondear)")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())